@@ -3,13 +3,17 @@ Tantrik AI Agents package
 """
 
 from .spirit_agent import SpiritAgent
+from .async_spirit_agent import AsyncSpiritAgent
 from .dracula_agent import DraculaAgent
 from .reaper_agent import ReaperAgent
 from .bloody_mary_agent import BloodyMaryAgent
+from .registry import SpiritRegistry
 
 __all__ = [
     "SpiritAgent",
+    "AsyncSpiritAgent",
     "DraculaAgent",
     "ReaperAgent",
     "BloodyMaryAgent",
+    "SpiritRegistry",
 ]
@@ -0,0 +1,342 @@
+"""
+Async SpiritAgent: AsyncOpenAI wrapper used by the ASGI serving path
+"""
+
+import time
+import asyncio
+import logging
+from functools import partial
+from typing import Awaitable, Callable, List, Dict, Optional, AsyncGenerator, AsyncIterator, Any, Tuple
+from openai import AsyncOpenAI, OpenAIError, RateLimitError
+
+from .batch import BATCH_CONCURRENCY, fan_out_async
+from .deadline import Deadline, DeadlineExceeded
+from .key_pool import Upstream
+from .metrics import STREAMS_ACTIVE, TTFT, child
+from .response_cache import replay_chunks
+from .single_flight import ASYNC_SINGLE_FLIGHT
+from .routing import Route
+from .spirit_agent import Placeholder, SpiritAgent
+from .tracing import span, start_span
+
+logger = logging.getLogger("tantrik-ai.spirit")
+
+
+class AsyncSpiritAgent(SpiritAgent):
+    """Asyncio variant of SpiritAgent; one event loop serves many streams."""
+
+    client_class = AsyncOpenAI
+    single_flight = ASYNC_SINGLE_FLIGHT
+
+    @classmethod
+    def from_spirit(cls, spirit: SpiritAgent) -> "AsyncSpiritAgent":
+        """Build an async twin sharing the personality and keys of a sync agent."""
+        fallback = spirit.fallback_client
+        return cls(
+            name=spirit.name,
+            system_prompt=spirit.system_prompt,
+            primary_api_key=spirit.primary_client.api_key,
+            fallback_api_key=fallback.api_key if fallback else None,
+            model=spirit.model,
+            temperature=spirit.temperature,
+            max_tokens=spirit.max_tokens,
+            spirit_id=spirit.spirit_id
+        )
+
+    async def _create(self, client, upstream: Upstream, deadline: Deadline, reserve: float, **params):
+        """Upstream call with jittered retries, every attempt bounded by the request deadline."""
+        attempt = 0
+        while True:
+            try:
+                with upstream.calling(), span(
+                    "upstream.connect" if params.get("stream") else "upstream.call", attempt=attempt
+                ):
+                    raw = await client.chat.completions.with_raw_response.create(
+                        timeout=deadline.attempt_timeout(reserve), **params
+                    )
+                upstream.observe(raw.headers)
+                return raw.parse()
+            except OpenAIError as e:
+                upstream.observe_error(e)
+                if isinstance(e, RateLimitError) and reserve > 0:
+                    raise
+                delay = deadline.retry_delay(attempt, e, reserve)
+                if delay < 0:
+                    raise
+                logger.info(f"🔁 {self.name} retrying in {delay:.2f}s ({type(e).__name__})")
+                with span("upstream.backoff"):
+                    await asyncio.sleep(delay)
+                attempt += 1
+
+    async def chat(
+        self, messages: List[Dict[str, str]], reserved: Optional[str] = None, deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """Async chat; cache hits and identical in-flight requests skip the upstream call."""
+        deadline = deadline or Deadline.after()
+        key = self._request_key(messages)
+        cached = self._cached(key) or self._near_duplicate(messages)
+        if cached:
+            return dict(cached, cached=True)
+
+        if self.single_flight is None:
+            return await self._complete_and_store(key, messages, reserved, deadline)
+        try:
+            return await self.single_flight.do(
+                key, lambda: self._complete_and_store(key, messages, reserved, deadline), deadline
+            )
+        except DeadlineExceeded as e:
+            return self._gave_up_waiting(e)
+
+    def chat_batch(
+        self,
+        conversations: List[List[Dict[str, str]]],
+        concurrency: int = BATCH_CONCURRENCY,
+        chat: Optional[Callable[[List[Dict[str, str]]], Awaitable[Dict[str, Any]]]] = None
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Async `chat_batch`; iterate with `async for`."""
+        return fan_out_async([partial(chat or self.chat, messages) for messages in conversations], concurrency)
+
+    async def _complete_and_store(
+        self, key: str, messages: List[Dict[str, str]], reserved: Optional[str], deadline: Deadline
+    ) -> Dict[str, Any]:
+        prompt, context = self._build_messages(messages)
+        route = self._choose_route(messages)
+        result = await self._complete(prompt, reserved, deadline, route)
+        result["context"] = context
+        result["route"] = route.public()
+        self._store(key, result, messages)
+        return result
+
+    async def _complete(
+        self,
+        prompt: List[Dict[str, str]],
+        reserved: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        route: Optional[Route] = None,
+        tried: Tuple[str, ...] = ()
+    ) -> Dict[str, Any]:
+        """Async chat completion with fallback support."""
+        deadline = deadline or Deadline.after()
+        route = route or self.default_route
+        client, upstream = self._route(tried, reserved)
+        api_used, breaker = upstream.name, upstream.breaker
+        started = time.monotonic()
+
+        try:
+            response = await self._create(
+                client, upstream, deadline, self._reserve(tried, api_used),
+                model=route.model,
+                messages=prompt,
+                temperature=self.temperature,
+                max_tokens=route.max_tokens
+            )
+
+            latency = time.monotonic() - started
+            breaker.record_success(latency)
+            content = response.choices[0].message.content or ""
+            tokens = response.usage.total_tokens if response.usage else 0
+            self._observe_completion(api_used, latency, tokens, route)
+
+            logger.info(f"✅ {self.name} ({api_used}): {tokens} tokens")
+
+            return {
+                "content": content,
+                "model": route.model,
+                "tokens_used": tokens,
+                "api_used": api_used,
+                "success": True
+            }
+
+        except OpenAIError as e:
+            logger.error(f"❌ {self.name} ({api_used}): {str(e)}")
+            self._record_error(breaker, e, started)
+
+            if self._observe_failure("chat", api_used, e, route, tried):
+                logger.info(f"🔄 {self.name} trying next key...")
+                return await self._complete(prompt, reserved, deadline, route, tried + (api_used,))
+
+            return {
+                "content": "*The spirit flickers and fades into darkness...*",
+                "model": route.model,
+                "tokens_used": 0,
+                "api_used": api_used,
+                "success": False,
+                "error": str(e)
+            }
+
+        except Exception as e:
+            logger.error(f"❌ {self.name} unexpected error: {str(e)}")
+            self._observe_failure("chat", api_used, e, route, tried)
+            return {
+                "content": "*The spirit cannot manifest at this time...*",
+                "model": route.model,
+                "tokens_used": 0,
+                "api_used": api_used,
+                "success": False,
+                "error": str(e)
+            }
+
+    async def stream_chat(
+        self, messages: List[Dict[str, str]], reserved: Optional[str] = None, deadline: Optional[Deadline] = None
+    ) -> AsyncGenerator[str, None]:
+        """
+        Async streaming chat; cached replies are replayed and identical live streams are shared.
+
+        The stream simply ends when the deadline passes, so callers can still close it cleanly.
+        """
+        deadline = deadline or Deadline.after()
+        key = self._request_key(messages)
+        active = child(STREAMS_ACTIVE, self.spirit_id)
+        active.inc()
+        upstream = None
+        try:
+            opener = self._pooled_opener(messages)
+            if opener:
+                for chunk in replay_chunks(opener):
+                    yield chunk
+                return
+
+            cached = self._cached(key) or self._near_duplicate(messages)
+            if cached:
+                for chunk in replay_chunks(cached["content"]):
+                    yield chunk
+                return
+
+            prompt, _ = self._build_messages(messages)
+            route = self._choose_route(messages)
+            if self.single_flight is None:
+                upstream = self._open_stream(prompt, reserved, deadline, route)
+            else:
+                upstream = self.single_flight.stream(
+                    key, lambda: self._open_stream(prompt, reserved, deadline, route)
+                )
+            async for chunk in upstream:
+                yield chunk
+                if deadline.expired():
+                    logger.warning(f"⌛ {self.name} stream cut at request deadline")
+                    break
+        finally:
+            if upstream is not None:
+                await upstream.aclose()
+            active.dec()
+
+    async def _hedged_stream(
+        self, prompt: List[Dict[str, str]], reserved: Optional[str], deadline: Deadline, route: Route
+    ) -> AsyncGenerator[str, None]:
+        """
+        Stream from the best key, racing the next best if no token arrives within the hedge delay.
+
+        Whichever leg yields first wins; the loser is cancelled immediately.
+        """
+        # Route the first leg here, once, so the hedge leg can stay off its key
+        _, first = self._route((), reserved)
+        legs = {"primary": self._stream(prompt, reserved, deadline, route, (), first)}
+        pending = {asyncio.ensure_future(legs["primary"].__anext__()): "primary"}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=min(self.hedge.delay(), deadline.remaining()))
+            if not done and self.hedge.acquire():
+                logger.info(f"🏁 {self.name} {first.name} slow to first token, hedging on the next key")
+                legs["fallback"] = self._stream(prompt, None, deadline, route, (first.name,))
+                pending[asyncio.ensure_future(legs["fallback"].__anext__())] = "fallback"
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            elif not done:
+                done, _ = await asyncio.wait(pending)
+
+            # Prefer the primary if both legs produced a token in the same tick
+            first = min(done, key=lambda task: pending[task] != "primary")
+            winner = pending.pop(first)
+            for task in pending:
+                task.cancel()
+            if len(legs) == 2:
+                logger.info(f"🏁 {self.name} hedge won by {winner}")
+
+            try:
+                yield first.result()
+            except StopAsyncIteration:
+                return
+            async for chunk in legs[winner]:
+                yield chunk
+        finally:
+            for task in pending:
+                task.cancel()
+            # A generator can only be closed once its cancelled __anext__ has unwound
+            await asyncio.gather(*pending, return_exceptions=True)
+            for upstream in legs.values():
+                await upstream.aclose()
+
+    async def _stream(
+        self,
+        prompt: List[Dict[str, str]],
+        reserved: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        route: Optional[Route] = None,
+        tried: Tuple[str, ...] = (),
+        chosen: Optional[Upstream] = None
+    ) -> AsyncGenerator[str, None]:
+        """Async streaming chat completion with fallback support."""
+        deadline = deadline or Deadline.after()
+        route = route or self.default_route
+        first_choice = not tried and not self._diverted(reserved)
+        client, upstream = self._route(tried, reserved, chosen)
+        api_used, breaker = upstream.name, upstream.breaker
+        started = time.monotonic()
+        stream = None
+        streamed = 0
+        waiting = None
+
+        try:
+            stream = await self._create(
+                client, upstream, deadline, self._reserve(tried, api_used),
+                model=route.model,
+                messages=prompt,
+                temperature=self.temperature,
+                max_tokens=route.max_tokens,
+                stream=True
+            )
+
+            logger.info(f"🌊 {self.name} streaming ({api_used})")
+
+            waiting = start_span("upstream.first_token", upstream=api_used)
+            first_token = None
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first_token is None:
+                        if waiting is not None:
+                            waiting.end()
+                        first_token = time.monotonic() - started
+                        child(TTFT, self.spirit_id, api_used).observe(first_token)
+                        if self.hedge and first_choice:
+                            self.hedge.observe(first_token)
+                    streamed += 1
+                    yield chunk.choices[0].delta.content
+            breaker.record_success(first_token if first_token is not None else time.monotonic() - started)
+            self._observe_stream(api_used, time.monotonic() - started, first_token, streamed, route)
+
+        except (GeneratorExit, asyncio.CancelledError):
+            # aclose() at a yield, or task cancellation (ASGI disconnect) while awaiting a chunk
+            if stream is not None:
+                self._aborted(api_used, streamed)
+            raise
+
+        except OpenAIError as e:
+            logger.error(f"❌ {self.name} stream failed ({api_used}): {str(e)}")
+            self._record_error(breaker, e, started)
+
+            if self._observe_failure("stream", api_used, e, route, tried):
+                logger.info(f"🔄 {self.name} trying next key's stream...")
+                async for chunk in self._stream(prompt, reserved, deadline, route, tried + (api_used,)):
+                    yield chunk
+            else:
+                yield Placeholder("*The spirit's voice fades into the void...*")
+
+        except Exception as e:
+            logger.error(f"❌ {self.name} stream error: {str(e)}")
+            self._observe_failure("stream", api_used, e, route, tried)
+            yield Placeholder("*The connection to the spirit realm has been severed...*")
+
+        finally:
+            if waiting is not None:
+                waiting.end()
+            if stream is not None:
+                # Shielded so a cancelled task still releases the upstream connection
+                await asyncio.shield(stream.close())
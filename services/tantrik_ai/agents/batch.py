@@ -0,0 +1,64 @@
+"""
+Bounded concurrent fan-out for batches of independent chat jobs
+"""
+
+import os
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Tuple
+
+logger = logging.getLogger("tantrik-ai.batch")
+
+# Jobs of one batch running at once
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 8))
+
+Result = Dict[str, Any]
+
+
+def _failed(error: Exception) -> Result:
+    logger.error(f"❌ Batch job failed: {str(error)}")
+    return {"success": False, "error": str(error)}
+
+
+def fan_out(jobs: List[Callable[[], Result]], concurrency: int = BATCH_CONCURRENCY) -> Iterator[Tuple[int, Result]]:
+    """
+    Run jobs on a bounded thread pool, yielding (index, result) as each finishes.
+
+    A job that raises yields a failed result instead of ending the batch.
+    Closing the iterator early cancels the jobs that have not started.
+    """
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(jobs))), thread_name_prefix="batch")
+    futures = {executor.submit(contextvars.copy_context().run, job): index for index, job in enumerate(jobs)}
+    try:
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = _failed(e)
+            yield futures[future], result
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def fan_out_async(
+    jobs: List[Callable[[], Awaitable[Result]]], concurrency: int = BATCH_CONCURRENCY
+) -> AsyncIterator[Tuple[int, Result]]:
+    """Async `fan_out`: at most `concurrency` jobs await the upstream at once."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(index: int, job: Callable[[], Awaitable[Result]]) -> Tuple[int, Result]:
+        async with semaphore:
+            try:
+                return index, await job()
+            except Exception as e:
+                return index, _failed(e)
+
+    tasks = [asyncio.ensure_future(run(index, job)) for index, job in enumerate(jobs)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,139 @@
+"""
+Per-upstream-key circuit breakers for health-aware primary/fallback routing
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict
+
+from openai import APIConnectionError, APIStatusError, OpenAIError, RateLimitError
+
+logger = logging.getLogger("tantrik-ai.breaker")
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", 0.5))
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", 20))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", 15.0))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", 30.0))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_upstream_failure(error: OpenAIError) -> bool:
+    """Connection errors, timeouts, 429s and 5xx count against a key; other 4xx are the caller's fault."""
+    if isinstance(error, (APIConnectionError, RateLimitError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+class CircuitBreaker:
+    """Opens after repeated failures or a high error rate, then probes before closing again."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        error_rate: float = BREAKER_ERROR_RATE,
+        window: int = BREAKER_WINDOW,
+        slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS,
+        reset_seconds: float = BREAKER_RESET_SECONDS
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_seconds = reset_seconds
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_started_at = None
+        self.consecutive_failures = 0
+        self.outcomes = deque(maxlen=window)  # True = failure
+        self.avg_latency = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """May a request use this upstream now? In half-open state one probe is let through."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now - self.opened_at < self.reset_seconds:
+                    return False
+                self.state = HALF_OPEN
+                logger.info(f"🩺 {self.name} circuit half-open, probing")
+
+            # A probe whose caller vanished (e.g. client disconnect) must not block forever
+            if self.probe_started_at is None or now - self.probe_started_at > self.reset_seconds:
+                self.probe_started_at = now
+                return True
+            return False
+
+    def record_success(self, latency: float) -> None:
+        slow = latency > self.slow_call_seconds
+        with self._lock:
+            self.avg_latency = latency if not self.avg_latency else 0.8 * self.avg_latency + 0.2 * latency
+            if slow:
+                self._failure_locked(f"slow call ({latency:.1f}s)")
+                return
+            self.outcomes.append(False)
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                logger.info(f"✅ {self.name} circuit closed")
+            self.state = CLOSED
+            self.probe_started_at = None
+
+    def record_failure(self, reason: str = "error") -> None:
+        with self._lock:
+            self._failure_locked(reason)
+
+    def _failure_locked(self, reason: str) -> None:
+        self.outcomes.append(True)
+        self.consecutive_failures += 1
+        failures = sum(self.outcomes)
+        calls = len(self.outcomes)
+        rate_tripped = calls >= self.failure_threshold and failures / calls >= self.error_rate
+
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold or rate_tripped:
+            if self.state != OPEN:
+                logger.warning(f"⚡ {self.name} circuit open after {reason}")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self.probe_started_at = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = len(self.outcomes)
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "error_rate": round(sum(self.outcomes) / calls, 3) if calls else 0.0,
+                "avg_latency_ms": round(self.avg_latency * 1000)
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_lock = threading.Lock()
+
+
+def get_breaker(api_key: str) -> CircuitBreaker:
+    """Return the process-wide breaker for an upstream key (shared by sync and async agents)."""
+    with _lock:
+        breaker = _breakers.get(api_key)
+        if breaker is None:
+            breaker = _breakers[api_key] = CircuitBreaker(f"key …{api_key[-4:]}")
+        return breaker
+
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    """Breaker snapshots keyed by masked key name, for /health."""
+    with _lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
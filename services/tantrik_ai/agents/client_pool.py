@@ -0,0 +1,104 @@
+"""
+Process-wide OpenAI client registry: one keep-alive pool per API key
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional, Tuple, Type
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+logger = logging.getLogger("tantrik-ai.pool")
+
+POOL_MAX_CONNECTIONS = int(os.getenv("OPENAI_POOL_MAX_CONNECTIONS", 100))
+POOL_MAX_KEEPALIVE = int(os.getenv("OPENAI_POOL_MAX_KEEPALIVE", 20))
+POOL_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_POOL_KEEPALIVE_EXPIRY", 60.0))
+# Connections to open per key at startup (0 disables warm-up)
+POOL_WARMUP = int(os.getenv("OPENAI_POOL_WARMUP", 0))
+
+_clients: Dict[Tuple[type, str, Optional[str]], object] = {}
+_lock = threading.Lock()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=POOL_MAX_KEEPALIVE,
+        keepalive_expiry=POOL_KEEPALIVE_EXPIRY
+    )
+
+
+def get_client(client_class: Type, api_key: str, base_url: Optional[str] = None):
+    """Return the shared client for (client_class, api_key, base_url), creating it on first use."""
+    key = (client_class, api_key, base_url)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            is_async = issubclass(client_class, AsyncOpenAI)
+            http_client = (DefaultAsyncHttpxClient if is_async else DefaultHttpxClient)(limits=_limits())
+            # Retries are done by SpiritAgent within each request's deadline
+            client = client_class(
+                api_key=api_key,
+                # None falls back to OPENAI_BASE_URL / the OpenAI API
+                base_url=base_url,
+                timeout=30.0,
+                max_retries=0,
+                http_client=http_client
+            )
+            _clients[key] = client
+            logger.info(f"🔌 New {'async ' if is_async else ''}connection pool ({len(_clients)} total)")
+    return client
+
+
+def _clients_of(client_class: Type) -> list:
+    with _lock:
+        return [client for (cls, _, _), client in _clients.items() if issubclass(cls, client_class)]
+
+
+def _touch(client) -> None:
+    try:
+        client.models.list()
+    except Exception as e:
+        logger.warning(f"⚠️ Pool warm-up request failed: {str(e)}")
+
+
+def warm_up(connections: int = POOL_WARMUP) -> None:
+    """Open `connections` keep-alive connections on every sync pool (blocking)."""
+    threads = [
+        threading.Thread(target=_touch, args=(client,), daemon=True)
+        for client in _clients_of(OpenAI)
+        for _ in range(connections)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if threads:
+        logger.info(f"🔥 Warmed {len(threads)} upstream connections")
+
+
+def start_warm_up(connections: int = POOL_WARMUP) -> None:
+    """Warm sync pools in the background so startup is not delayed."""
+    if connections > 0:
+        threading.Thread(target=warm_up, args=(connections,), daemon=True).start()
+
+
+async def warm_up_async(connections: int = POOL_WARMUP) -> None:
+    """Open `connections` keep-alive connections on every async pool."""
+    async def touch(client) -> None:
+        try:
+            await client.models.list()
+        except Exception as e:
+            logger.warning(f"⚠️ Pool warm-up request failed: {str(e)}")
+
+    tasks = [touch(client) for client in _clients_of(AsyncOpenAI) for _ in range(connections)]
+    if tasks:
+        await asyncio.gather(*tasks)
+        logger.info(f"🔥 Warmed {len(tasks)} async upstream connections")
@@ -0,0 +1,18 @@
+"""
+Small helpers for reading agent settings from the environment
+"""
+
+import os
+from typing import Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+def env_map(name: str, cast: Callable[[str], T] = float) -> Dict[str, T]:
+    """Parse a per-spirit override list such as NAME="dracula=600,reaper=120"."""
+    values: Dict[str, T] = {}
+    for item in os.getenv(name, "").split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            values[key.strip()] = cast(value.strip())
+    return values
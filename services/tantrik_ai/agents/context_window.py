@@ -0,0 +1,177 @@
+"""
+Token-budgeted conversation windowing with an optional rolling summary
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import env_map
+from .metrics import QUEUE_DEPTH, child
+
+logger = logging.getLogger("tantrik-ai.context")
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 4000))
+CONTEXT_TOKEN_BUDGETS = env_map("CONTEXT_TOKEN_BUDGETS", int)
+CONTEXT_SUMMARY = os.getenv("CONTEXT_SUMMARY", "0") == "1"
+
+# Per-message framing tokens added by the chat format
+MESSAGE_OVERHEAD = 4
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """Local token estimate (~4 characters per token for English BPE vocabularies)."""
+    return max(1, (len(text) + 3) // 4)
+
+
+def message_tokens(message: Dict[str, str]) -> int:
+    return MESSAGE_OVERHEAD + count_tokens(str(message.get("content", "")))
+
+
+SummarizeFn = Callable[[Optional[str], List[Dict[str, str]]], str]
+
+
+def prefix_keys(spirit_id: str, messages: List[Dict[str, str]]) -> List[str]:
+    """
+    keys[n] identifies the spirit plus the exact first n messages.
+
+    A summary is stored under the key of the messages it covers, so only a
+    request that repeats that whole history (the same conversation) can use it.
+    """
+    digest = hashlib.sha256(spirit_id.encode("utf-8"))
+    keys = [digest.hexdigest()]
+    for message in messages:
+        digest.update(json.dumps([message.get("role"), str(message.get("content", ""))]).encode("utf-8"))
+        keys.append(digest.hexdigest())
+    return keys
+
+
+class RollingSummarizer:
+    """Folds turns that fall out of the window into a per-conversation summary, off the request path."""
+
+    def __init__(self, max_conversations: int = 1024):
+        self.max_conversations = max_conversations
+        # key of the summarized prefix (see prefix_keys) -> (messages covered, summary text)
+        self._summaries: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summary")
+
+    def get(self, keys: List[str]) -> Optional[Tuple[int, str]]:
+        """The summary of the longest prefix of this history that has one."""
+        with self._lock:
+            for key in reversed(keys[1:]):
+                entry = self._summaries.get(key)
+                if entry is not None:
+                    self._summaries.move_to_end(key)
+                    return entry
+            return None
+
+    def schedule(self, keys: List[str], dropped: List[Dict[str, str]], summarize: SummarizeFn) -> None:
+        """Extend the summary to cover `dropped` in the background (no-op if already covered)."""
+        target = keys[len(dropped)]
+        with self._lock:
+            if target in self._summaries or target in self._pending:
+                return
+            self._pending.add(target)
+        child(QUEUE_DEPTH, "summaries").inc()
+        self._executor.submit(self._run, keys[:len(dropped) + 1], list(dropped), summarize)
+
+    def _run(self, keys: List[str], dropped: List[Dict[str, str]], summarize: SummarizeFn) -> None:
+        target = keys[-1]
+        try:
+            covered, previous = self.get(keys) or (0, None)
+            summary = summarize(previous, dropped[covered:])
+            with self._lock:
+                self._summaries[target] = (len(dropped), summary)
+                self._summaries.move_to_end(target)
+                while len(self._summaries) > self.max_conversations:
+                    self._summaries.popitem(last=False)
+            logger.info(f"📜 Summarized {len(dropped)} earlier messages")
+        except Exception as e:
+            logger.warning(f"⚠️ Rolling summary failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending.discard(target)
+            child(QUEUE_DEPTH, "summaries").dec()
+
+
+SUMMARIZER = RollingSummarizer() if CONTEXT_SUMMARY else None
+
+
+class ContextWindow:
+    """Keeps the system prompt plus the most recent turns within a token budget."""
+
+    def __init__(self, spirit_id: str, budget: int, summarizer: Optional[RollingSummarizer] = None):
+        self.spirit_id = spirit_id
+        self.budget = budget
+        self.summarizer = summarizer
+
+    @classmethod
+    def for_spirit(cls, spirit_id: str) -> "ContextWindow":
+        budget = CONTEXT_TOKEN_BUDGETS.get(spirit_id, CONTEXT_TOKEN_BUDGET)
+        return cls(spirit_id, budget, SUMMARIZER)
+
+    def build(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        summarize: Optional[SummarizeFn] = None
+    ) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        """
+        Window the history for one request.
+
+        Args:
+            system_prompt: The spirit's system prompt (always kept)
+            messages: Full client-supplied history
+            summarize: Summary function used to fold dropped turns
+
+        Returns:
+            (prompt messages, context metadata for the response)
+        """
+        system = {"role": "system", "content": system_prompt}
+        used = message_tokens(system)
+
+        keys = None
+        summary = None
+        if self.summarizer and summarize:
+            # The latest message is always kept, so it is never part of a summary
+            keys = prefix_keys(self.spirit_id, messages[:-1])
+            entry = self.summarizer.get(keys)
+            if entry:
+                summary = {"role": "system", "content": f"Summary of the earlier conversation: {entry[1]}"}
+                used += message_tokens(summary)
+
+        # Walk back from the newest message; the latest turn is always kept
+        start = len(messages)
+        while start > 0:
+            cost = message_tokens(messages[start - 1])
+            if start < len(messages) and used + cost > self.budget:
+                break
+            used += cost
+            start -= 1
+
+        dropped = messages[:start]
+        prompt = [system]
+        if dropped and summary:
+            prompt.append(summary)
+        elif summary:
+            used -= message_tokens(summary)
+        prompt.extend(messages[start:])
+
+        if dropped and keys:
+            self.summarizer.schedule(keys, dropped, summarize)
+
+        return prompt, {
+            "prompt_tokens": used,
+            "messages_kept": len(messages) - start,
+            "messages_dropped": start,
+            "summarized": bool(dropped and summary)
+        }
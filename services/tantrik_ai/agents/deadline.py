@@ -0,0 +1,73 @@
+"""
+End-to-end request deadlines: every retry, backoff and fallback draws from one budget
+"""
+
+import os
+import time
+import random
+
+from openai import OpenAIError
+
+from .circuit_breaker import is_upstream_failure
+
+# Overall budget per request; kept below gunicorn's --timeout 120
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", 100.0))
+# Upper bound for a single upstream attempt
+ATTEMPT_TIMEOUT_SECONDS = float(os.getenv("ATTEMPT_TIMEOUT_SECONDS", 30.0))
+# Time held back from the primary so the fallback still gets a real attempt
+FALLBACK_RESERVE_SECONDS = float(os.getenv("FALLBACK_RESERVE_SECONDS", 10.0))
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", 2))
+
+# Attempts with less time than this are not started
+MIN_ATTEMPT_SECONDS = 1.0
+BACKOFF_BASE_SECONDS = 0.5
+
+
+class DeadlineExceeded(OpenAIError):
+    """Raised instead of starting an attempt that could not finish in time."""
+
+
+class Deadline:
+    """Absolute point in (monotonic) time by which a request must be answered."""
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float = REQUEST_DEADLINE_SECONDS) -> "Deadline":
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def attempt_timeout(self, reserve: float = 0.0) -> float:
+        """
+        Timeout for the next upstream attempt.
+
+        Args:
+            reserve: Seconds to keep back for a later (fallback) attempt
+
+        Raises:
+            DeadlineExceeded: if too little time is left to start an attempt
+        """
+        budget = self._spendable(reserve)
+        if budget < MIN_ATTEMPT_SECONDS:
+            raise DeadlineExceeded(f"request deadline reached ({self.remaining():.1f}s left)")
+        return min(ATTEMPT_TIMEOUT_SECONDS, budget)
+
+    def retry_delay(self, attempt: int, error: OpenAIError, reserve: float = 0.0) -> float:
+        """Jittered backoff before retry `attempt`, or -1 if the error or budget rules out a retry."""
+        if attempt >= UPSTREAM_MAX_RETRIES or isinstance(error, DeadlineExceeded) or not is_upstream_failure(error):
+            return -1
+        delay = BACKOFF_BASE_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5)
+        if self._spendable(reserve) - delay < MIN_ATTEMPT_SECONDS:
+            return -1
+        return delay
+
+    def _spendable(self, reserve: float) -> float:
+        # Never hold back more than half of what is left
+        remaining = self.remaining()
+        return remaining - min(reserve, remaining / 2)
@@ -0,0 +1,115 @@
+"""
+Hedged streaming: race the fallback key when the primary is slow to its first token
+"""
+
+import os
+import socket
+import logging
+import threading
+from collections import deque
+from typing import Any, Optional
+
+from .config import env_map
+
+logger = logging.getLogger("tantrik-ai.hedging")
+
+STREAM_HEDGING = os.getenv("STREAM_HEDGING", "0") == "1"
+# Fixed hedge delay; 0 derives it from the rolling p95 time-to-first-token
+HEDGE_AFTER_SECONDS = float(os.getenv("HEDGE_AFTER_SECONDS", 0))
+HEDGE_MIN_SECONDS = float(os.getenv("HEDGE_MIN_SECONDS", 1.0))
+# Fraction of a spirit's streams that may be hedged
+HEDGE_BUDGET = float(os.getenv("HEDGE_BUDGET", 0.1))
+HEDGE_BUDGETS = env_map("HEDGE_BUDGETS")
+
+TTFT_SAMPLES = 200
+MIN_SAMPLES = 20
+BURST = 2.0
+
+
+class HedgePolicy:
+    """Per-spirit hedge delay (fixed or rolling p95 TTFT) and hedge budget."""
+
+    def __init__(self, after_seconds: float = 0.0, min_seconds: float = 1.0, budget: float = 0.1):
+        self.after_seconds = after_seconds
+        self.min_seconds = min_seconds
+        self.budget = budget
+        self.samples = deque(maxlen=TTFT_SAMPLES)
+        self.tokens = BURST
+        self.hedged = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_spirit(cls, spirit_id: str) -> Optional["HedgePolicy"]:
+        if not STREAM_HEDGING:
+            return None
+        return cls(HEDGE_AFTER_SECONDS, HEDGE_MIN_SECONDS, HEDGE_BUDGETS.get(spirit_id, HEDGE_BUDGET))
+
+    def observe(self, ttft: float) -> None:
+        """Record a primary time-to-first-token sample."""
+        with self._lock:
+            self.samples.append(ttft)
+
+    def delay(self) -> float:
+        """Seconds to wait for the primary's first token before hedging."""
+        if self.after_seconds > 0:
+            return self.after_seconds
+        with self._lock:
+            if len(self.samples) < MIN_SAMPLES:
+                return max(self.min_seconds, 5.0)
+            ordered = sorted(self.samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return max(self.min_seconds, p95)
+
+    def on_request(self) -> None:
+        """Each stream earns `budget` hedge tokens, so hedges stay a bounded share of traffic."""
+        with self._lock:
+            self.tokens = min(BURST, self.tokens + self.budget)
+
+    def acquire(self) -> bool:
+        with self._lock:
+            if self.tokens < 1.0:
+                return False
+            self.tokens -= 1.0
+            self.hedged += 1
+            return True
+
+
+class HedgeLeg:
+    """
+    One side of a sync hedged stream, so the winner can cut off the loser from its own thread.
+
+    The leg's thread may be blocked reading the socket, where closing the stream does not wake
+    it; shutting the socket down does.
+    """
+
+    def __init__(self):
+        self.stopped = threading.Event()
+        self._stream: Any = None
+        self._lock = threading.Lock()
+
+    def opened(self, stream: Any) -> bool:
+        """Register the leg's upstream stream; False if the leg has already lost."""
+        with self._lock:
+            if self.stopped.is_set():
+                return False
+            self._stream = stream
+            return True
+
+    def closed(self) -> None:
+        """The leg is done with its stream (before it closes it and releases the connection)."""
+        with self._lock:
+            self._stream = None
+
+    def stop(self) -> None:
+        """Stop the leg, interrupting a read it is blocked in."""
+        with self._lock:
+            self.stopped.set()
+            if self._stream is None:
+                return
+            network = self._stream.response.extensions.get("network_stream")
+            sock = network.get_extra_info("socket") if network is not None else None
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
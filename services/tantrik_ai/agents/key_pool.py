@@ -0,0 +1,203 @@
+"""
+Pool of upstream keys (or endpoints), each request sent to the key with the most rate-limit headroom
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Collection, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from openai import APIStatusError, OpenAIError, RateLimitError
+
+from .circuit_breaker import CLOSED, get_breaker
+from .config import env_map
+from .metrics import KEY_HEADROOM, child
+
+logger = logging.getLogger("tantrik-ai.keys")
+
+# least_loaded: most remaining rate limit first; priority: primary, then fallback, then the rest in order
+KEY_SCHEDULING = os.getenv("KEY_SCHEDULING", "least_loaded")
+# Keys beyond OPENAI_API_KEY_PRIMARY/FALLBACK: "name=sk-...,name2=sk-...@https://other-host/v1"
+OPENAI_API_KEYS = env_map("OPENAI_API_KEYS", str)
+
+# Assumed window when a response carries limits but no reset time
+DEFAULT_RESET_SECONDS = 60.0
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+LIMITS = ("requests", "tokens")
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Seconds from an x-ratelimit-reset-* value such as "1s", "6m0s" or "20ms"."""
+    if not value:
+        return None
+    parts = _DURATION.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _UNITS[unit] for amount, unit in parts)
+
+
+def _int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class Upstream:
+    """One key (and endpoint): its breaker, calls in flight and the last rate-limit state it reported."""
+
+    def __init__(self, name: str, api_key: str, base_url: Optional[str] = None):
+        self.name = name
+        self.api_key = api_key
+        self.base_url = base_url
+        self.breaker = get_breaker(api_key)
+        self.pending = 0
+        self.calls = 0
+        self.throttled = 0
+        # kind -> (limit, remaining, monotonic time the window resets)
+        self.limits: Dict[str, Tuple[Optional[int], Optional[int], float]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def calling(self) -> Iterator[None]:
+        """Count a call as pending until its response headers arrive."""
+        with self._lock:
+            self.pending += 1
+            self.calls += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        """Record the x-ratelimit-* headers of a response."""
+        now = time.monotonic()
+        with self._lock:
+            for kind in LIMITS:
+                limit = _int(headers.get(f"x-ratelimit-limit-{kind}"))
+                remaining = _int(headers.get(f"x-ratelimit-remaining-{kind}"))
+                if limit is None and remaining is None:
+                    continue
+                reset = parse_reset(headers.get(f"x-ratelimit-reset-{kind}"))
+                self.limits[kind] = (limit, remaining, now + (DEFAULT_RESET_SECONDS if reset is None else reset))
+        child(KEY_HEADROOM, self.name).set(self.headroom(now))
+
+    def observe_error(self, error: OpenAIError) -> None:
+        """Take what an error response says about the key's limits; a 429 empties it until its reset."""
+        if not isinstance(error, APIStatusError):
+            return
+        self.observe(error.response.headers)
+        if isinstance(error, RateLimitError):
+            retry_after = parse_reset(error.response.headers.get("retry-after")) or 1.0
+            with self._lock:
+                self.throttled += 1
+                limit, _, reset_at = self.limits.get("requests", (None, None, 0.0))
+                self.limits["requests"] = (limit, 0, max(reset_at, time.monotonic() + retry_after))
+            child(KEY_HEADROOM, self.name).set(0.0)
+
+    def headroom(self, now: float) -> float:
+        """Lowest share of the request and token limits left (1.0 when unknown or since reset)."""
+        shares = []
+        with self._lock:
+            for kind, (limit, remaining, reset_at) in self.limits.items():
+                if remaining is None or now >= reset_at:
+                    continue
+                # Calls still waiting for headers are not in `remaining` yet
+                if kind == "requests":
+                    remaining -= self.pending
+                shares.append(max(0.0, remaining / limit) if limit else float(remaining > 0))
+        return min(shares, default=1.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        state: Dict[str, Any] = {
+            "calls": self.calls,
+            "pending": self.pending,
+            "throttled": self.throttled,
+            "headroom": round(self.headroom(now), 3),
+            "circuit": self.breaker.state
+        }
+        with self._lock:
+            for kind, (limit, remaining, reset_at) in self.limits.items():
+                if now < reset_at:
+                    state[f"remaining_{kind}"] = remaining
+                    state[f"limit_{kind}"] = limit
+        return state
+
+
+_upstreams: Dict[Tuple[str, str, Optional[str]], Upstream] = {}
+_lock = threading.Lock()
+
+
+def get_upstream(name: str, api_key: str, base_url: Optional[str] = None) -> Upstream:
+    """Return the process-wide state for a key (shared by every agent and by sync and async clients)."""
+    with _lock:
+        upstream = _upstreams.get((name, api_key, base_url))
+        if upstream is None:
+            upstream = _upstreams[(name, api_key, base_url)] = Upstream(name, api_key, base_url)
+        return upstream
+
+
+def key_states() -> Dict[str, Dict[str, Any]]:
+    """Per-key usage and rate-limit state, for /health."""
+    with _lock:
+        upstreams = list(_upstreams.values())
+    return {upstream.name: upstream.snapshot() for upstream in upstreams}
+
+
+class KeyPool:
+    """The keys one agent may call, and the policy for choosing among them."""
+
+    def __init__(self, upstreams: List[Upstream], scheduling: str = KEY_SCHEDULING):
+        self.upstreams = upstreams
+        self.scheduling = scheduling
+
+    @classmethod
+    def from_keys(cls, primary_api_key: str, fallback_api_key: Optional[str] = None) -> "KeyPool":
+        upstreams = [get_upstream("primary", primary_api_key)]
+        if fallback_api_key:
+            upstreams.append(get_upstream("fallback", fallback_api_key))
+        for name, value in OPENAI_API_KEYS.items():
+            api_key, _, base_url = value.partition("@")
+            upstreams.append(get_upstream(name, api_key, base_url or None))
+        return cls(upstreams)
+
+    def __len__(self) -> int:
+        return len(self.upstreams)
+
+    def get(self, name: str) -> Optional[Upstream]:
+        """The pool's key with this name, if any."""
+        return next((upstream for upstream in self.upstreams if upstream.name == name), None)
+
+    def pick(self, exclude: Collection[str] = ()) -> Upstream:
+        """
+        The key for the next attempt.
+
+        Keys already tried by this request are skipped. Keys with an open
+        circuit are only used as half-open probes, or when nothing else is left.
+        """
+        candidates = [upstream for upstream in self.upstreams if upstream.name not in exclude] or self.upstreams
+        if self.scheduling == "least_loaded":
+            # An open key whose reset time has passed takes the half-open probe, or it would never recover
+            for upstream in candidates:
+                if upstream.breaker.state != CLOSED and upstream.breaker.allow():
+                    return upstream
+            closed = [upstream for upstream in candidates if upstream.breaker.state == CLOSED]
+            if closed:
+                now = time.monotonic()
+                # max() keeps the earliest key on ties, so the configured order still breaks them
+                return max(closed, key=lambda upstream: (upstream.headroom(now), -upstream.pending))
+        for upstream in candidates[:-1]:
+            if upstream.breaker.allow():
+                return upstream
+            logger.info(f"⚡ {upstream.name} circuit open, skipping")
+        return candidates[-1]
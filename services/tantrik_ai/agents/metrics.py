@@ -0,0 +1,131 @@
+"""
+Prometheus metrics for the agents and the serving path, rendered on /metrics
+"""
+
+import os
+from functools import lru_cache
+from typing import Tuple
+
+from openai import APITimeoutError, OpenAIError
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+from .circuit_breaker import is_upstream_failure
+from .deadline import DeadlineExceeded
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+TTFT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+TPS_BUCKETS = (5, 10, 20, 30, 50, 75, 100, 150, 250)
+LOOKUP_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01)
+
+REQUESTS = Counter(
+    "tantrik_requests_total", "Client requests by endpoint, spirit and outcome",
+    ["endpoint", "spirit", "outcome"]
+)
+UPSTREAM_CALLS = Counter(
+    "tantrik_upstream_calls_total", "Upstream completions by spirit, upstream key, call type and outcome",
+    ["spirit", "upstream", "call", "outcome"]
+)
+UPSTREAM_LATENCY = Histogram(
+    "tantrik_upstream_latency_seconds", "Latency of non-streaming upstream completions",
+    ["spirit", "upstream"], buckets=LATENCY_BUCKETS
+)
+TTFT = Histogram(
+    "tantrik_ttft_seconds", "Time from opening an upstream stream to its first token",
+    ["spirit", "upstream"], buckets=TTFT_BUCKETS
+)
+STREAM_DURATION = Histogram(
+    "tantrik_stream_duration_seconds", "Duration of completed upstream streams",
+    ["spirit", "upstream"], buckets=LATENCY_BUCKETS
+)
+STREAM_TPS = Histogram(
+    "tantrik_stream_tokens_per_second", "Token rate of completed upstream streams after the first token",
+    ["spirit", "upstream"], buckets=TPS_BUCKETS
+)
+TOKENS = Counter(
+    "tantrik_tokens_total", "Tokens used (chat: reported usage; stream: content deltas)",
+    ["spirit", "upstream"]
+)
+CACHE_LOOKUPS = Counter("tantrik_cache_lookups_total", "Response cache lookups", ["spirit", "result"])
+FALLBACKS = Counter("tantrik_fallbacks_total", "Calls retried on the fallback key after a primary error", ["spirit"])
+STREAMS_ACTIVE = Gauge(
+    "tantrik_streams_active", "Streams currently being served", ["spirit"], multiprocess_mode="livesum"
+)
+ADMISSION_REJECTIONS = Counter(
+    "tantrik_admission_rejections_total", "Requests turned away with 429 by admission control",
+    ["reason"]
+)
+QUEUE_DEPTH = Gauge(
+    "tantrik_queue_depth", "Work waiting in internal queues", ["queue"], multiprocess_mode="livesum"
+)
+KEY_HEADROOM = Gauge(
+    "tantrik_key_headroom", "Share of an upstream key's rate limit left (lowest of requests and tokens)",
+    ["upstream"], multiprocess_mode="livemin"
+)
+ROUTED = Counter(
+    "tantrik_routed_requests_total", "Requests by the model tier routing chose", ["spirit", "tier", "model"]
+)
+MODEL_LATENCY = Histogram(
+    "tantrik_model_latency_seconds", "Chat latency or stream time-to-first-token by routed tier and model",
+    ["tier", "model", "call"], buckets=LATENCY_BUCKETS
+)
+MODEL_TOKENS = Counter(
+    "tantrik_model_tokens_total", "Tokens used by routed tier and model (chat: reported usage; stream: deltas)",
+    ["tier", "model"]
+)
+NEAR_CACHE_LOOKUPS = Counter(
+    "tantrik_near_cache_lookups_total", "Short early turns looked up in the near-duplicate cache", ["spirit", "result"]
+)
+NEAR_CACHE_LOOKUP_SECONDS = Histogram(
+    "tantrik_near_cache_lookup_seconds", "Time to normalize, MinHash and search one near-duplicate lookup",
+    ["spirit"], buckets=LOOKUP_BUCKETS
+)
+OPENER_LOOKUPS = Counter(
+    "tantrik_opener_lookups_total", "Greeting turns looked up in the opening-line pool", ["spirit", "result"]
+)
+OPENER_LINES = Gauge(
+    "tantrik_opener_lines", "Opening lines ready in the pool", ["spirit"], multiprocess_mode="livesum"
+)
+TRANSCRIPT_RECORDS = Counter(
+    "tantrik_transcript_records_total", "Completed turns handed to the transcript log, by outcome", ["outcome"]
+)
+WS_CONNECTIONS = Gauge(
+    "tantrik_ws_connections", "Open WebSocket chat connections", multiprocess_mode="livesum"
+)
+
+
+@lru_cache(maxsize=None)
+def child(metric, *labels):
+    """Label-resolved metric, cached so hot-path recording skips the label lookup."""
+    return metric.labels(*labels)
+
+
+def error_outcome(error: Exception) -> str:
+    """Coarse outcome label for a failed upstream call."""
+    if isinstance(error, (APITimeoutError, DeadlineExceeded)):
+        return "timeout"
+    if isinstance(error, OpenAIError) and is_upstream_failure(error):
+        return "upstream_error"
+    if isinstance(error, OpenAIError):
+        return "rejected"
+    return "exception"
+
+
+def render() -> Tuple[bytes, str]:
+    """Exposition body and content type; aggregates across workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def count_request(endpoint: str, spirit_id: str, outcome: str) -> None:
+    child(REQUESTS, endpoint, spirit_id, outcome).inc()
+
+
+def chat_outcome(result: dict) -> str:
+    if result.get("cached"):
+        return "cached"
+    return "ok" if result.get("success") else "failed"
@@ -0,0 +1,263 @@
+"""
+Near-duplicate reply cache: short early questions matched by MinHash/LSH over character shingles
+"""
+
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from .config import env_map
+from .metrics import NEAR_CACHE_LOOKUP_SECONDS, NEAR_CACHE_LOOKUPS, child
+from .response_cache import normalize_messages
+
+logger = logging.getLogger("tantrik-ai.near-cache")
+
+NEAR_CACHE = os.getenv("NEAR_CACHE", "0") == "1"
+# Shingle Jaccard similarity needed to reuse a reply (NEAR_CACHE_THRESHOLDS="reaper=0.8" per spirit)
+NEAR_CACHE_THRESHOLD = float(os.getenv("NEAR_CACHE_THRESHOLD", 0.6))
+NEAR_CACHE_THRESHOLDS = env_map("NEAR_CACHE_THRESHOLDS", float)
+NEAR_CACHE_MAX_ENTRIES = int(os.getenv("NEAR_CACHE_MAX_ENTRIES", 2048))
+NEAR_CACHE_TTL = float(os.getenv("NEAR_CACHE_TTL", 3600))
+# Only the first NEAR_CACHE_MAX_TURNS visitor turns, and messages of at most NEAR_CACHE_MAX_WORDS words
+NEAR_CACHE_MAX_TURNS = int(os.getenv("NEAR_CACHE_MAX_TURNS", 2))
+NEAR_CACHE_MAX_WORDS = int(os.getenv("NEAR_CACHE_MAX_WORDS", 16))
+
+SHINGLE_SIZE = 3
+# 16 bands of 4 rows: pairs above ~0.5 similarity almost always share a bucket
+BANDS = 16
+ROWS = 4
+BINS = BANDS * ROWS
+# A bucket keeps its most recent entries only, and the candidates sharing the most
+# bands are confirmed with the exact Jaccard, which bounds the cost of a lookup
+BUCKET_SIZE = 32
+MAX_CANDIDATES = 8
+# Offset per bin an empty bin borrows across, so borrowed values differ from the original bin's
+_ROTATION = 1 << 58
+# Two passes right to left, so bins after the last filled one wrap around to the first
+_DENSIFY_ORDER = list(range(BINS - 1, -1, -1)) * 2
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+# "sooo" -> "so", "??" was already dropped with the punctuation
+_REPEATS = re.compile(r"(\w)\1{2,}")
+# Chat shorthand, so "r u a vampire" and "are you a vampire" shingle alike
+SHORTHAND = {
+    "r": "are", "u": "you", "ur": "your", "y": "why", "ya": "you", "yu": "you", "im": "i am",
+    "pls": "please", "plz": "please", "thx": "thanks", "wat": "what", "wut": "what", "whats": "what is",
+    "dont": "do not", "cant": "can not", "wont": "will not", "n": "and", "b": "be", "2": "to", "4": "for"
+}
+# Words that change little about what is being asked
+FILLER = frozenset(("really", "actually", "like", "just", "so", "very", "the", "a", "an", "um", "uh", "hey", "please"))
+# Questions only match others with the same polarity; "are you not dead" shingles much like "are you dead"
+NEGATIONS = frozenset(("not", "no", "never", "nobody", "nothing"))
+
+
+class Entry(NamedTuple):
+    scope: str
+    shingles: FrozenSet[str]
+    buckets: Tuple[Tuple[int, Tuple[int, ...]], ...]
+    result: Dict[str, Any]
+    expires_at: float
+
+
+def normalize_question(text: str) -> str:
+    """Case-folded words without punctuation, shorthand expanded and filler words dropped."""
+    text = _REPEATS.sub(r"\1", _NON_WORD.sub(" ", text.casefold()))
+    words = " ".join(SHORTHAND.get(word, word) for word in text.split()).split()
+    kept = [word for word in words if word not in FILLER]
+    return " ".join(kept or words)
+
+
+def shingles(text: str) -> FrozenSet[str]:
+    padded = f" {text} "
+    if len(padded) <= SHINGLE_SIZE:
+        return frozenset((padded,))
+    return frozenset(padded[i:i + SHINGLE_SIZE] for i in range(len(padded) - SHINGLE_SIZE + 1))
+
+
+@lru_cache(maxsize=4096)
+def _hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def signature(shingle_set: FrozenSet[str]) -> List[int]:
+    """
+    One-permutation MinHash: one hash per shingle, the lowest value kept in each of BINS bins.
+
+    Empty bins borrow from the nearest filled bin to their right (rotation densification),
+    so a question costs one hash per shingle instead of BINS.
+    """
+    bins: List[Optional[int]] = [None] * BINS
+    for shingle in shingle_set:
+        h = _hash(shingle)
+        slot, value = h % BINS, h // BINS
+        current = bins[slot]
+        if current is None or value < current:
+            bins[slot] = value
+    sig = list(bins)
+    nearest, gap = 0, 0
+    for slot in _DENSIFY_ORDER:
+        if bins[slot] is not None:
+            nearest, gap = bins[slot], 0
+        else:
+            gap += 1
+            sig[slot] = nearest + gap * _ROTATION
+    return sig
+
+
+def band_buckets(sig: List[int]) -> Tuple[Tuple[int, Tuple[int, ...]], ...]:
+    """LSH band keys; rows are strided so neighbouring bins, which may be borrowed from one source, split up."""
+    return tuple((band, tuple(sig[band::BANDS])) for band in range(BANDS))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    common = len(a & b)
+    return common / (len(a) + len(b) - common) if a or b else 1.0
+
+
+class NearDuplicateCache:
+    """
+    LSH index of recent short questions and the replies they got, per spirit and conversation prefix.
+
+    Candidates from shared MinHash bands are confirmed with the exact shingle Jaccard,
+    so a false bucket collision never returns an unrelated reply.
+    """
+
+    def __init__(
+        self,
+        threshold: float = NEAR_CACHE_THRESHOLD,
+        max_entries: int = NEAR_CACHE_MAX_ENTRIES,
+        ttl: float = NEAR_CACHE_TTL
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.lookup_seconds = 0.0
+        self._ids = 0
+        self._entries: "OrderedDict[int, Entry]" = OrderedDict()
+        # (scope, band, rows) -> entry ids, oldest first
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], Dict[int, None]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["NearDuplicateCache"]:
+        if not NEAR_CACHE:
+            return None
+        logger.info(f"🧲 Near-duplicate cache enabled ({NEAR_CACHE_MAX_ENTRIES} entries)")
+        return cls()
+
+    @staticmethod
+    def _question(spirit_id: str, messages: List[Dict[str, str]]) -> Optional[Tuple[str, str]]:
+        """(scope, normalized question) for an eligible turn, else None."""
+        if not messages or messages[-1].get("role") != "user":
+            return None
+        if sum(m.get("role") == "user" for m in messages) > NEAR_CACHE_MAX_TURNS:
+            return None
+        question = normalize_question(str(messages[-1].get("content", "")))
+        if not question or len(question.split()) > NEAR_CACHE_MAX_WORDS:
+            return None
+        # A second turn only matches within the same conversation so far (e.g. after a pooled opener)
+        prefix = hashlib.sha256(normalize_messages(messages[:-1]).encode("utf-8")).hexdigest()[:16]
+        negated = "!" if NEGATIONS.intersection(question.split()) else ""
+        return f"{spirit_id}:{prefix}{negated}", question
+
+    def get(self, spirit_id: str, messages: List[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+        """A reply generated for a near-identical question, if one is indexed."""
+        started = time.perf_counter()
+        question = self._question(spirit_id, messages)
+        if question is None:
+            return None
+        scope, text = question
+        shingle_set = shingles(text)
+        buckets = band_buckets(signature(shingle_set))
+        threshold = NEAR_CACHE_THRESHOLDS.get(spirit_id, self.threshold)
+
+        best, best_score = None, threshold
+        with self._lock:
+            now = time.monotonic()
+            shared: Counter = Counter()
+            for band, rows in buckets:
+                shared.update(self._buckets.get((scope, band, rows), {}).keys())
+            for entry_id, _ in shared.most_common(MAX_CANDIDATES):
+                entry = self._entries.get(entry_id)
+                if entry is None:
+                    continue
+                if entry.expires_at < now:
+                    self._remove(entry_id)
+                    continue
+                score = jaccard(shingle_set, entry.shingles)
+                if score >= best_score:
+                    best, best_score = entry_id, score
+            if best is not None:
+                self._entries.move_to_end(best)
+                result = self._entries[best].result
+                self.hits += 1
+            else:
+                result = None
+                self.misses += 1
+            elapsed = time.perf_counter() - started
+            self.lookup_seconds += elapsed
+
+        child(NEAR_CACHE_LOOKUPS, spirit_id, "hit" if result else "miss").inc()
+        child(NEAR_CACHE_LOOKUP_SECONDS, spirit_id).observe(elapsed)
+        if result:
+            logger.info(f"🧲 Near-duplicate hit for {spirit_id} (similarity {best_score:.2f})")
+            return dict(result, similarity=round(best_score, 3))
+        return None
+
+    def add(self, spirit_id: str, messages: List[Dict[str, str]], result: Dict[str, Any]) -> None:
+        """Index the reply to an eligible turn."""
+        question = self._question(spirit_id, messages)
+        if question is None:
+            return
+        scope, text = question
+        shingle_set = shingles(text)
+        buckets = band_buckets(signature(shingle_set))
+        with self._lock:
+            self._ids += 1
+            self._entries[self._ids] = Entry(scope, shingle_set, buckets, result, time.monotonic() + self.ttl)
+            for band, rows in buckets:
+                bucket = self._buckets.setdefault((scope, band, rows), {})
+                bucket[self._ids] = None
+                if len(bucket) > BUCKET_SIZE:
+                    del bucket[next(iter(bucket))]
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def forget(self, spirit_id: str) -> None:
+        """Drop every reply indexed for a spirit (its definition changed)."""
+        prefix = f"{spirit_id}:"
+        with self._lock:
+            for entry_id in [entry_id for entry_id, entry in self._entries.items() if entry.scope.startswith(prefix)]:
+                self._remove(entry_id)
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        for band, rows in entry.buckets:
+            bucket = self._buckets.get((entry.scope, band, rows))
+            if bucket is not None:
+                bucket.pop(entry_id, None)
+                if not bucket:
+                    del self._buckets[(entry.scope, band, rows)]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "buckets": len(self._buckets),
+                "mean_lookup_us": round(self.lookup_seconds / lookups * 1e6, 1) if lookups else None
+            }
+
+
+NEAR_DUPLICATES = NearDuplicateCache.from_env()
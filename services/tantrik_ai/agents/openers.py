@@ -0,0 +1,179 @@
+"""
+Pre-generated opening lines: a rotating pool per spirit so greetings stream instantly
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .config import env_map
+from .metrics import OPENER_LINES, OPENER_LOOKUPS, child
+
+logger = logging.getLogger("tantrik-ai.openers")
+
+OPENER_POOL = os.getenv("OPENER_POOL", "0") == "1"
+# Lines kept ready per spirit (OPENER_POOL_SIZES="dracula=10" overrides one spirit)
+OPENER_POOL_SIZE = int(os.getenv("OPENER_POOL_SIZE", 5))
+OPENER_POOL_SIZES = env_map("OPENER_POOL_SIZES", int)
+# Lines older than this are replaced so the pool keeps rotating even when idle
+OPENER_REFRESH_SECONDS = float(os.getenv("OPENER_REFRESH_SECONDS", 900))
+# First turns matching this (case-insensitive, punctuation ignored) are served from the pool
+OPENER_GREETINGS = re.compile(os.getenv(
+    "OPENER_GREETINGS",
+    r"(hi|hello|hey|hiya|howdy|greetings|good (morning|afternoon|evening|night)"
+    r"|is (any|some)(one|body) (there|here))( there)?( \w+){0,2}"
+), re.IGNORECASE)
+# What the visitor "says" when lines are generated
+OPENER_PROMPT = os.getenv("OPENER_PROMPT", "Hello?")
+
+# Pause a spirit's refills after a failed or repeated generation
+RETRY_SECONDS = 30.0
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+GenerateFn = Callable[[], str]
+
+
+def is_greeting(messages: List[Dict[str, str]]) -> bool:
+    """True for the first turn of a conversation when it is only a greeting."""
+    if len(messages) != 1 or messages[0].get("role") != "user":
+        return False
+    text = _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", str(messages[0].get("content", "")))).strip()
+    return bool(text) and OPENER_GREETINGS.fullmatch(text) is not None
+
+
+class OpenerPool:
+    """Per-spirit queues of opening lines, topped up by one background thread."""
+
+    def __init__(self, size: int = OPENER_POOL_SIZE, refresh: float = OPENER_REFRESH_SECONDS):
+        self.size = size
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._lines: Dict[str, Deque[Tuple[float, str]]] = {}
+        self._generators: Dict[str, GenerateFn] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["OpenerPool"]:
+        return cls() if OPENER_POOL else None
+
+    def _size(self, spirit_id: str) -> int:
+        return OPENER_POOL_SIZES.get(spirit_id, self.size)
+
+    def register(self, spirit_id: str, generate: GenerateFn) -> None:
+        """Start keeping lines for a spirit (the first registration wins)."""
+        with self._lock:
+            if spirit_id in self._generators:
+                return
+            self._generators[spirit_id] = generate
+            self._lines[spirit_id] = deque()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="openers", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def forget(self, spirit_id: str) -> None:
+        """Drop a spirit's lines and generator (its definition changed; the next agent registers again)."""
+        with self._lock:
+            self._generators.pop(spirit_id, None)
+            self._lines.pop(spirit_id, None)
+            self._retry_at.pop(spirit_id, None)
+
+    def take(self, spirit_id: str) -> Optional[str]:
+        """Pop the oldest pooled line for a spirit; None when the pool is empty."""
+        with self._lock:
+            lines = self._lines.get(spirit_id)
+            if lines is None:
+                return None
+            self._expire(spirit_id, time.monotonic())
+            line = lines.popleft()[1] if lines else None
+            if line is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        child(OPENER_LOOKUPS, spirit_id, "hit" if line else "miss").inc()
+        child(OPENER_LINES, spirit_id).set(len(lines))
+        self._wake.set()
+        return line
+
+    def _expire(self, spirit_id: str, now: float) -> None:
+        lines = self._lines[spirit_id]
+        while lines and now - lines[0][0] > self.refresh:
+            lines.popleft()
+
+    def _next(self, now: float) -> Tuple[Optional[str], float]:
+        """The spirit to generate for next (fewest lines first), or how long to sleep."""
+        with self._lock:
+            wanted = []
+            sleep = self.refresh
+            for spirit_id, lines in self._lines.items():
+                self._expire(spirit_id, now)
+                if lines:
+                    sleep = min(sleep, lines[0][0] + self.refresh - now)
+                retry_at = self._retry_at.get(spirit_id, 0.0)
+                if len(lines) >= self._size(spirit_id):
+                    continue
+                if retry_at > now:
+                    sleep = min(sleep, retry_at - now)
+                    continue
+                wanted.append((len(lines), spirit_id))
+        if wanted:
+            return min(wanted)[1], 0.0
+        return None, max(sleep, 0.1)
+
+    def _run(self) -> None:
+        while True:
+            spirit_id, sleep = self._next(time.monotonic())
+            if spirit_id is None:
+                self._wake.wait(sleep)
+                self._wake.clear()
+                continue
+            self._fill(spirit_id)
+
+    def _fill(self, spirit_id: str) -> None:
+        with self._lock:
+            generate = self._generators.get(spirit_id)
+        if generate is None:
+            return
+        try:
+            line = generate().strip()
+        except Exception as e:
+            logger.warning(f"⚠️ Opening line for {spirit_id} failed: {str(e)}")
+            with self._lock:
+                self._retry_at[spirit_id] = time.monotonic() + RETRY_SECONDS
+            return
+        with self._lock:
+            lines = self._lines.get(spirit_id)
+            if lines is None or self._generators.get(spirit_id) is not generate:
+                # Forgotten while generating: the line speaks for the old definition
+                return
+            if not line or any(line == pooled for _, pooled in lines):
+                # Keep the pool varied, without spinning on a spirit that keeps repeating itself
+                self._retry_at[spirit_id] = time.monotonic() + RETRY_SECONDS
+                return
+            lines.append((time.monotonic(), line))
+            count = len(lines)
+        child(OPENER_LINES, spirit_id).set(count)
+        logger.info(f"🎙️ Opening line pooled for {spirit_id} ({count}/{self._size(spirit_id)})")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "pooled": {spirit_id: len(lines) for spirit_id, lines in self._lines.items()},
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None
+            }
+
+
+OPENERS = OpenerPool.from_env()
@@ -0,0 +1,254 @@
+"""
+Data-driven spirit registry: definitions loaded from a directory, agents built on first use and hot-reloaded
+"""
+
+import os
+import copy
+import glob
+import time
+import logging
+import threading
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+from .client_pool import get_client
+from .key_pool import KeyPool
+from .near_cache import NEAR_DUPLICATES
+from .openers import OPENERS
+from .spirit_agent import SpiritAgent
+
+logger = logging.getLogger("tantrik-ai.registry")
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SPIRITS_DIR = os.getenv("SPIRITS_DIR", os.path.join(SERVICE_DIR, "spirits"))
+# How often requests may re-check the directory for changed definitions (0 = load once)
+SPIRITS_RELOAD_SECONDS = float(os.getenv("SPIRITS_RELOAD_SECONDS", 5))
+
+DEFINITION_SUFFIX = ".md"
+FRONT_MATTER = "---\n"
+
+# Front matter fields and how to read them
+FIELDS: Dict[str, Callable[[str], Any]] = {
+    "name": str,
+    "emoji": str,
+    "description": str,
+    "model": str,
+    "temperature": float,
+    "max_tokens": int,
+    "order": int
+}
+
+
+class SpiritDefinition(NamedTuple):
+    """One spirit as declared in <SPIRITS_DIR>/<spirit_id>.md."""
+
+    spirit_id: str
+    name: str
+    system_prompt: str
+    emoji: str = ""
+    description: str = ""
+    model: str = "gpt-4o-mini"
+    temperature: float = 0.9
+    max_tokens: int = 500
+    order: int = 100
+
+    def metadata(self) -> Dict[str, str]:
+        """Display fields for /spirits."""
+        metadata = {"id": self.spirit_id, "name": self.name, "emoji": self.emoji}
+        if self.description:
+            metadata["description"] = self.description
+        return metadata
+
+    def agent_kwargs(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "system_prompt": self.system_prompt,
+            "model": self.model,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "spirit_id": self.spirit_id
+        }
+
+
+def parse_definition(path: str) -> SpiritDefinition:
+    """
+    Read a definition: "key: value" front matter between --- lines, then the system prompt.
+
+    Raises:
+        ValueError: malformed front matter, unknown fields or a missing name or prompt
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if not text.startswith(FRONT_MATTER):
+        raise ValueError("missing --- front matter")
+    header, separator, prompt = text[len(FRONT_MATTER):].partition("\n" + FRONT_MATTER)
+    if not separator:
+        raise ValueError("unterminated front matter")
+
+    fields: Dict[str, Any] = {}
+    for line in header.splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        key, colon, value = line.partition(":")
+        key = key.strip()
+        if not colon or key not in FIELDS:
+            raise ValueError(f"unknown field {key!r}")
+        fields[key] = FIELDS[key](value.strip())
+    if not fields.get("name") or not prompt.strip():
+        raise ValueError("a name and a system prompt are required")
+
+    spirit_id = os.path.basename(path)[:-len(DEFINITION_SUFFIX)]
+    return SpiritDefinition(spirit_id=spirit_id, system_prompt=prompt, **fields)
+
+
+def load_definition(spirit_id: str, directory: str = SPIRITS_DIR) -> SpiritDefinition:
+    return parse_definition(os.path.join(directory, spirit_id + DEFINITION_SUFFIX))
+
+
+def _forget(spirit_id: str) -> None:
+    """Drop per-spirit state generated with a definition that has changed."""
+    if OPENERS is not None:
+        OPENERS.forget(spirit_id)
+    if NEAR_DUPLICATES is not None:
+        NEAR_DUPLICATES.forget(spirit_id)
+
+
+class SpiritRegistry(Mapping):
+    """
+    spirit_id -> agent, for every definition in a directory.
+
+    Agents are built on first lookup and share the process-wide clients. Changed
+    files are picked up on a later lookup: the next request gets a new agent,
+    while streams already running keep the agent they started with.
+    """
+
+    def __init__(
+        self,
+        primary_api_key: str,
+        fallback_api_key: Optional[str] = None,
+        directory: str = SPIRITS_DIR,
+        agent_class: Type[SpiritAgent] = SpiritAgent,
+        reload_seconds: float = SPIRITS_RELOAD_SECONDS
+    ):
+        self.primary_api_key = primary_api_key
+        self.fallback_api_key = fallback_api_key
+        self.directory = directory
+        self.agent_class = agent_class
+        self.reload_seconds = reload_seconds
+        self.reloads = 0
+        self._definitions: Dict[str, SpiritDefinition] = {}
+        self._files: Dict[str, Tuple[int, int]] = {}
+        self._agents: Dict[str, SpiritAgent] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._scan()
+        if not self._definitions:
+            raise RuntimeError(f"No spirit definitions in {directory}")
+        logger.info(f"📖 {len(self._definitions)} spirits defined in {directory}")
+
+    def with_agent_class(self, agent_class: Type[SpiritAgent]) -> "SpiritRegistry":
+        """The same definitions and keys served by another agent class (e.g. AsyncSpiritAgent)."""
+        twin = copy.copy(self)
+        twin.agent_class = agent_class
+        twin.reloads = 0
+        with self._lock:
+            twin._definitions = dict(self._definitions)
+            twin._files = dict(self._files)
+        twin._agents = {}
+        twin._lock = threading.Lock()
+        return twin
+
+    def _scan(self) -> None:
+        """Re-read new and modified definition files; a broken edit keeps the previous version."""
+        paths = glob.glob(os.path.join(self.directory, f"*{DEFINITION_SUFFIX}"))
+        files = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if files == self._files:
+                return
+            changed = [path for path, version in files.items() if self._files.get(path) != version]
+            removed = [path for path in self._files if path not in files]
+            for path in changed:
+                try:
+                    definition = parse_definition(path)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"⚠️ Ignoring spirit definition {path}: {str(e)}")
+                    continue
+                self._replace(definition.spirit_id, definition)
+            for path in removed:
+                self._replace(os.path.basename(path)[:-len(DEFINITION_SUFFIX)], None)
+            self._files = files
+
+    def _replace(self, spirit_id: str, definition: Optional[SpiritDefinition]) -> None:
+        previous = self._definitions.pop(spirit_id, None)
+        if definition is not None:
+            self._definitions[spirit_id] = definition
+        if previous is None or previous == definition:
+            return
+        # Running streams hold a reference to the old agent and finish with it
+        self._agents.pop(spirit_id, None)
+        self.reloads += 1
+        _forget(spirit_id)
+        logger.info(f"♻️ Spirit {spirit_id} {'reloaded' if definition else 'removed'}")
+
+    def _refresh(self) -> None:
+        if self.reload_seconds > 0 and time.monotonic() - self._checked_at >= self.reload_seconds:
+            self._scan()
+
+    def __getitem__(self, spirit_id: str) -> SpiritAgent:
+        self._refresh()
+        agent = self._agents.get(spirit_id)
+        if agent is not None:
+            return agent
+        with self._lock:
+            agent = self._agents.get(spirit_id)
+            if agent is None:
+                definition = self._definitions[spirit_id]
+                agent = self._agents[spirit_id] = self.agent_class(
+                    primary_api_key=self.primary_api_key,
+                    fallback_api_key=self.fallback_api_key,
+                    **definition.agent_kwargs()
+                )
+                logger.info(f"🕯️ {definition.name} summoned")
+        return agent
+
+    def __contains__(self, spirit_id: object) -> bool:
+        # Membership must not build the agent (request validation asks first)
+        self._refresh()
+        return spirit_id in self._definitions
+
+    def __iter__(self) -> Iterator[str]:
+        self._refresh()
+        return iter(self._ordered())
+
+    def __len__(self) -> int:
+        return len(self._definitions)
+
+    def _ordered(self) -> List[str]:
+        definitions = list(self._definitions.values())
+        return [d.spirit_id for d in sorted(definitions, key=lambda d: (d.order, d.spirit_id))]
+
+    def metadata(self) -> List[Dict[str, str]]:
+        """Display metadata of every spirit, in definition order."""
+        self._refresh()
+        definitions = dict(self._definitions)
+        return [definitions[spirit_id].metadata() for spirit_id in self._ordered() if spirit_id in definitions]
+
+    def open_clients(self) -> None:
+        """Create the shared clients for every key up front, so pool warm-up has connections to open."""
+        for upstream in KeyPool.from_keys(self.primary_api_key, self.fallback_api_key).upstreams:
+            get_client(self.agent_class.client_class, upstream.api_key, upstream.base_url)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "defined": len(self._definitions),
+            "summoned": sorted(self._agents),
+            "reloads": self.reloads
+        }
@@ -0,0 +1,187 @@
+"""
+LRU + TTL response cache for repeated /chat turns
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import env_map
+
+logger = logging.getLogger("tantrik-ai.cache")
+
+_WHITESPACE = re.compile(r"\s+")
+_REPLAY_CHUNK = re.compile(r"\S+\s*|\s+")
+
+
+def normalize_messages(messages: List[Dict[str, str]]) -> str:
+    """Canonical form of a message list: role + case-folded, whitespace-collapsed content."""
+    return "\n".join(
+        f"{m.get('role', '')}:{_WHITESPACE.sub(' ', str(m.get('content', ''))).strip().casefold()}"
+        for m in messages
+    )
+
+
+def cache_key(
+    spirit_id: str, model: str, temperature: float, messages: List[Dict[str, str]], revision: str = ""
+) -> str:
+    """Stable cache key for one upstream request (revision: the spirit's prompt version)."""
+    digest = hashlib.sha256(normalize_messages(messages).encode("utf-8")).hexdigest()
+    return f"{spirit_id}{revision and '@' + revision}:{model}:{temperature}:{digest}"
+
+
+def replay_chunks(content: str) -> List[str]:
+    """Split cached content into word-sized synthetic stream chunks."""
+    return _REPLAY_CHUNK.findall(content)
+
+
+class MemoryBackend:
+    """In-process LRU store (per worker)."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteBackend:
+    """Local shared store so every gunicorn worker on the host shares hits."""
+
+    def __init__(self, path: str, max_entries: int = 1024, table: str = "responses"):
+        self.path = path
+        self.max_entries = max_entries
+        self.table = table
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_used_at ON {table} (used_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; autocommit keeps writes short
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] < now:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            return None
+        conn.execute(f"UPDATE {self.table} SET used_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value, separators=(",", ":")), now + ttl, now)
+        )
+        conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def __len__(self) -> int:
+        return self._conn().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+class ResponseCache:
+    """Bounded response cache with per-spirit TTLs and hit/miss counters."""
+
+    def __init__(self, backend, default_ttl: float = 300.0, ttls: Optional[Dict[str, float]] = None):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCache"]:
+        """Build the cache from RESPONSE_CACHE_* env vars (None when disabled)."""
+        kind = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+        if kind in ("off", "none", ""):
+            return None
+
+        max_entries = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1024))
+        if kind == "sqlite":
+            path = os.getenv("RESPONSE_CACHE_PATH", "/tmp/tantrik_response_cache.sqlite3")
+            backend = SqliteBackend(path, max_entries)
+        else:
+            backend = MemoryBackend(max_entries)
+
+        logger.info(f"🗃️ Response cache enabled ({kind}, {max_entries} entries)")
+        return cls(backend, float(os.getenv("RESPONSE_CACHE_TTL", 300)), env_map("RESPONSE_CACHE_TTLS"))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"⚠️ Cache read failed: {str(e)}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Dict[str, Any], spirit_id: str) -> None:
+        ttl = self.ttls.get(spirit_id, self.default_ttl)
+        if ttl <= 0:
+            return
+        try:
+            self.backend.set(key, value, ttl)
+        except Exception as e:
+            logger.warning(f"⚠️ Cache write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.backend)
+        }
+
+
+RESPONSE_CACHE = ResponseCache.from_env()
@@ -0,0 +1,128 @@
+"""
+Per-request model routing: a fast tier for short banter, the spirit's own model otherwise,
+steering away from a model whose recent latency or error rate has degraded
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from .config import env_map
+from .context_window import message_tokens
+
+logger = logging.getLogger("tantrik-ai.routing")
+
+MODEL_ROUTING = os.getenv("MODEL_ROUTING", "0") == "1"
+# Fast tier; empty uses the spirit's own model. ROUTE_FAST_MODELS="reaper=off" gives a spirit no fast tier
+ROUTE_FAST_MODEL = os.getenv("ROUTE_FAST_MODEL", "")
+ROUTE_FAST_MODELS = env_map("ROUTE_FAST_MODELS", str)
+ROUTE_FAST_MAX_TOKENS = int(os.getenv("ROUTE_FAST_MAX_TOKENS", 150))
+# A turn is banter when the new message and the whole conversation are both short
+ROUTE_FAST_MESSAGE_TOKENS = int(os.getenv("ROUTE_FAST_MESSAGE_TOKENS", 40))
+ROUTE_FAST_CONVERSATION_TOKENS = int(os.getenv("ROUTE_FAST_CONVERSATION_TOKENS", 1500))
+# A model is degraded above either limit over its last ROUTE_WINDOW calls (0 disables the latency rule)
+ROUTE_MAX_ERROR_RATE = float(os.getenv("ROUTE_MAX_ERROR_RATE", 0.3))
+ROUTE_MAX_LATENCY_SECONDS = float(os.getenv("ROUTE_MAX_LATENCY_SECONDS", 0))
+ROUTE_WINDOW = int(os.getenv("ROUTE_WINDOW", 50))
+# Samples older than this are forgotten, so a model routed around is tried again once its failures age out
+ROUTE_WINDOW_SECONDS = float(os.getenv("ROUTE_WINDOW_SECONDS", 60))
+
+MIN_SAMPLES = 10
+
+FAST = "fast"
+STANDARD = "standard"
+
+
+class Route(NamedTuple):
+    """The model and reply budget chosen for one request, and why."""
+
+    tier: str
+    model: str
+    max_tokens: int
+    reason: str
+
+    def public(self) -> Dict[str, object]:
+        return {"tier": self.tier, "model": self.model, "max_tokens": self.max_tokens, "reason": self.reason}
+
+
+class ModelStats:
+    """Rolling latency (chat latency or stream TTFT) and failure samples per model, shared by all spirits."""
+
+    def __init__(self, window: int = ROUTE_WINDOW, window_seconds: float = ROUTE_WINDOW_SECONDS):
+        self.window = window
+        self.window_seconds = window_seconds
+        self._samples: Dict[str, Deque[Tuple[float, float, bool]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, latency: Optional[float]) -> None:
+        """Record one upstream call; a None latency is a failure."""
+        with self._lock:
+            samples = self._samples.setdefault(model, deque(maxlen=self.window))
+            samples.append((time.monotonic(), latency or 0.0, latency is None))
+
+    def health(self, model: str) -> Tuple[float, float]:
+        """(error rate, p95 latency) over the window; zeros until there are enough recent samples."""
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            samples = self._samples.get(model)
+            while samples and samples[0][0] < cutoff:
+                samples.popleft()
+            samples = list(samples or ())
+        if len(samples) < MIN_SAMPLES:
+            return 0.0, 0.0
+        latencies = sorted(latency for _, latency, failed in samples if not failed)
+        error_rate = 1 - len(latencies) / len(samples)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0
+        return error_rate, p95
+
+    def degraded(self, model: str) -> Optional[str]:
+        error_rate, p95 = self.health(model)
+        if error_rate > ROUTE_MAX_ERROR_RATE:
+            return f"{model} error rate {error_rate:.0%}"
+        if ROUTE_MAX_LATENCY_SECONDS > 0 and p95 > ROUTE_MAX_LATENCY_SECONDS:
+            return f"{model} p95 {p95:.1f}s"
+        return None
+
+
+MODEL_STATS = ModelStats()
+
+
+class ModelRouter:
+    """Chooses a spirit's tier per request from the conversation and each model's recent health."""
+
+    def __init__(self, standard: Route, fast: Optional[Route], stats: ModelStats = MODEL_STATS):
+        self.standard = standard
+        self.fast = fast
+        self.stats = stats
+
+    @classmethod
+    def for_spirit(cls, spirit_id: str, model: str, max_tokens: int) -> Optional["ModelRouter"]:
+        if not MODEL_ROUTING:
+            return None
+        standard = Route(STANDARD, model, max_tokens, "")
+        fast_model = ROUTE_FAST_MODELS.get(spirit_id, ROUTE_FAST_MODEL) or model
+        fast = None if fast_model == "off" else Route(FAST, fast_model, min(max_tokens, ROUTE_FAST_MAX_TOKENS), "")
+        return cls(standard, fast)
+
+    def choose(self, messages: List[Dict[str, str]]) -> Route:
+        latest = message_tokens(messages[-1]) if messages else 0
+        conversation = sum(message_tokens(m) for m in messages)
+
+        if self.fast is None:
+            route, reason = self.standard, "no fast tier"
+        elif latest > ROUTE_FAST_MESSAGE_TOKENS:
+            route, reason = self.standard, "long message"
+        elif conversation > ROUTE_FAST_CONVERSATION_TOKENS:
+            route, reason = self.standard, "long conversation"
+        else:
+            route, reason = self.fast, "short banter"
+
+        other = self.standard if route is self.fast else self.fast
+        degraded = self.stats.degraded(route.model)
+        if degraded and other is not None and other.model != route.model and not self.stats.degraded(other.model):
+            logger.info(f"🧭 Routing around {degraded}")
+            route, reason = other, degraded
+        return route._replace(reason=reason)
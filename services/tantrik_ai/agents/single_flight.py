@@ -0,0 +1,221 @@
+"""
+Single-flight coalescing: identical in-flight upstream requests share one call
+"""
+
+import os
+import asyncio
+import logging
+import threading
+import contextvars
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Generator, List, Optional
+
+from .deadline import Deadline, DeadlineExceeded
+
+logger = logging.getLogger("tantrik-ai.single-flight")
+
+
+class _Call:
+    """One in-flight /chat call and its eventual result."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _Flight:
+    """One in-flight upstream stream, buffered so late subscribers replay it from the start."""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.subscribers = 0
+        self.cond = threading.Condition()
+
+
+class SingleFlight:
+    """Thread-based coalescing for the sync (Flask) agents."""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any], deadline: Optional[Deadline] = None) -> Any:
+        """
+        Run fn once per key; concurrent callers wait for and share its result.
+
+        Raises:
+            DeadlineExceeded: if a waiting caller's deadline passes before the shared call ends
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.event.wait(deadline.remaining() if deadline else None):
+                raise DeadlineExceeded("request deadline reached waiting on an identical request")
+            if call.error:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def stream(self, key: str, factory: Callable[[], Generator[str, None, None]]) -> Generator[str, None, None]:
+        """
+        Subscribe to the shared stream for key, starting it if needed.
+
+        The upstream generator runs in its own thread, so any subscriber
+        (including the one that started it) can disconnect without ending
+        the stream for the others. It stops once every subscriber has left.
+        """
+        with self._lock:
+            flight = self._streams.get(key)
+            flight_is_new = flight is None
+            if flight_is_new:
+                flight = self._streams[key] = _Flight()
+            flight.subscribers += 1
+        if flight_is_new:
+            # Run in the starter's context so its trace sees the upstream phases
+            threading.Thread(
+                target=contextvars.copy_context().run, args=(self._produce, key, flight, factory), daemon=True
+            ).start()
+        else:
+            logger.info("🔗 Joined in-flight stream")
+
+        try:
+            sent = 0
+            while True:
+                with flight.cond:
+                    while sent >= len(flight.chunks) and not flight.done:
+                        flight.cond.wait()
+                    chunks = flight.chunks[sent:]
+                    done = flight.done
+                sent += len(chunks)
+                yield from chunks
+                if done:
+                    return
+        finally:
+            with self._lock:
+                flight.subscribers -= 1
+
+    def _produce(self, key: str, flight: _Flight, factory: Callable[[], Generator[str, None, None]]) -> None:
+        upstream = factory()
+        try:
+            for chunk in upstream:
+                with flight.cond:
+                    flight.chunks.append(chunk)
+                    flight.cond.notify_all()
+                if flight.subscribers == 0:
+                    break
+        except Exception:
+            logger.exception("shared stream failed")
+        finally:
+            upstream.close()
+            with self._lock:
+                if self._streams.get(key) is flight:
+                    del self._streams[key]
+            with flight.cond:
+                flight.done = True
+                flight.cond.notify_all()
+
+
+class _AsyncFlight:
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.subscribers = 0
+        self.cond = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+
+class AsyncSingleFlight:
+    """Asyncio coalescing for the ASGI agents (one event loop per process)."""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._streams: Dict[str, _AsyncFlight] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], deadline: Optional[Deadline] = None) -> Any:
+        """
+        Await fn once per key; a cancelled (or timed out) waiter never cancels the shared call.
+
+        Raises:
+            DeadlineExceeded: if a waiting caller's deadline passes before the shared call ends
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._calls.pop(key) if self._calls.get(key) is t else None)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), deadline.remaining() if deadline else None)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("request deadline reached waiting on an identical request") from None
+
+    async def stream(
+        self, key: str, factory: Callable[[], AsyncGenerator[str, None]]
+    ) -> AsyncGenerator[str, None]:
+        """Subscribe to the shared stream for key, starting it if needed."""
+        flight = self._streams.get(key)
+        if flight is None:
+            flight = self._streams[key] = _AsyncFlight()
+            flight.task = asyncio.ensure_future(self._produce(key, flight, factory))
+        else:
+            logger.info("🔗 Joined in-flight stream")
+        flight.subscribers += 1
+
+        try:
+            sent = 0
+            while True:
+                async with flight.cond:
+                    await flight.cond.wait_for(lambda: sent < len(flight.chunks) or flight.done)
+                    chunks = flight.chunks[sent:]
+                    done = flight.done
+                for chunk in chunks:
+                    sent += 1
+                    yield chunk
+                if done:
+                    return
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                flight.task.cancel()
+
+    async def _produce(
+        self, key: str, flight: _AsyncFlight, factory: Callable[[], AsyncGenerator[str, None]]
+    ) -> None:
+        upstream = factory()
+        try:
+            async for chunk in upstream:
+                async with flight.cond:
+                    flight.chunks.append(chunk)
+                    flight.cond.notify_all()
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.exception("shared stream failed")
+        finally:
+            await upstream.aclose()
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+            flight.done = True
+            async with flight.cond:
+                flight.cond.notify_all()
+
+
+_ENABLED = os.getenv("REQUEST_COALESCING", "1") == "1"
+
+SINGLE_FLIGHT = SingleFlight() if _ENABLED else None
+ASYNC_SINGLE_FLIGHT = AsyncSingleFlight() if _ENABLED else None
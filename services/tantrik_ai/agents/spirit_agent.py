@@ -2,16 +2,54 @@
 Base SpiritAgent: minimal OpenAI wrapper with chat + streaming
 """
 
+import time
+import queue
+import hashlib
 import logging
-from typing import List, Dict, Optional, Generator, Any
-from openai import OpenAI, OpenAIError
+import threading
+import contextvars
+from functools import partial
+from typing import Callable, List, Dict, Optional, Generator, Iterator, Any, Tuple
+from openai import OpenAI, OpenAIError, RateLimitError
+
+from .batch import BATCH_CONCURRENCY, fan_out
+from .circuit_breaker import CLOSED, CircuitBreaker, get_breaker, is_upstream_failure
+from .client_pool import get_client
+from .context_window import ContextWindow
+from .deadline import FALLBACK_RESERVE_SECONDS, Deadline, DeadlineExceeded
+from .hedging import HedgeLeg, HedgePolicy
+from .key_pool import KeyPool, Upstream
+from .metrics import (
+    CACHE_LOOKUPS, FALLBACKS, MODEL_LATENCY, MODEL_TOKENS, ROUTED, STREAM_DURATION, STREAM_TPS, STREAMS_ACTIVE,
+    TOKENS, TTFT, UPSTREAM_CALLS, UPSTREAM_LATENCY, child, error_outcome
+)
+from .openers import OPENER_PROMPT, OPENERS, is_greeting
+from .near_cache import NEAR_DUPLICATES
+from .response_cache import RESPONSE_CACHE, cache_key, replay_chunks
+from .routing import MODEL_STATS, STANDARD, ModelRouter, Route
+from .single_flight import SINGLE_FLIGHT
+from .stream_stats import STREAM_STATS
+from .tracing import span, start_span
 
 logger = logging.getLogger("tantrik-ai.spirit")
 
+SUMMARY_PROMPT = (
+    "Summarize this conversation between a visitor and a spirit in under 120 words. "
+    "Keep names, facts the visitor revealed, and promises or threats the spirit made. "
+    "If an existing summary is given, extend it."
+)
+
+
+class Placeholder(str):
+    """Text a stream yields in place of a reply once every key failed; callers must not record it."""
+
 
 class SpiritAgent:
     """Base agent for all spirit personalities."""
 
+    client_class = OpenAI
+    single_flight = SINGLE_FLIGHT
+
     def __init__(
         self,
         name: str,
@@ -20,53 +58,315 @@ class SpiritAgent:
         fallback_api_key: Optional[str] = None,
         model: str = "gpt-4o-mini",
         temperature: float = 0.9,
-        max_tokens: int = 500
+        max_tokens: int = 500,
+        spirit_id: Optional[str] = None
     ):
         self.name = name
+        self.spirit_id = spirit_id or name.lower().replace(" ", "_")
         self.system_prompt = system_prompt
+        # Cached replies are only reused while the prompt they were generated with is unchanged
+        self.revision = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:12]
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
 
-        # Initialize OpenAI clients
-        self.primary_client = OpenAI(
-            api_key=primary_api_key,
-            timeout=30.0,
-            max_retries=2
-        )
-        self.fallback_client = OpenAI(
-            api_key=fallback_api_key,
-            timeout=30.0,
-            max_retries=2
-        ) if fallback_api_key else None
+        # Shared OpenAI clients (one keep-alive pool per key across all agents)
+        self.primary_client = self._create_client(primary_api_key)
+        self.fallback_client = self._create_client(fallback_api_key) if fallback_api_key else None
+        self.primary_breaker = get_breaker(primary_api_key)
+        self.fallback_breaker = get_breaker(fallback_api_key) if fallback_api_key else None
+        # Every key requests may be scheduled on: primary, fallback, then OPENAI_API_KEYS
+        self.keys = KeyPool.from_keys(primary_api_key, fallback_api_key)
+        self.cache = RESPONSE_CACHE
+        self.near_duplicates = NEAR_DUPLICATES
+        self.context_window = ContextWindow.for_spirit(self.spirit_id)
+        self.hedge = HedgePolicy.for_spirit(self.spirit_id)
+        self.router = ModelRouter.for_spirit(self.spirit_id, self.model, self.max_tokens)
+        self.default_route = Route(STANDARD, self.model, self.max_tokens, "default")
+        self.openers = OPENERS
+        if self.openers is not None:
+            self.openers.register(self.spirit_id, self._opener)
 
         logger.info(f"🪬 {self.name} initialized with {self.model}")
 
-    def _build_messages(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
-        """Prepend system prompt to user messages."""
-        return [{"role": "system", "content": self.system_prompt}] + messages
+    def _create_client(self, api_key: str):
+        """Return the process-wide client (and connection pool) for this key."""
+        return get_client(self.client_class, api_key)
+
+    def _diverted(self, reserved: Optional[str]) -> bool:
+        """Did admission reserve budget on a key other than the primary?"""
+        return reserved is not None and reserved != self.keys.upstreams[0].name
+
+    def _route(
+        self, tried: Tuple[str, ...], reserved: Optional[str] = None, chosen: Optional[Upstream] = None
+    ) -> Tuple[Any, Upstream]:
+        """
+        Pick the key for an attempt and its shared client.
+
+        The first attempt goes to the key admission reserved budget on, unless its
+        circuit is open; failovers (and unreserved requests) use KeyPool.pick.
+        A key the caller already chose (a hedged stream's first leg) is used as is.
+        """
+        upstream = chosen
+        if upstream is None:
+            upstream = self.keys.get(reserved) if reserved and not tried else None
+            if upstream is None or not upstream.breaker.allow():
+                upstream = self.keys.pick(tried)
+        return get_client(self.client_class, upstream.api_key, upstream.base_url), upstream
+
+    def _has_next(self, tried: Tuple[str, ...], api_used: str) -> bool:
+        """Is there a key left to fail over to after this attempt?"""
+        return len(set(tried) | {api_used}) < len(self.keys)
+
+    def _choose_route(self, messages: List[Dict[str, str]]) -> Route:
+        """Model and max_tokens for this request (the spirit's own unless MODEL_ROUTING is on)."""
+        route = self.router.choose(messages) if self.router else self.default_route
+        child(ROUTED, self.spirit_id, route.tier, route.model).inc()
+        return route
+
+    @staticmethod
+    def _record_error(breaker: CircuitBreaker, error: OpenAIError, started: float) -> None:
+        if isinstance(error, DeadlineExceeded):
+            return
+        if is_upstream_failure(error):
+            breaker.record_failure(type(error).__name__)
+        else:
+            # The key answered; the request itself was rejected
+            breaker.record_success(time.monotonic() - started)
+
+    def _reserve(self, tried: Tuple[str, ...], api_used: str) -> float:
+        """Seconds an attempt leaves on the table for the next key."""
+        return FALLBACK_RESERVE_SECONDS if self._has_next(tried, api_used) else 0.0
+
+    def _observe_completion(self, api_used: str, latency: float, tokens: int, route: Route) -> None:
+        child(UPSTREAM_CALLS, self.spirit_id, api_used, "chat", "ok").inc()
+        child(UPSTREAM_LATENCY, self.spirit_id, api_used).observe(latency)
+        child(TOKENS, self.spirit_id, api_used).inc(tokens)
+        child(MODEL_LATENCY, route.tier, route.model, "chat").observe(latency)
+        child(MODEL_TOKENS, route.tier, route.model).inc(tokens)
+        MODEL_STATS.observe(route.model, latency)
+
+    def _observe_stream(
+        self, api_used: str, duration: float, first_token: Optional[float], streamed: int, route: Route
+    ) -> None:
+        child(UPSTREAM_CALLS, self.spirit_id, api_used, "stream", "ok").inc()
+        child(STREAM_DURATION, self.spirit_id, api_used).observe(duration)
+        child(TOKENS, self.spirit_id, api_used).inc(streamed)
+        child(MODEL_TOKENS, route.tier, route.model).inc(streamed)
+        if first_token is not None:
+            child(MODEL_LATENCY, route.tier, route.model, "stream").observe(first_token)
+            MODEL_STATS.observe(route.model, first_token)
+        if first_token is not None and streamed > 1 and duration > first_token:
+            child(STREAM_TPS, self.spirit_id, api_used).observe((streamed - 1) / (duration - first_token))
 
-    def chat(self, messages: List[Dict[str, str]], use_fallback: bool = False) -> Dict[str, Any]:
+    def _observe_failure(
+        self, call: str, api_used: str, error: Exception, route: Route, tried: Tuple[str, ...]
+    ) -> bool:
+        """Count a failed upstream call; True if it will be retried on another key."""
+        outcome = error_outcome(error)
+        child(UPSTREAM_CALLS, self.spirit_id, api_used, call, outcome).inc()
+        if outcome in ("timeout", "upstream_error"):
+            MODEL_STATS.observe(route.model, None)
+        fallback = self._has_next(tried, api_used)
+        if fallback and isinstance(error, OpenAIError):
+            child(FALLBACKS, self.spirit_id).inc()
+        return fallback
+
+    def _create(self, client, upstream: Upstream, deadline: Deadline, reserve: float, **params):
+        """Upstream call with jittered retries, every attempt bounded by the request deadline."""
+        attempt = 0
+        while True:
+            try:
+                # For streams this covers connection setup up to the response headers
+                with upstream.calling(), span(
+                    "upstream.connect" if params.get("stream") else "upstream.call", attempt=attempt
+                ):
+                    raw = client.chat.completions.with_raw_response.create(
+                        timeout=deadline.attempt_timeout(reserve), **params
+                    )
+                upstream.observe(raw.headers)
+                return raw.parse()
+            except OpenAIError as e:
+                upstream.observe_error(e)
+                # A throttled key hands the request on rather than backing off while others have headroom
+                if isinstance(e, RateLimitError) and reserve > 0:
+                    raise
+                delay = deadline.retry_delay(attempt, e, reserve)
+                if delay < 0:
+                    raise
+                logger.info(f"🔁 {self.name} retrying in {delay:.2f}s ({type(e).__name__})")
+                with span("upstream.backoff"):
+                    time.sleep(delay)
+                attempt += 1
+
+    def _build_messages(self, messages: List[Dict[str, str]]) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        """Prepend system prompt to the most recent turns that fit the token budget."""
+        with span("build_messages"):
+            return self.context_window.build(self.system_prompt, messages, self._summarize)
+
+    def _summarize(self, previous: Optional[str], messages: List[Dict[str, str]]) -> str:
+        """Fold older turns into the rolling summary (runs off the request path)."""
+        transcript = "\n".join(f"{m.get('role')}: {m.get('content')}" for m in messages)
+        if previous:
+            transcript = f"Existing summary: {previous}\n\n{transcript}"
+
+        client = get_client(OpenAI, self.primary_client.api_key)
+        response = client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": transcript}
+            ],
+            temperature=0.3,
+            max_tokens=200
+        )
+        return response.choices[0].message.content or previous or ""
+
+    def _opener(self) -> str:
+        """Generate one opening line for the pool (runs off the request path)."""
+        client = get_client(OpenAI, self.primary_client.api_key)
+        started = time.monotonic()
+        response = client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": OPENER_PROMPT}
+            ],
+            temperature=self.temperature,
+            max_tokens=self.max_tokens
+        )
+        child(UPSTREAM_CALLS, self.spirit_id, "primary", "opener", "ok").inc()
+        child(UPSTREAM_LATENCY, self.spirit_id, "primary").observe(time.monotonic() - started)
+        child(TOKENS, self.spirit_id, "primary").inc(response.usage.total_tokens if response.usage else 0)
+        return response.choices[0].message.content or ""
+
+    def _pooled_opener(self, messages: List[Dict[str, str]]) -> Optional[str]:
+        """A pre-generated reply when this turn only greets the spirit."""
+        if self.openers is None or not is_greeting(messages):
+            return None
+        line = self.openers.take(self.spirit_id)
+        if line:
+            logger.info(f"🎙️ {self.name}: opening line from the pool")
+        return line
+
+    def _request_key(self, messages: List[Dict[str, str]]) -> str:
+        """Identity of an upstream request, shared by the cache and coalescing."""
+        return cache_key(self.spirit_id, self.model, self.temperature, messages, self.revision)
+
+    def _cached(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached chat result for this key, if any."""
+        if self.cache is None:
+            return None
+        cached = self.cache.get(key)
+        child(CACHE_LOOKUPS, self.spirit_id, "hit" if cached else "miss").inc()
+        if cached:
+            logger.info(f"🗃️ {self.name}: cache hit")
+        return cached
+
+    def _near_duplicate(self, messages: List[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+        """A reply already given to a near-identical short question early in a conversation."""
+        if self.near_duplicates is None:
+            return None
+        return self.near_duplicates.get(self.spirit_id, messages)
+
+    def _store(self, key: str, result: Dict[str, Any], messages: List[Dict[str, str]]) -> None:
+        if not result.get("success"):
+            return
+        if self.cache is not None:
+            self.cache.set(key, result, self.spirit_id)
+        if self.near_duplicates is not None:
+            self.near_duplicates.add(self.spirit_id, messages, result)
+
+    def chat(
+        self, messages: List[Dict[str, str]], reserved: Optional[str] = None, deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """Chat completion; cache hits and identical in-flight requests skip the upstream call."""
+        deadline = deadline or Deadline.after()
+        key = self._request_key(messages)
+        cached = self._cached(key) or self._near_duplicate(messages)
+        if cached:
+            return dict(cached, cached=True)
+
+        if self.single_flight is None:
+            return self._complete_and_store(key, messages, reserved, deadline)
+        try:
+            return self.single_flight.do(
+                key, lambda: self._complete_and_store(key, messages, reserved, deadline), deadline
+            )
+        except DeadlineExceeded as e:
+            return self._gave_up_waiting(e)
+
+    def _gave_up_waiting(self, error: DeadlineExceeded) -> Dict[str, Any]:
+        """This caller's own timeout result when the identical request it joined outlives its deadline."""
+        logger.warning(f"⌛ {self.name} stopped waiting on an identical in-flight request")
+        return {
+            "content": "*The spirit flickers and fades into darkness...*",
+            "model": self.model,
+            "tokens_used": 0,
+            "api_used": None,
+            "success": False,
+            "error": str(error)
+        }
+
+    def chat_batch(
+        self,
+        conversations: List[List[Dict[str, str]]],
+        concurrency: int = BATCH_CONCURRENCY,
+        chat: Optional[Callable[[List[Dict[str, str]]], Dict[str, Any]]] = None
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Chat many independent conversations concurrently, yielding (index, result) as each finishes.
+
+        `chat` stands in for self.chat when the caller wraps each job (admission, logging).
+        """
+        return fan_out([partial(chat or self.chat, messages) for messages in conversations], concurrency)
+
+    def _complete_and_store(
+        self, key: str, messages: List[Dict[str, str]], reserved: Optional[str], deadline: Deadline
+    ) -> Dict[str, Any]:
+        prompt, context = self._build_messages(messages)
+        route = self._choose_route(messages)
+        result = self._complete(prompt, reserved, deadline, route)
+        result["context"] = context
+        result["route"] = route.public()
+        self._store(key, result, messages)
+        return result
+
+    def _complete(
+        self,
+        prompt: List[Dict[str, str]],
+        reserved: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        route: Optional[Route] = None,
+        tried: Tuple[str, ...] = ()
+    ) -> Dict[str, Any]:
         """Synchronous chat completion with fallback support."""
-        client = self.fallback_client if (use_fallback and self.fallback_client) else self.primary_client
-        api_used = "fallback" if (use_fallback and self.fallback_client) else "primary"
+        deadline = deadline or Deadline.after()
+        route = route or self.default_route
+        client, upstream = self._route(tried, reserved)
+        api_used, breaker = upstream.name, upstream.breaker
+        started = time.monotonic()
 
         try:
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=self._build_messages(messages),
+            response = self._create(
+                client, upstream, deadline, self._reserve(tried, api_used),
+                model=route.model,
+                messages=prompt,
                 temperature=self.temperature,
-                max_tokens=self.max_tokens
+                max_tokens=route.max_tokens
             )
 
+            latency = time.monotonic() - started
+            breaker.record_success(latency)
             content = response.choices[0].message.content or ""
             tokens = response.usage.total_tokens if response.usage else 0
+            self._observe_completion(api_used, latency, tokens, route)
 
             logger.info(f"✅ {self.name} ({api_used}): {tokens} tokens")
 
             return {
                 "content": content,
-                "model": self.model,
+                "model": route.model,
                 "tokens_used": tokens,
                 "api_used": api_used,
                 "success": True
@@ -74,15 +374,16 @@ class SpiritAgent:
 
         except OpenAIError as e:
             logger.error(f"❌ {self.name} ({api_used}): {str(e)}")
+            self._record_error(breaker, e, started)
 
             # Try fallback if available
-            if not use_fallback and self.fallback_client:
-                logger.info(f"🔄 {self.name} trying fallback...")
-                return self.chat(messages, use_fallback=True)
+            if self._observe_failure("chat", api_used, e, route, tried):
+                logger.info(f"🔄 {self.name} trying next key...")
+                return self._complete(prompt, reserved, deadline, route, tried + (api_used,))
 
             return {
                 "content": "*The spirit flickers and fades into darkness...*",
-                "model": self.model,
+                "model": route.model,
                 "tokens_used": 0,
                 "api_used": api_used,
                 "success": False,
@@ -91,45 +392,229 @@ class SpiritAgent:
 
         except Exception as e:
             logger.error(f"❌ {self.name} unexpected error: {str(e)}")
+            self._observe_failure("chat", api_used, e, route, tried)
             return {
                 "content": "*The spirit cannot manifest at this time...*",
-                "model": self.model,
+                "model": route.model,
                 "tokens_used": 0,
                 "api_used": api_used,
                 "success": False,
                 "error": str(e)
             }
 
-    def stream_chat(self, messages: List[Dict[str, str]], use_fallback: bool = False) -> Generator[str, None, None]:
-        """Streaming chat completion with fallback support."""
-        client = self.fallback_client if (use_fallback and self.fallback_client) else self.primary_client
-        api_used = "fallback" if (use_fallback and self.fallback_client) else "primary"
+    def stream_chat(
+        self, messages: List[Dict[str, str]], reserved: Optional[str] = None, deadline: Optional[Deadline] = None
+    ) -> Generator[str, None, None]:
+        """
+        Streaming chat; cached replies are replayed and identical live streams are shared.
 
+        The stream simply ends when the deadline passes, so callers can still close it cleanly.
+        """
+        deadline = deadline or Deadline.after()
+        key = self._request_key(messages)
+        active = child(STREAMS_ACTIVE, self.spirit_id)
+        active.inc()
+        upstream = None
         try:
-            stream = client.chat.completions.create(
-                model=self.model,
-                messages=self._build_messages(messages),
+            opener = self._pooled_opener(messages)
+            if opener:
+                yield from replay_chunks(opener)
+                return
+
+            cached = self._cached(key) or self._near_duplicate(messages)
+            if cached:
+                yield from replay_chunks(cached["content"])
+                return
+
+            prompt, _ = self._build_messages(messages)
+            route = self._choose_route(messages)
+            if self.single_flight is None:
+                upstream = self._open_stream(prompt, reserved, deadline, route)
+            else:
+                upstream = self.single_flight.stream(
+                    key, lambda: self._open_stream(prompt, reserved, deadline, route)
+                )
+            for chunk in upstream:
+                yield chunk
+                if deadline.expired():
+                    logger.warning(f"⌛ {self.name} stream cut at request deadline")
+                    break
+        finally:
+            if upstream is not None:
+                upstream.close()
+            active.dec()
+
+    def _should_hedge(self, reserved: Optional[str]) -> bool:
+        """Hedging needs two keys with closed circuits to race."""
+        return bool(
+            self.hedge and not self._diverted(reserved)
+            and sum(upstream.breaker.state == CLOSED for upstream in self.keys.upstreams) > 1
+        )
+
+    def _open_stream(
+        self, prompt: List[Dict[str, str]], reserved: Optional[str], deadline: Deadline, route: Route
+    ) -> Generator[str, None, None]:
+        if self._should_hedge(reserved):
+            self.hedge.on_request()
+            return self._hedged_stream(prompt, reserved, deadline, route)
+        return self._stream(prompt, reserved, deadline, route)
+
+    def _hedged_stream(
+        self, prompt: List[Dict[str, str]], reserved: Optional[str], deadline: Deadline, route: Route
+    ) -> Generator[str, None, None]:
+        """
+        Stream from the best key, racing the next best if no token arrives within the hedge delay.
+
+        Whichever leg yields first wins; the loser's upstream is cut off at once.
+        """
+        # Route the first leg here, once, so the hedge leg can stay off its key
+        _, first = self._route((), reserved)
+        chunks: "queue.Queue" = queue.Queue()
+        legs = {"primary": HedgeLeg(), "fallback": HedgeLeg()}
+        winner = None
+
+        def pump(leg: str, upstream: Generator[str, None, None]) -> None:
+            try:
+                for chunk in upstream:
+                    if legs[leg].stopped.is_set():
+                        break
+                    chunks.put((leg, chunk))
+            finally:
+                upstream.close()
+                chunks.put((leg, None))
+
+        threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(pump, "primary", self._stream(prompt, reserved, deadline, route, (), first, legs["primary"])),
+            daemon=True
+        ).start()
+        hedged = False
+        try:
+            try:
+                leg, chunk = chunks.get(timeout=min(self.hedge.delay(), deadline.remaining()))
+            except queue.Empty:
+                if self.hedge.acquire():
+                    logger.info(f"🏁 {self.name} {first.name} slow to first token, hedging on the next key")
+                    hedge = self._stream(prompt, None, deadline, route, (first.name,), leg=legs["fallback"])
+                    threading.Thread(
+                        target=contextvars.copy_context().run, args=(pump, "fallback", hedge), daemon=True
+                    ).start()
+                    hedged = True
+                leg, chunk = chunks.get()
+
+            winner = leg
+            if hedged:
+                legs["fallback" if winner == "primary" else "primary"].stop()
+                logger.info(f"🏁 {self.name} hedge won by {winner}")
+
+            while chunk is not None:
+                yield chunk
+                leg, chunk = chunks.get()
+                while leg != winner:
+                    leg, chunk = chunks.get()
+        finally:
+            for name, leg in legs.items():
+                # The winner's pump stops at its next chunk; a leg still waiting on its first is cut off
+                if name == winner:
+                    leg.stopped.set()
+                else:
+                    leg.stop()
+
+    def _stream(
+        self,
+        prompt: List[Dict[str, str]],
+        reserved: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        route: Optional[Route] = None,
+        tried: Tuple[str, ...] = (),
+        chosen: Optional[Upstream] = None,
+        leg: Optional[HedgeLeg] = None
+    ) -> Generator[str, None, None]:
+        """Streaming chat completion with fallback support; `leg` lets a hedge winner cut this stream off."""
+        deadline = deadline or Deadline.after()
+        route = route or self.default_route
+        first_choice = not tried and not self._diverted(reserved)
+        client, upstream = self._route(tried, reserved, chosen)
+        api_used, breaker = upstream.name, upstream.breaker
+        started = time.monotonic()
+        stream = None
+        streamed = 0
+        waiting = None
+
+        try:
+            stream = self._create(
+                client, upstream, deadline, self._reserve(tried, api_used),
+                model=route.model,
+                messages=prompt,
                 temperature=self.temperature,
-                max_tokens=self.max_tokens,
+                max_tokens=route.max_tokens,
                 stream=True
             )
+            if leg is not None and not leg.opened(stream):
+                self._aborted(api_used, streamed)
+                return
 
             logger.info(f"🌊 {self.name} streaming ({api_used})")
 
+            waiting = start_span("upstream.first_token", upstream=api_used)
+            first_token = None
             for chunk in stream:
                 if chunk.choices and chunk.choices[0].delta.content:
+                    if first_token is None:
+                        if waiting is not None:
+                            waiting.end()
+                        first_token = time.monotonic() - started
+                        child(TTFT, self.spirit_id, api_used).observe(first_token)
+                        if self.hedge and first_choice:
+                            self.hedge.observe(first_token)
+                    # Each content delta is roughly one token
+                    streamed += 1
                     yield chunk.choices[0].delta.content
+            breaker.record_success(first_token if first_token is not None else time.monotonic() - started)
+            self._observe_stream(api_used, time.monotonic() - started, first_token, streamed, route)
+
+        except GeneratorExit:
+            # Closed mid-stream (client gone, hedge lost, deadline): stop generating upstream
+            self._aborted(api_used, streamed)
+            raise
 
         except OpenAIError as e:
+            if self._lost(leg, api_used, streamed):
+                return
             logger.error(f"❌ {self.name} stream failed ({api_used}): {str(e)}")
+            self._record_error(breaker, e, started)
 
             # Try fallback if available
-            if not use_fallback and self.fallback_client:
-                logger.info(f"🔄 {self.name} trying fallback stream...")
-                yield from self.stream_chat(messages, use_fallback=True)
+            if self._observe_failure("stream", api_used, e, route, tried):
+                logger.info(f"🔄 {self.name} trying next key's stream...")
+                yield from self._stream(prompt, reserved, deadline, route, tried + (api_used,), leg=leg)
             else:
-                yield "*The spirit's voice fades into the void...*"
+                yield Placeholder("*The spirit's voice fades into the void...*")
 
         except Exception as e:
+            if self._lost(leg, api_used, streamed):
+                return
             logger.error(f"❌ {self.name} stream error: {str(e)}")
-            yield "*The connection to the spirit realm has been severed...*"
+            self._observe_failure("stream", api_used, e, route, tried)
+            yield Placeholder("*The connection to the spirit realm has been severed...*")
+
+        finally:
+            if waiting is not None:
+                waiting.end()
+            if leg is not None:
+                leg.closed()
+            if stream is not None:
+                stream.close()
+
+    def _lost(self, leg: Optional[HedgeLeg], api_used: str, streamed: int) -> bool:
+        """Did the read fail only because this leg lost the hedge and was cut off?"""
+        if leg is None or not leg.stopped.is_set():
+            return False
+        self._aborted(api_used, streamed)
+        return True
+
+    def _aborted(self, api_used: str, streamed: int) -> None:
+        STREAM_STATS.upstream_aborted(streamed, self.max_tokens)
+        child(UPSTREAM_CALLS, self.spirit_id, api_used, "stream", "cancelled").inc()
+        child(TOKENS, self.spirit_id, api_used).inc(streamed)
+        logger.info(f"✂️ {self.name} upstream stream cancelled after ~{streamed} tokens ({api_used})")
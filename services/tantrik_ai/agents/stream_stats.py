@@ -0,0 +1,52 @@
+"""
+Counters for streams cut short: client disconnects, cancelled upstream generations and resumable streams
+that ran on with nobody reading
+"""
+
+import threading
+from typing import Dict
+
+
+class StreamStats:
+    """Process-wide abort counters, reported on /health."""
+
+    def __init__(self):
+        self.client_disconnects = 0
+        self.upstream_cancelled = 0
+        # Upper bound: max_tokens minus what was streamed before the cancel
+        self.tokens_saved = 0
+        # Resumable streams generated to the end of the grace period for a client that never came back
+        self.abandoned = 0
+        # Resumed readers cut off for falling further behind than the replay buffer
+        self.lagged = 0
+        self._lock = threading.Lock()
+
+    def client_disconnected(self) -> None:
+        with self._lock:
+            self.client_disconnects += 1
+
+    def upstream_aborted(self, tokens_streamed: int, max_tokens: int) -> None:
+        with self._lock:
+            self.upstream_cancelled += 1
+            self.tokens_saved += max(0, max_tokens - tokens_streamed)
+
+    def stream_abandoned(self) -> None:
+        with self._lock:
+            self.abandoned += 1
+
+    def reader_lagged(self) -> None:
+        with self._lock:
+            self.lagged += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "client_disconnects": self.client_disconnects,
+                "upstream_cancelled": self.upstream_cancelled,
+                "tokens_saved": self.tokens_saved,
+                "abandoned": self.abandoned,
+                "lagged": self.lagged
+            }
+
+
+STREAM_STATS = StreamStats()
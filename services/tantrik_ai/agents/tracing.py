@@ -0,0 +1,169 @@
+"""
+Lightweight per-request tracing: phase spans, Server-Timing, and Zipkin v2 JSON export
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+
+logger = logging.getLogger("tantrik-ai.tracing")
+
+# Export is opt-in; spans are always collected for Server-Timing
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_ZIPKIN_URL = os.getenv("TRACE_ZIPKIN_URL", "")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 1.0))
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "tantrik-ai")
+
+EXPORT_QUEUE_SIZE = 1000
+EXPORT_BATCH = 50
+
+
+class Span:
+    __slots__ = ("name", "span_id", "start_ns", "duration_ns", "tags")
+
+    def __init__(self, name: str, tags: Dict[str, Any]):
+        self.name = name
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.start_ns = time.time_ns()
+        self.duration_ns = 0
+        self.tags = tags
+
+    def end(self) -> None:
+        if not self.duration_ns:
+            self.duration_ns = max(1000, time.time_ns() - self.start_ns)
+
+
+class Trace:
+    """Spans of one request. All phase spans are children of the request span."""
+
+    def __init__(self, name: str, sampled: bool):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.root = Span(name, {})
+        self.spans: List[Span] = []
+        self.sampled = sampled
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value; repeated phases (e.g. retries) are summed."""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for span in self.spans:
+                if span.duration_ns:
+                    totals[span.name] = totals.get(span.name, 0.0) + span.duration_ns / 1e6
+        parts = [f"{name.replace('.', '-')};dur={ms:.1f}" for name, ms in totals.items()]
+        parts.append(f"total;dur={(time.time_ns() - self.root.start_ns) / 1e6:.1f}")
+        return ", ".join(parts)
+
+    def finish(self, **tags: Any) -> None:
+        self.root.tags.update(tags)
+        self.root.end()
+        if self.sampled and EXPORTER:
+            EXPORTER.submit(self)
+
+    def to_zipkin(self) -> List[Dict[str, Any]]:
+        endpoint = {"serviceName": SERVICE_NAME}
+
+        def encode(span: Span, parent: Optional[str]) -> Dict[str, Any]:
+            record = {
+                "traceId": self.trace_id,
+                "id": span.span_id,
+                "name": span.name,
+                "timestamp": span.start_ns // 1000,
+                "duration": max(1, span.duration_ns // 1000),
+                "localEndpoint": endpoint,
+                "tags": {key: str(value) for key, value in span.tags.items()}
+            }
+            if parent:
+                record["parentId"] = parent
+            return record
+
+        with self._lock:
+            spans = [span for span in self.spans if span.duration_ns]
+        return [encode(self.root, None)] + [encode(span, self.root.span_id) for span in spans]
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("tantrik_trace", default=None)
+
+
+def start_trace(name: str) -> Trace:
+    """Begin the trace for the current request (replaces any trace left on this thread)."""
+    trace = Trace(name, random.random() < TRACE_SAMPLE_RATE)
+    _current.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def start_span(name: str, **tags: Any) -> Optional[Span]:
+    """Open a span that is ended explicitly (for phases that cross a yield); None outside a trace."""
+    trace = _current.get()
+    if trace is None:
+        return None
+    span = Span(name, tags)
+    trace.add(span)
+    return span
+
+
+@contextmanager
+def span(name: str, **tags: Any) -> Iterator[Optional[Span]]:
+    """Time a block as a phase of the current request; a no-op outside a trace."""
+    opened = start_span(name, **tags)
+    try:
+        yield opened
+    finally:
+        if opened is not None:
+            opened.end()
+
+
+class ZipkinExporter:
+    """Ships finished traces off the request path to a JSON-lines file and/or a Zipkin collector."""
+
+    def __init__(self, path: str = "", url: str = ""):
+        self.path = path
+        self.url = url
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        threading.Thread(target=self._run, daemon=True, name="trace-export").start()
+
+    def submit(self, trace: Trace) -> None:
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            pass  # Never block a request on tracing
+
+    def _run(self) -> None:
+        client = httpx.Client(timeout=5.0) if self.url else None
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < EXPORT_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            encoded = [trace.to_zipkin() for trace in batch]
+            try:
+                if self.path:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        for spans in encoded:
+                            f.write(json.dumps(spans) + "\n")
+                if client:
+                    client.post(self.url, json=[record for spans in encoded for record in spans])
+            except Exception as e:
+                logger.warning(f"⚠️ Trace export failed: {str(e)}")
+
+
+EXPORTER = ZipkinExporter(TRACE_FILE, TRACE_ZIPKIN_URL) if (TRACE_FILE or TRACE_ZIPKIN_URL) else None
@@ -5,7 +5,6 @@ Flask API for three spirit agents with streaming support (SSE)
 
 import os
 import logging
-from typing import Dict
 
 from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
@@ -14,7 +13,25 @@ from dotenv import load_dotenv
 # load .env if present
 load_dotenv()
 
-from agents import DraculaAgent, ReaperAgent, BloodyMaryAgent
+from agents import SpiritRegistry
+from agents.circuit_breaker import breaker_states
+from agents.key_pool import key_states
+from agents.near_cache import NEAR_DUPLICATES
+from agents.openers import OPENERS
+from agents.spirit_agent import Placeholder
+from agents.response_cache import RESPONSE_CACHE
+from agents.metrics import chat_outcome, count_request, render as render_metrics
+from agents.stream_stats import STREAM_STATS
+from agents.tracing import span, start_trace
+from agents.client_pool import start_warm_up
+from serving import (
+    ADMISSION, IDEMPOTENCY_HEADER, JOBS, NDJSON_MEDIA_TYPE, SESSIONS, SSE_DONE, SSE_HEADERS, STREAM_ID_HEADER,
+    STREAMS, Batch,
+    chat_payload, client_id, coalesce, last_event_id, request_deadline, retry_headers, sse_event,
+    validate_batch_request, validate_chat_request
+)
+from serving.profiler import FOLDED_CONTENT_TYPE, check_admin, parse_seconds, sample_on_thread
+from serving.transcripts import TRANSCRIPTS, result_details
 
 # Configure logging
 logging.basicConfig(
@@ -24,7 +41,7 @@ logging.basicConfig(
 logger = logging.getLogger("tantrik-ai")
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["X-Session-Id", "X-Stream-Id", "Retry-After"])
 
 PRIMARY_API_KEY = os.getenv("OPENAI_API_KEY_PRIMARY")
 FALLBACK_API_KEY = os.getenv("OPENAI_API_KEY_FALLBACK")
@@ -33,104 +50,237 @@ if not PRIMARY_API_KEY:
     logger.error("OPENAI_API_KEY_PRIMARY not set in env")
     raise RuntimeError("OPENAI_API_KEY_PRIMARY is required")
 
-# Initialize agents
+# Spirits defined in SPIRITS_DIR; each agent is built on its first request and reloaded when its file changes
 try:
-    SPIRITS: Dict[str, object] = {
-        "dracula": DraculaAgent(PRIMARY_API_KEY, FALLBACK_API_KEY),
-        "reaper": ReaperAgent(PRIMARY_API_KEY, FALLBACK_API_KEY),
-        "bloody_mary": BloodyMaryAgent(PRIMARY_API_KEY, FALLBACK_API_KEY),
-    }
-    logger.info("Spirit agents initialized")
+    SPIRITS = SpiritRegistry(PRIMARY_API_KEY, FALLBACK_API_KEY)
 except Exception as e:
-    logger.exception("Failed to initialize spirit agents")
+    logger.exception("Failed to load spirit definitions")
     raise
 
+# Open upstream connections before the first visitor arrives (OPENAI_POOL_WARMUP)
+SPIRITS.open_clients()
+start_warm_up()
+
 @app.route("/health", methods=["GET"])
 def health():
     return jsonify({
         "status": "alive",
         "service": "Tantrik AI",
-        "spirits": list(SPIRITS.keys())
+        "spirits": list(SPIRITS.keys()),
+        "registry": SPIRITS.stats(),
+        "cache": RESPONSE_CACHE.stats() if RESPONSE_CACHE else None,
+        "near_cache": NEAR_DUPLICATES.stats() if NEAR_DUPLICATES else None,
+        "openers": OPENERS.stats() if OPENERS else None,
+        "transcripts": TRANSCRIPTS.stats() if TRANSCRIPTS else None,
+        "upstreams": breaker_states(),
+        "keys": key_states(),
+        "streams": STREAM_STATS.snapshot()
     }), 200
 
+# Basic metadata for frontend, from the spirit definitions
 @app.route("/spirits", methods=["GET"])
 def spirits():
-    # Basic metadata for frontend
-    return jsonify({
-        "spirits": [
-            {"id": "dracula", "name": "Count Dracula", "emoji": "🧛"},
-            {"id": "reaper", "name": "The Grim Reaper", "emoji": "💀"},
-            {"id": "bloody_mary", "name": "Bloody Mary", "emoji": "👻"},
-        ]
-    }), 200
+    return jsonify({"spirits": SPIRITS.metadata()}), 200
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    body, content_type = render_metrics()
+    return Response(body, headers={"Content-Type": content_type})
+
+def admit(spirit, turn, deadline):
+    """Admission control for one chat turn: (reserved key, None) or (None, rejection)."""
+    if ADMISSION is None:
+        return None, None
+    client = client_id(request.remote_addr, request.headers, turn)
+    return ADMISSION.admit(client, spirit, turn.messages, deadline)
 
 @app.route("/chat", methods=["POST"])
 def chat():
-    data = request.get_json(silent=True)
-    if not data:
-        return jsonify({"error": "No JSON body provided"}), 400
+    trace = start_trace("POST /chat")
+    with span("parse"):
+        data = request.get_json(silent=True)
+        invalid = validate_chat_request(data, SPIRITS)
+    if invalid:
+        count_request("chat", "none", "invalid")
+        body, status = invalid
+        return jsonify(body), status
 
-    spirit_id = data.get("spirit_id")
-    messages = data.get("messages")
-
-    if not spirit_id:
-        return jsonify({"error": "spirit_id is required"}), 400
-    if spirit_id not in SPIRITS:
-        return jsonify({"error": "unknown spirit", "available": list(SPIRITS.keys())}), 400
-    if not messages or not isinstance(messages, list):
-        return jsonify({"error": "messages must be a non-empty list"}), 400
+    with span("session"):
+        turn, invalid = SESSIONS.begin(data)
+    if invalid:
+        count_request("chat", data["spirit_id"], "invalid")
+        body, status = invalid
+        return jsonify(body), status
 
+    spirit_id = data["spirit_id"]
     spirit = SPIRITS[spirit_id]
+    deadline = request_deadline(request.headers)
+    reserved, rejected = admit(spirit, turn, deadline)
+    if rejected:
+        count_request("chat", spirit_id, "rejected")
+        body, status = rejected
+        return jsonify(body), status, retry_headers(rejected)
+
     try:
-        result = spirit.chat(messages)
-        return jsonify({
-            "spirit_id": spirit_id,
-            "spirit_name": spirit.name,
-            "response": result.get("content"),
-            "model": result.get("model"),
-            "tokens_used": result.get("tokens_used"),
-            "api_used": result.get("api_used"),
-            "success": result.get("success", False)
-        }), 200
+        result = spirit.chat(turn.messages, reserved=reserved, deadline=deadline)
+        if result.get("success"):
+            turn.record(result.get("content"), "chat", **result_details(result))
+        outcome = chat_outcome(result)
+        response = jsonify(chat_payload(spirit_id, spirit, result, turn.session_id))
     except Exception as e:
         logger.exception("chat endpoint failed")
-        return jsonify({"error": "internal server error", "message": str(e)}), 500
+        outcome = "error"
+        response = jsonify({"error": "internal server error", "message": str(e)})
+        response.status_code = 500
+    count_request("chat", spirit_id, outcome)
+    response.headers["Server-Timing"] = trace.server_timing()
+    trace.finish(spirit=spirit_id, outcome=outcome)
+    return response
+
+@app.route("/chat/batch", methods=["POST"])
+def chat_batch():
+    data = request.get_json(silent=True)
+    invalid = validate_batch_request(data)
+    if invalid:
+        count_request("batch", "none", "invalid")
+        body, status = invalid
+        return jsonify(body), status
+
+    batch = Batch(data["jobs"], SPIRITS, client_id(request.remote_addr, request.headers), request.headers)
+    return Response(stream_with_context(batch.lines()), mimetype=NDJSON_MEDIA_TYPE, headers=SSE_HEADERS)
+
+@app.route("/chat/jobs", methods=["POST"])
+def submit_job():
+    if JOBS is None:
+        return jsonify({"error": "endpoint not found"}), 404
 
-@app.route("/stream", methods=["POST"])
-def stream():
     data = request.get_json(silent=True)
-    if not data:
-        return jsonify({"error": "No JSON body provided"}), 400
+    idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+    body, status = JOBS.submit(data, SPIRITS, request.remote_addr, request.headers, idempotency_key)
+    if status == 429:
+        return jsonify(body), status, retry_headers((body, status))
+    if status == 202:
+        return jsonify(body), status, {"Location": f"/chat/jobs/{body['job_id']}"}
+    return jsonify(body), status
+
+@app.route("/chat/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    if JOBS is None:
+        return jsonify({"error": "endpoint not found"}), 404
+    body, status = JOBS.status(job_id)
+    return jsonify(body), status
 
-    spirit_id = data.get("spirit_id")
-    messages = data.get("messages")
+@app.route("/stream", methods=["POST"])
+def stream():
+    trace = start_trace("POST /stream")
+    with span("parse"):
+        data = request.get_json(silent=True)
+        invalid = validate_chat_request(data, SPIRITS)
+    if invalid:
+        count_request("stream", "none", "invalid")
+        body, status = invalid
+        return jsonify(body), status
 
-    if not spirit_id or spirit_id not in SPIRITS:
-        return jsonify({"error": "invalid spirit_id"}), 400
-    if not messages or not isinstance(messages, list):
-        return jsonify({"error": "messages must be a non-empty list"}), 400
+    with span("session"):
+        turn, invalid = SESSIONS.begin(data)
+    if invalid:
+        count_request("stream", data["spirit_id"], "invalid")
+        body, status = invalid
+        return jsonify(body), status
 
+    spirit_id = data["spirit_id"]
     spirit = SPIRITS[spirit_id]
+    deadline = request_deadline(request.headers)
+    reserved, rejected = admit(spirit, turn, deadline)
+    if rejected:
+        count_request("stream", spirit_id, "rejected")
+        body, status = rejected
+        return jsonify(body), status, retry_headers(rejected)
 
-    def generate():
+    chunks = spirit.stream_chat(turn.messages, reserved=reserved, deadline=deadline)
+    reply = []
+
+    def deltas():
         try:
-            for chunk in spirit.stream_chat(messages):
+            for chunk in chunks:
                 # Ensure chunk is string and not None
-                if chunk is None:
-                    continue
-                yield f"data: {chunk}\n\n"
-            yield "data: [DONE]\n\n"
+                if chunk:
+                    reply.append(chunk)
+                    yield chunk
+        finally:
+            # Close the upstream now rather than whenever the generator is collected.
+            # coalesce reads deltas on its own thread, so only this generator may close it.
+            chunks.close()
+
+    def generate():
+        outcome = "ok"
+        try:
+            yield from coalesce(deltas())
+            # Every key failed: the placeholder the client saw is not the spirit's answer
+            if any(isinstance(chunk, Placeholder) for chunk in reply):
+                outcome = "failed"
+            else:
+                turn.record("".join(reply), "stream", tokens=len(reply))
+            count_request("stream", spirit_id, outcome)
+            yield SSE_DONE
+        except GeneratorExit:
+            # Client gone (a resumable stream is only closed once its grace period ends)
+            outcome = "disconnected"
+            STREAM_STATS.client_disconnected()
+            count_request("stream", spirit_id, outcome)
+            logger.info(f"👋 Client left {spirit.name} stream")
+            raise
         except Exception:
             logger.exception("streaming failed")
-            yield "data: *The spirit's voice has faded...*\n\n"
-            yield "data: [DONE]\n\n"
+            outcome = "error"
+            count_request("stream", spirit_id, outcome)
+            yield sse_event("*The spirit's voice has faded...*")
+            yield SSE_DONE
+        finally:
+            trace.finish(spirit=spirit_id, outcome=outcome)
+
+    headers = dict(SSE_HEADERS)
+    if turn.session_id:
+        headers["X-Session-Id"] = turn.session_id
+    if STREAMS is None:
+        return Response(stream_with_context(generate()), mimetype="text/event-stream", headers=headers)
+
+    # Generate in the background so a dropped client can resume via GET /stream/<id>
+    stream_id = STREAMS.start(generate)
+    frames, _ = STREAMS.attach(stream_id)
+    headers[STREAM_ID_HEADER] = stream_id
+    return Response(stream_with_context(frames), mimetype="text/event-stream", headers=headers)
+
+@app.route("/stream/<stream_id>", methods=["GET"])
+def resume_stream(stream_id):
+    if STREAMS is None:
+        return jsonify({"error": "endpoint not found"}), 404
+
+    frames, invalid = STREAMS.attach(stream_id, last_event_id(request.headers))
+    if invalid:
+        body, status = invalid
+        return jsonify(body), status
+
+    headers = dict(SSE_HEADERS)
+    headers[STREAM_ID_HEADER] = stream_id
+    return Response(stream_with_context(frames), mimetype="text/event-stream", headers=headers)
 
-    headers = {
-        "Cache-Control": "no-cache",
-        "X-Accel-Buffering": "no"
-    }
+@app.route("/admin/profile", methods=["GET"])
+def profile():
+    denied = check_admin(request.headers)
+    if denied:
+        body, status = denied
+        return jsonify(body), status
+    seconds, invalid = parse_seconds(request.args.get("seconds"))
+    if invalid:
+        body, status = invalid
+        return jsonify(body), status
 
-    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers=headers)
+    # The sampler gets its own thread so this one (and whatever it holds) is in the profile
+    folded = sample_on_thread(seconds)
+    if folded is None:
+        return jsonify({"error": "a profile is already running"}), 409
+    return Response(folded, headers={"Content-Type": FOLDED_CONTENT_TYPE})
 
 @app.errorhandler(404)
 def not_found(e):
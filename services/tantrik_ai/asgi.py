@@ -0,0 +1,325 @@
+"""
+🎃 TANTRIK AI SERVICE (ASGI) 🎃
+Asyncio serving path: one process holds many concurrent SSE streams.
+Run with: uvicorn asgi:app --host 0.0.0.0 --port 8080
+The Flask app in app.py remains the sync (WSGI) fallback.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket
+
+from app import SPIRITS
+from agents import AsyncSpiritAgent
+from agents.circuit_breaker import breaker_states
+from agents.key_pool import key_states
+from agents.near_cache import NEAR_DUPLICATES
+from agents.openers import OPENERS
+from agents.spirit_agent import Placeholder
+from agents.response_cache import RESPONSE_CACHE
+from agents.metrics import chat_outcome, count_request, render as render_metrics
+from agents.stream_stats import STREAM_STATS
+from agents.tracing import span, start_trace
+from agents.client_pool import warm_up_async
+from serving import (
+    ADMISSION, ASYNC_JOBS, ASYNC_STREAMS, IDEMPOTENCY_HEADER, NDJSON_MEDIA_TYPE, SESSIONS, SSE_DONE, SSE_HEADERS,
+    STREAM_ID_HEADER, Batch,
+    chat_payload, client_id, coalesce_async, last_event_id, request_deadline, retry_headers, sse_event,
+    validate_batch_request, validate_chat_request
+)
+from serving.profiler import FOLDED_CONTENT_TYPE, check_admin, parse_seconds, sample
+from serving.transcripts import TRANSCRIPTS, result_details
+from serving.websocket import ChatSocket
+
+logger = logging.getLogger("tantrik-ai.asgi")
+
+# Async twins of the Flask agents (same definitions and keys, built lazily like theirs)
+ASYNC_SPIRITS = SPIRITS.with_agent_class(AsyncSpiritAgent)
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    # Open upstream connections before the first visitor arrives (OPENAI_POOL_WARMUP)
+    ASYNC_SPIRITS.open_clients()
+    await warm_up_async()
+    yield
+
+
+async def _read_json(request: Request):
+    try:
+        return await request.json()
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+async def health(request: Request) -> JSONResponse:
+    return JSONResponse({
+        "status": "alive",
+        "service": "Tantrik AI",
+        "spirits": list(ASYNC_SPIRITS.keys()),
+        "registry": ASYNC_SPIRITS.stats(),
+        "cache": RESPONSE_CACHE.stats() if RESPONSE_CACHE else None,
+        "near_cache": NEAR_DUPLICATES.stats() if NEAR_DUPLICATES else None,
+        "openers": OPENERS.stats() if OPENERS else None,
+        "transcripts": TRANSCRIPTS.stats() if TRANSCRIPTS else None,
+        "upstreams": breaker_states(),
+        "keys": key_states(),
+        "streams": STREAM_STATS.snapshot()
+    })
+
+
+async def metrics(request: Request) -> Response:
+    body, content_type = render_metrics()
+    return Response(body, headers={"Content-Type": content_type})
+
+
+async def spirits(request: Request) -> JSONResponse:
+    return JSONResponse({"spirits": ASYNC_SPIRITS.metadata()})
+
+
+async def admit(request: Request, spirit, turn, deadline):
+    """Admission control for one chat turn: (reserved key, None) or (None, rejection)."""
+    if ADMISSION is None:
+        return None, None
+    client = client_id(request.client.host if request.client else None, request.headers, turn)
+    return await ADMISSION.admit_async(client, spirit, turn.messages, deadline)
+
+
+async def chat(request: Request) -> JSONResponse:
+    trace = start_trace("POST /chat")
+    with span("parse"):
+        data = await _read_json(request)
+        invalid = validate_chat_request(data, ASYNC_SPIRITS)
+    if invalid:
+        count_request("chat", "none", "invalid")
+        body, status = invalid
+        return JSONResponse(body, status_code=status)
+
+    with span("session"):
+        turn, invalid = SESSIONS.begin(data)
+    if invalid:
+        count_request("chat", data["spirit_id"], "invalid")
+        body, status = invalid
+        return JSONResponse(body, status_code=status)
+
+    spirit_id = data["spirit_id"]
+    spirit = ASYNC_SPIRITS[spirit_id]
+    deadline = request_deadline(request.headers)
+    reserved, rejected = await admit(request, spirit, turn, deadline)
+    if rejected:
+        count_request("chat", spirit_id, "rejected")
+        body, status = rejected
+        return JSONResponse(body, status_code=status, headers=retry_headers(rejected))
+
+    try:
+        result = await spirit.chat(turn.messages, reserved=reserved, deadline=deadline)
+        if result.get("success"):
+            turn.record(result.get("content"), "chat", **result_details(result))
+        outcome = chat_outcome(result)
+        response = JSONResponse(chat_payload(spirit_id, spirit, result, turn.session_id))
+    except Exception as e:
+        logger.exception("chat endpoint failed")
+        outcome = "error"
+        response = JSONResponse({"error": "internal server error", "message": str(e)}, status_code=500)
+    count_request("chat", spirit_id, outcome)
+    response.headers["Server-Timing"] = trace.server_timing()
+    trace.finish(spirit=spirit_id, outcome=outcome)
+    return response
+
+
+async def chat_batch(request: Request):
+    data = await _read_json(request)
+    invalid = validate_batch_request(data)
+    if invalid:
+        count_request("batch", "none", "invalid")
+        body, status = invalid
+        return JSONResponse(body, status_code=status)
+
+    client = client_id(request.client.host if request.client else None, request.headers)
+    batch = Batch(data["jobs"], ASYNC_SPIRITS, client, request.headers)
+    return StreamingResponse(batch.lines_async(), media_type=NDJSON_MEDIA_TYPE, headers=SSE_HEADERS)
+
+
+async def submit_job(request: Request) -> JSONResponse:
+    if ASYNC_JOBS is None:
+        return JSONResponse({"error": "endpoint not found"}, status_code=404)
+
+    data = await _read_json(request)
+    remote_addr = request.client.host if request.client else None
+    body, status = ASYNC_JOBS.submit(
+        data, ASYNC_SPIRITS, remote_addr, request.headers, request.headers.get(IDEMPOTENCY_HEADER)
+    )
+    headers = None
+    if status == 429:
+        headers = retry_headers((body, status))
+    elif status == 202:
+        headers = {"Location": f"/chat/jobs/{body['job_id']}"}
+    return JSONResponse(body, status_code=status, headers=headers)
+
+
+async def job_status(request: Request) -> JSONResponse:
+    if ASYNC_JOBS is None:
+        return JSONResponse({"error": "endpoint not found"}, status_code=404)
+    body, status = ASYNC_JOBS.status(request.path_params["job_id"])
+    return JSONResponse(body, status_code=status)
+
+
+async def stream(request: Request):
+    trace = start_trace("POST /stream")
+    with span("parse"):
+        data = await _read_json(request)
+        invalid = validate_chat_request(data, ASYNC_SPIRITS)
+    if invalid:
+        count_request("stream", "none", "invalid")
+        body, status = invalid
+        return JSONResponse(body, status_code=status)
+
+    with span("session"):
+        turn, invalid = SESSIONS.begin(data)
+    if invalid:
+        count_request("stream", data["spirit_id"], "invalid")
+        body, status = invalid
+        return JSONResponse(body, status_code=status)
+
+    spirit_id = data["spirit_id"]
+    spirit = ASYNC_SPIRITS[spirit_id]
+    deadline = request_deadline(request.headers)
+    reserved, rejected = await admit(request, spirit, turn, deadline)
+    if rejected:
+        count_request("stream", spirit_id, "rejected")
+        body, status = rejected
+        return JSONResponse(body, status_code=status, headers=retry_headers(rejected))
+
+    chunks = spirit.stream_chat(turn.messages, reserved=reserved, deadline=deadline)
+    reply = []
+
+    async def deltas():
+        async for chunk in chunks:
+            if chunk:
+                reply.append(chunk)
+                yield chunk
+
+    async def generate():
+        outcome = "ok"
+        frames = coalesce_async(deltas())
+        try:
+            async for frame in frames:
+                yield frame
+            # Every key failed: the placeholder the client saw is not the spirit's answer
+            if any(isinstance(chunk, Placeholder) for chunk in reply):
+                outcome = "failed"
+            else:
+                turn.record("".join(reply), "stream", tokens=len(reply))
+            count_request("stream", spirit_id, outcome)
+            yield SSE_DONE
+        except (GeneratorExit, asyncio.CancelledError):
+            # Client gone (a resumable stream is only closed once its grace period ends)
+            outcome = "disconnected"
+            STREAM_STATS.client_disconnected()
+            count_request("stream", spirit_id, outcome)
+            logger.info(f"👋 Client left {spirit.name} stream")
+            raise
+        except Exception:
+            logger.exception("streaming failed")
+            outcome = "error"
+            count_request("stream", spirit_id, outcome)
+            yield sse_event("*The spirit's voice has faded...*")
+            yield SSE_DONE
+        finally:
+            # Leaving `async for` early does not close the frames; they may still be awaiting a delta
+            await frames.aclose()
+            await chunks.aclose()
+            trace.finish(spirit=spirit_id, outcome=outcome)
+
+    headers = dict(SSE_HEADERS)
+    if turn.session_id:
+        headers["X-Session-Id"] = turn.session_id
+    if ASYNC_STREAMS is None:
+        return StreamingResponse(generate(), media_type="text/event-stream", headers=headers)
+
+    # Generate in a background task so a dropped client can resume via GET /stream/{id}
+    stream_id = ASYNC_STREAMS.start(generate)
+    frames, _ = ASYNC_STREAMS.attach(stream_id)
+    headers[STREAM_ID_HEADER] = stream_id
+    return StreamingResponse(frames, media_type="text/event-stream", headers=headers)
+
+
+async def resume_stream(request: Request):
+    if ASYNC_STREAMS is None:
+        return JSONResponse({"error": "endpoint not found"}, status_code=404)
+
+    stream_id = request.path_params["stream_id"]
+    frames, invalid = ASYNC_STREAMS.attach(stream_id, last_event_id(request.headers))
+    if invalid:
+        body, status = invalid
+        return JSONResponse(body, status_code=status)
+
+    headers = dict(SSE_HEADERS)
+    headers[STREAM_ID_HEADER] = stream_id
+    return StreamingResponse(frames, media_type="text/event-stream", headers=headers)
+
+
+async def profile(request: Request) -> Response:
+    denied = check_admin(request.headers)
+    if denied:
+        body, status = denied
+        return JSONResponse(body, status_code=status)
+    seconds, invalid = parse_seconds(request.query_params.get("seconds"))
+    if invalid:
+        body, status = invalid
+        return JSONResponse(body, status_code=status)
+
+    # Sample from a worker thread so the event loop keeps serving (and shows up in the profile)
+    folded = await asyncio.to_thread(sample, seconds)
+    if folded is None:
+        return JSONResponse({"error": "a profile is already running"}, status_code=409)
+    return Response(folded, headers={"Content-Type": FOLDED_CONTENT_TYPE})
+
+
+async def chat_socket(websocket: WebSocket):
+    # Many turns, with several spirits at once, over one long-lived connection
+    await ChatSocket(websocket, ASYNC_SPIRITS).serve()
+
+
+async def not_found(request: Request, exc: Exception) -> JSONResponse:
+    return JSONResponse({"error": "endpoint not found"}, status_code=404)
+
+
+async def internal(request: Request, exc: Exception) -> JSONResponse:
+    return JSONResponse({"error": "internal server error"}, status_code=500)
+
+
+app = Starlette(
+    routes=[
+        Route("/health", health, methods=["GET"]),
+        Route("/spirits", spirits, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+        Route("/chat", chat, methods=["POST"]),
+        Route("/chat/batch", chat_batch, methods=["POST"]),
+        Route("/chat/jobs", submit_job, methods=["POST"]),
+        Route("/chat/jobs/{job_id}", job_status, methods=["GET"]),
+        Route("/stream", stream, methods=["POST"]),
+        Route("/stream/{stream_id}", resume_stream, methods=["GET"]),
+        Route("/admin/profile", profile, methods=["GET"]),
+        WebSocketRoute("/ws", chat_socket),
+    ],
+    middleware=[
+        Middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_methods=["*"],
+            allow_headers=["*"],
+            expose_headers=["X-Session-Id", "X-Stream-Id", "Retry-After"]
+        ),
+    ],
+    exception_handlers={404: not_found, 500: internal},
+    lifespan=lifespan,
+)
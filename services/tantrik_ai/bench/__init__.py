@@ -0,0 +1,3 @@
+"""
+Offline benchmarks for the serving path: a fake OpenAI endpoint and a load driver
+"""
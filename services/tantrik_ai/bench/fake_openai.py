@@ -0,0 +1,218 @@
+"""
+🧪 Local stand-in for the OpenAI chat completions API.
+
+Streams synthetic (or replayed) replies with a configurable time to first token,
+token rate and error injection, so the serving path can be measured offline.
+
+Run with: python -m bench.fake_openai --port 9100 --ttft 0.4 --tps 40
+Point the service at it with OPENAI_BASE_URL=http://127.0.0.1:9100/v1
+"""
+
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+logger = logging.getLogger("tantrik-ai.bench.fake")
+
+WORDS = (
+    "The candles gutter as something cold breathes against your neck and a voice "
+    "older than the house itself whispers your name from the dark corner of the room"
+).split()
+
+
+@dataclass
+class FakeConfig:
+    ttft: float = 0.3            # Seconds before the first token
+    tps: float = 50.0            # Tokens per second after the first
+    tokens: int = 120            # Reply length when not replaying
+    error_rate: float = 0.0      # Share of requests answered with a 500
+    fail_keys: Set[str] = field(default_factory=set)  # API keys that always get a 500
+    record: Optional[str] = None    # JSONL file to append real responses to
+    replay: Optional[str] = None    # JSONL file of recorded responses to serve
+    upstream: str = "https://api.openai.com/v1"
+
+
+def request_key(body: Dict[str, Any]) -> str:
+    """Recording key: the model and messages of a request."""
+    raw = json.dumps({"model": body.get("model"), "messages": body.get("messages")}, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def load_recordings(path: Optional[str]) -> Dict[str, str]:
+    recordings: Dict[str, str] = {}
+    if not path:
+        return recordings
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    recordings[entry["key"]] = entry["content"]
+    except FileNotFoundError:
+        pass
+    logger.info(f"📼 Loaded {len(recordings)} recorded responses")
+    return recordings
+
+
+def _tokens(text: str) -> List[str]:
+    # Split on spaces but keep them, like real deltas (" night", " whispers")
+    words = text.split(" ")
+    return [words[0]] + [f" {word}" for word in words[1:]] if words else []
+
+
+def create_app(config: FakeConfig) -> Starlette:
+    recordings = load_recordings(config.replay)
+    replies = list(recordings.values())
+    stats = {"requests": 0, "streams": 0, "errors": 0, "cancelled": 0, "completed": 0}
+
+    async def reply_text(body: Dict[str, Any], auth: str) -> str:
+        key = request_key(body)
+        if key in recordings:
+            return recordings[key]
+        if config.record:
+            # Fetch the real answer once, then serve it like any other reply
+            async with httpx.AsyncClient(base_url=config.upstream, timeout=60.0) as client:
+                response = await client.post(
+                    "/chat/completions",
+                    headers={"Authorization": auth},
+                    json={**body, "stream": False}
+                )
+                response.raise_for_status()
+                content = response.json()["choices"][0]["message"]["content"]
+            recordings[key] = content
+            replies.append(content)
+            with open(config.record, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "content": content}) + "\n")
+            return content
+        if replies:
+            # Unseen prompt (e.g. the load driver's unique ones): reuse a real reply, chosen by the prompt
+            return replies[int(key, 16) % len(replies)]
+        return " ".join(WORDS[i % len(WORDS)] for i in range(config.tokens))
+
+    def failure() -> JSONResponse:
+        stats["errors"] += 1
+        return JSONResponse(
+            {"error": {"message": "injected failure", "type": "server_error"}},
+            status_code=500
+        )
+
+    async def completions(request: Request):
+        stats["requests"] += 1
+        body = await request.json()
+        auth = request.headers.get("authorization", "")
+        if auth.removeprefix("Bearer ") in config.fail_keys or random.random() < config.error_rate:
+            return failure()
+
+        content = await reply_text(body, auth)
+        tokens = _tokens(content)
+        model = body.get("model", "gpt-4o-mini")
+
+        if not body.get("stream"):
+            await asyncio.sleep(config.ttft + len(tokens) / config.tps)
+            return JSONResponse({
+                "id": "chatcmpl-bench",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 50, "completion_tokens": len(tokens), "total_tokens": 50 + len(tokens)}
+            })
+
+        stats["streams"] += 1
+
+        def frame(delta: Dict[str, str], finish: Optional[str] = None) -> str:
+            chunk = {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]
+            }
+            return f"data: {json.dumps(chunk)}\n\n"
+
+        async def generate():
+            try:
+                await asyncio.sleep(config.ttft)
+                for i, token in enumerate(tokens):
+                    if i:
+                        await asyncio.sleep(1 / config.tps)
+                    yield frame({"content": token})
+                yield frame({}, "stop")
+                yield "data: [DONE]\n\n"
+                stats["completed"] += 1
+            except asyncio.CancelledError:
+                stats["cancelled"] += 1
+                raise
+
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    async def models(request: Request):
+        return JSONResponse({"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model"}]})
+
+    async def get_stats(request: Request):
+        return JSONResponse(stats)
+
+    async def faults(request: Request):
+        """Change error injection at runtime (used by the load driver's fallback phase)."""
+        body = await request.json()
+        if "fail_keys" in body:
+            config.fail_keys = set(body["fail_keys"])
+        if "error_rate" in body:
+            config.error_rate = float(body["error_rate"])
+        return JSONResponse({"fail_keys": sorted(config.fail_keys), "error_rate": config.error_rate})
+
+    return Starlette(routes=[
+        Route("/v1/chat/completions", completions, methods=["POST"]),
+        Route("/v1/models", models, methods=["GET"]),
+        Route("/stats", get_stats, methods=["GET"]),
+        Route("/faults", faults, methods=["POST"]),
+    ])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenAI endpoint for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--ttft", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--tps", type=float, default=50.0, help="tokens per second")
+    parser.add_argument("--tokens", type=int, default=120, help="synthetic reply length")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failed with 500")
+    parser.add_argument("--fail-key", action="append", default=[], help="API key that always fails")
+    parser.add_argument("--record", help="append real upstream responses to this JSONL file")
+    parser.add_argument("--replay", help="serve responses recorded in this JSONL file")
+    parser.add_argument("--upstream", default="https://api.openai.com/v1", help="real API used by --record")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    config = FakeConfig(
+        ttft=args.ttft,
+        tps=args.tps,
+        tokens=args.tokens,
+        error_rate=args.error_rate,
+        fail_keys=set(args.fail_key),
+        record=args.record,
+        replay=args.replay or args.record,
+        upstream=args.upstream
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
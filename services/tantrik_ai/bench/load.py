@@ -0,0 +1,426 @@
+"""
+📈 Load driver for /chat, /stream and the /ws channel.
+
+Starts the fake OpenAI endpoint and the service (ASGI or Flask) as subprocesses,
+drives them at increasing concurrency and writes the results as JSON:
+throughput, latency and TTFT percentiles, memory per concurrent stream and
+per WebSocket connection, and how requests fare when the primary key fails.
+
+Run with: python -m bench.load --server asgi --concurrency 1,8,32,64
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import asyncio
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+import websockets
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRIMARY_KEY = "sk-bench-primary"
+FALLBACK_KEY = "sk-bench-fallback"
+SPIRITS = ["dracula", "reaper", "bloody_mary"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentiles(values: List[float]) -> Optional[Dict[str, float]]:
+    """p50/p95/p99 and max in milliseconds."""
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 1)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1] * 1000, 1)}
+
+
+def rss_kb(pid: int) -> Optional[int]:
+    """Resident memory of a process and its children (Linux /proc only)."""
+    total = 0
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1])
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(child) for child in f.read().split()]
+    except (OSError, ValueError):
+        return None
+    for child in children:
+        total += rss_kb(child) or 0
+    return total
+
+
+class MemorySampler:
+    """Samples the server's RSS in the background and keeps the peak."""
+
+    def __init__(self, pid: Optional[int], interval: float = 0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            self.peak = max(self.peak, rss_kb(self.pid) or 0)
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self) -> "MemorySampler":
+        if self.pid:
+            self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._task:
+            self._task.cancel()
+
+
+def message(i: int) -> Dict[str, Any]:
+    # Unique prompts so the response cache and request coalescing stay out of the numbers
+    return {
+        "spirit_id": SPIRITS[i % len(SPIRITS)],
+        "messages": [{"role": "user", "content": f"bench {uuid.uuid4().hex} who walks these halls?"}]
+    }
+
+
+async def one_chat(client: httpx.AsyncClient, i: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        response = await client.post("/chat", json=message(i))
+        body = response.json()
+        ok = response.status_code == 200 and body.get("success", False)
+        return {"ok": ok, "latency": time.perf_counter() - started, "api_used": body.get("api_used")}
+    except Exception:
+        return {"ok": False, "latency": time.perf_counter() - started, "api_used": None}
+
+
+async def one_stream(client: httpx.AsyncClient, i: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    ttft = None
+    chars = 0
+    done = False
+    try:
+        async with client.stream("POST", "/stream", json=message(i)) as response:
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                if line == "data: [DONE]":
+                    done = True
+                    break
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                chars += len(line) - 6
+        ok = response.status_code == 200 and done
+    except Exception:
+        ok = False
+    return {"ok": ok, "latency": time.perf_counter() - started, "ttft": ttft, "chars": chars}
+
+
+async def ws_turns(
+    url: str, first: int, turns: int, opened: asyncio.Event, go: asyncio.Event
+) -> List[Dict[str, Any]]:
+    """One connection: open, wait for the others, then run `turns` turns back to back."""
+    results = []
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            opened.set()
+            await go.wait()
+            for i in range(first, first + turns):
+                started = time.perf_counter()
+                ttft = None
+                chars = 0
+                await ws.send(json.dumps({"type": "chat", "id": str(i), **message(i)}))
+                while True:
+                    frame = json.loads(await ws.recv())
+                    if frame["type"] == "delta":
+                        ttft = ttft if ttft is not None else time.perf_counter() - started
+                        chars += len(frame["text"])
+                    elif frame["type"] != "start":
+                        break
+                results.append({
+                    "ok": frame["type"] == "done", "latency": time.perf_counter() - started, "ttft": ttft, "chars": chars
+                })
+    except Exception:
+        opened.set()
+        results.append({"ok": False, "latency": 0.0, "ttft": None, "chars": 0})
+    return results
+
+
+async def run_ws(base_url: str, connections: int, turns: int, server_pid: Optional[int]) -> Dict[str, Any]:
+    """
+    Open `connections` WebSockets, measure the server's memory with them idle,
+    then run `turns` turns on each at once.
+    """
+    url = base_url.replace("http", "ws", 1) + "/ws"
+    baseline = rss_kb(server_pid) if server_pid else None
+    go = asyncio.Event()
+    opened = [asyncio.Event() for _ in range(connections)]
+    tasks = [
+        asyncio.ensure_future(ws_turns(url, c * turns, turns, opened[c], go)) for c in range(connections)
+    ]
+    await asyncio.gather(*(event.wait() for event in opened))
+    await asyncio.sleep(0.5)
+    idle = rss_kb(server_pid) if server_pid else None
+
+    with MemorySampler(server_pid) as sampler:
+        started = time.perf_counter()
+        go.set()
+        finished = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    results = [r for connection in finished for r in connection]
+    ok = [r for r in results if r["ok"]]
+    level = {
+        "endpoint": "ws",
+        "concurrency": connections,
+        "requests": connections * turns,
+        "errors": connections * turns - len(ok),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": percentiles([r["latency"] for r in ok]),
+        "ttft_ms": percentiles([r["ttft"] for r in ok if r["ttft"] is not None]),
+        "chars_per_s": round(sum(r["chars"] for r in ok) / elapsed, 1) if elapsed else 0.0
+    }
+    if baseline and idle:
+        level["rss_kb_per_idle_connection"] = round(max(0, idle - baseline) / connections, 1)
+    if baseline and sampler.peak:
+        level["rss_mb_peak"] = round(sampler.peak / 1024, 1)
+        level["rss_kb_per_inflight"] = round(max(0, sampler.peak - baseline) / connections, 1)
+    return level
+
+
+async def run_level(
+    base_url: str, endpoint: str, concurrency: int, requests: int, server_pid: Optional[int]
+) -> Dict[str, Any]:
+    """Run `requests` calls with at most `concurrency` in flight."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    call = one_stream if endpoint == "stream" else one_chat
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        async def bounded(i: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await call(client, i)
+
+        baseline = rss_kb(server_pid) if server_pid else None
+        with MemorySampler(server_pid) as sampler:
+            started = time.perf_counter()
+            results = await asyncio.gather(*(bounded(i) for i in range(requests)))
+            elapsed = time.perf_counter() - started
+
+    ok = [r for r in results if r["ok"]]
+    level = {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": requests - len(ok),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": percentiles([r["latency"] for r in ok])
+    }
+    if endpoint == "stream":
+        level["ttft_ms"] = percentiles([r["ttft"] for r in ok if r["ttft"] is not None])
+        level["chars_per_s"] = round(sum(r["chars"] for r in ok) / elapsed, 1) if elapsed else 0.0
+    if baseline and sampler.peak:
+        level["rss_mb_peak"] = round(sampler.peak / 1024, 1)
+        level["rss_kb_per_inflight"] = round(max(0, sampler.peak - baseline) / concurrency, 1)
+    return level
+
+
+async def run_fallback(base_url: str, fake_url: str, requests: int, concurrency: int) -> Dict[str, Any]:
+    """Fail the primary key on the fake endpoint and see how /chat copes."""
+    async with httpx.AsyncClient() as admin:
+        await admin.post(f"{fake_url}/faults", json={"fail_keys": [PRIMARY_KEY]})
+    try:
+        limits = httpx.Limits(max_connections=concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+            async def bounded(i: int) -> Dict[str, Any]:
+                async with semaphore:
+                    return await one_chat(client, i)
+
+            results = await asyncio.gather(*(bounded(i) for i in range(requests)))
+    finally:
+        async with httpx.AsyncClient() as admin:
+            await admin.post(f"{fake_url}/faults", json={"fail_keys": []})
+
+    api_used: Dict[str, int] = {}
+    for result in results:
+        name = result["api_used"] or "none"
+        api_used[name] = api_used.get(name, 0) + 1
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "success_rate": round(sum(r["ok"] for r in results) / requests, 3),
+        "api_used": api_used,
+        "latency_ms": percentiles([r["latency"] for r in results])
+    }
+
+
+def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def server_command(server: str, port: int, threads: int) -> List[str]:
+    if server == "flask":
+        return [
+            sys.executable, "-m", "gunicorn", "app:app",
+            "--bind", f"127.0.0.1:{port}", "--workers", "1",
+            "--worker-class", "gthread", "--threads", str(threads), "--timeout", "120"
+        ]
+    return [sys.executable, "-m", "uvicorn", "asgi:app", "--port", str(port), "--log-level", "warning"]
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SERVICE_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the Tantrik serving path against a fake OpenAI")
+    parser.add_argument("--server", choices=["asgi", "flask"], default="asgi")
+    parser.add_argument("--target", help="benchmark an already running service instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="pid of --target, for memory numbers")
+    parser.add_argument("--concurrency", default="1,8,32,64", help="comma-separated levels")
+    parser.add_argument("--requests", type=int, default=0, help="requests per level (default 4x concurrency, min 20)")
+    parser.add_argument("--endpoints", help="comma-separated (default chat,stream plus ws on asgi)")
+    parser.add_argument("--ws-turns", type=int, default=3, help="turns per WebSocket connection")
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tps", type=float, default=50.0)
+    parser.add_argument("--tokens", type=int, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--replay", help="recorded responses for the fake endpoint")
+    parser.add_argument("--skip-fallback", action="store_true")
+    parser.add_argument("--env", action="append", default=[], help="extra KEY=VALUE for the service")
+    parser.add_argument("--output", help="results file (default bench/results/bench-<time>.json)")
+    parser.add_argument("--verbose", action="store_true", help="show fake endpoint and service logs")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",") if level]
+    # Flask has no WebSocket support; /ws is served by the ASGI app only
+    default_endpoints = "chat,stream" if args.server == "flask" else "chat,stream,ws"
+    endpoints = [endpoint for endpoint in (args.endpoints or default_endpoints).split(",") if endpoint]
+    processes: List[subprocess.Popen] = []
+    logs = None if args.verbose else subprocess.DEVNULL
+
+    fake_port = free_port()
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    fake_cmd = [
+        sys.executable, "-m", "bench.fake_openai", "--port", str(fake_port),
+        "--ttft", str(args.ttft), "--tps", str(args.tps), "--tokens", str(args.tokens),
+        "--error-rate", str(args.error_rate)
+    ]
+    if args.replay:
+        fake_cmd += ["--replay", args.replay]
+
+    try:
+        processes.append(subprocess.Popen(fake_cmd, cwd=SERVICE_DIR, stdout=logs, stderr=logs))
+        wait_ready(f"{fake_url}/stats")
+
+        if args.target:
+            base_url = args.target
+            server_pid = args.server_pid
+        else:
+            port = free_port()
+            env = dict(os.environ)
+            env.update({
+                "OPENAI_API_KEY_PRIMARY": PRIMARY_KEY,
+                "OPENAI_API_KEY_FALLBACK": FALLBACK_KEY,
+                "OPENAI_BASE_URL": f"{fake_url}/v1",
+                # Every virtual user shares one IP; measure the server, not the rate limiter
+                "ADMISSION_CONTROL": "0",
+                "PYTHONUNBUFFERED": "1"
+            })
+            env.update(item.split("=", 1) for item in args.env)
+            server = subprocess.Popen(
+                server_command(args.server, port, max(levels)), cwd=SERVICE_DIR, env=env, stdout=logs, stderr=logs
+            )
+            processes.append(server)
+            base_url = f"http://127.0.0.1:{port}"
+            server_pid = server.pid
+            wait_ready(f"{base_url}/health")
+
+        results: Dict[str, Any] = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "git_revision": git_revision(),
+                "python": platform.python_version(),
+                "server": "external" if args.target else args.server,
+                "fake": {"ttft": args.ttft, "tps": args.tps, "tokens": args.tokens, "error_rate": args.error_rate},
+                "env": args.env
+            },
+            "levels": []
+        }
+
+        for concurrency in levels:
+            for endpoint in endpoints:
+                if endpoint == "ws":
+                    level = asyncio.run(run_ws(base_url, concurrency, args.ws_turns, server_pid))
+                else:
+                    requests = args.requests or max(20, concurrency * 4)
+                    level = asyncio.run(run_level(base_url, endpoint, concurrency, requests, server_pid))
+                results["levels"].append(level)
+                print(
+                    f"{endpoint:>6} c={concurrency:<4} {level['throughput_rps']:>8.2f} rps  "
+                    f"errors={level['errors']}  latency={level['latency_ms']}"
+                    + (f"  ttft={level['ttft_ms']}" if endpoint != "chat" else "")
+                    + (f"  kb/conn idle={level['rss_kb_per_idle_connection']}"
+                       if "rss_kb_per_idle_connection" in level else "")
+                )
+
+        if not args.skip_fallback:
+            concurrency = min(levels[-1], 16)
+            results["fallback"] = asyncio.run(
+                run_fallback(base_url, fake_url, max(20, concurrency * 4), concurrency)
+            )
+            print(f"fallback {results['fallback']}")
+
+        results["fake_stats"] = httpx.get(f"{fake_url}/stats").json()
+
+        output = args.output or os.path.join(
+            SERVICE_DIR, "bench", "results", f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Results written to {output}")
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+if __name__ == "__main__":
+    main()
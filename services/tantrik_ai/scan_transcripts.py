@@ -0,0 +1,32 @@
+"""
+📜 Dump the transcript log as NDJSON for moderation and analytics.
+
+Reads the segment files through a memory map; safe to run while the service writes.
+
+Run with: python scan_transcripts.py --dir /tmp/tantrik_transcripts --spirit dracula --since 1760000000
+"""
+
+import sys
+import json
+import argparse
+
+from serving.transcripts import TRANSCRIPT_DIR, scan
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scan the transcript log")
+    parser.add_argument("--dir", default=TRANSCRIPT_DIR)
+    parser.add_argument("--spirit", help="Only this spirit's turns")
+    parser.add_argument("--since", type=float, default=0.0, help="Only turns started at or after this Unix time")
+    args = parser.parse_args()
+
+    for record in scan(args.dir):
+        if args.spirit and record.get("spirit") != args.spirit:
+            continue
+        if record.get("ts", 0.0) < args.since:
+            continue
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
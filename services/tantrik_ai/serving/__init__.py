@@ -0,0 +1,40 @@
+"""
+Tantrik AI serving helpers shared by the Flask and ASGI apps
+"""
+
+from .admission import ADMISSION, AdmissionControl, client_id, retry_headers
+from .batch import NDJSON_MEDIA_TYPE, Batch, validate_batch_request
+from .jobs import ASYNC_JOBS, IDEMPOTENCY_HEADER, JOBS
+from .payloads import chat_payload
+from .resumable import ASYNC_STREAMS, STREAM_ID_HEADER, STREAMS, last_event_id
+from .sessions import SESSIONS, SessionStore, Turn
+from .sse import SSE_DONE, SSE_HEADERS, coalesce, coalesce_async, sse_event
+from .validation import request_deadline, validate_chat_request
+
+__all__ = [
+    "ADMISSION",
+    "AdmissionControl",
+    "client_id",
+    "retry_headers",
+    "NDJSON_MEDIA_TYPE",
+    "Batch",
+    "validate_batch_request",
+    "ASYNC_JOBS",
+    "IDEMPOTENCY_HEADER",
+    "JOBS",
+    "chat_payload",
+    "ASYNC_STREAMS",
+    "STREAM_ID_HEADER",
+    "STREAMS",
+    "last_event_id",
+    "SESSIONS",
+    "SessionStore",
+    "Turn",
+    "SSE_DONE",
+    "SSE_HEADERS",
+    "coalesce",
+    "coalesce_async",
+    "sse_event",
+    "request_deadline",
+    "validate_chat_request",
+]
@@ -0,0 +1,289 @@
+"""
+Admission control: token-bucket limits per client and per upstream API key,
+with a bounded wait queue in front of them
+"""
+
+import os
+import math
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from agents.circuit_breaker import CLOSED
+from agents.context_window import message_tokens
+from agents.deadline import Deadline
+from agents.metrics import ADMISSION_REJECTIONS, QUEUE_DEPTH, child
+from agents.tracing import span
+
+from .sessions import Turn
+
+logger = logging.getLogger("tantrik-ai.admission")
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "1") == "1"
+# Per client (confirmed session, else IP); 0 disables a limit. A turn is estimated at ~1-2k tokens,
+# so these stop scripted abuse rather than shape a person chatting
+CLIENT_REQUESTS_PER_MINUTE = float(os.getenv("CLIENT_REQUESTS_PER_MINUTE", 120))
+CLIENT_TOKENS_PER_MINUTE = float(os.getenv("CLIENT_TOKENS_PER_MINUTE", 250000))
+# Per OpenAI key, matching the account's RPM/TPM tier; off until configured
+KEY_REQUESTS_PER_MINUTE = float(os.getenv("KEY_REQUESTS_PER_MINUTE", 0))
+KEY_TOKENS_PER_MINUTE = float(os.getenv("KEY_TOKENS_PER_MINUTE", 0))
+# Requests allowed to wait for budget at once; beyond this they get 429 immediately
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", 100))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", 10))
+ADMISSION_MAX_CLIENTS = int(os.getenv("ADMISSION_MAX_CLIENTS", 10000))
+# Take the client IP from X-Forwarded-For (only behind a proxy that sets it)
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "0") == "1"
+
+Rejection = Tuple[Dict[str, Any], int]
+
+
+class TokenBucket:
+    """
+    Refills at `per_minute` / 60 per second up to one minute's worth.
+
+    Admitted requests may drive the level negative (they reserve future
+    budget), so later arrivals queue behind them in arrival order.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def wait(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (0 if it is now)."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        # A request larger than the bucket would never fit; let it drain a full bucket instead
+        needed = min(amount, self.capacity)
+        return max(0.0, (needed - self.level) / self.rate)
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+
+def _bucket(per_minute: float) -> Optional[TokenBucket]:
+    return TokenBucket(per_minute) if per_minute > 0 else None
+
+
+def estimate_tokens(spirit, messages: List[Dict[str, str]]) -> int:
+    """Upper bound on the tokens a request can use: windowed prompt plus max_tokens."""
+    prompt = message_tokens({"content": spirit.system_prompt}) + sum(message_tokens(m) for m in messages)
+    return min(prompt, spirit.context_window.budget) + spirit.max_tokens
+
+
+def client_id(remote_addr: Optional[str], headers: Mapping[str, str], turn: Optional[Turn] = None) -> str:
+    """
+    Rate-limit identity: the session the turn continues, else the caller's IP.
+
+    Only a session the store has already confirmed counts, so a client cannot
+    mint a fresh bucket per request by sending made-up session ids.
+    """
+    if turn is not None and turn.resumed:
+        return f"session:{turn.session_id}"
+    if TRUST_FORWARDED_FOR and headers.get("X-Forwarded-For"):
+        return f"ip:{headers['X-Forwarded-For'].split(',')[0].strip()}"
+    return f"ip:{remote_addr or 'unknown'}"
+
+
+def retry_headers(rejection: Rejection) -> Dict[str, str]:
+    body, _ = rejection
+    return {"Retry-After": str(body["retry_after"])}
+
+
+class AdmissionControl:
+    """Decides, per request, whether to run now, wait for budget, or be turned away."""
+
+    def __init__(
+        self,
+        client_rpm: float = CLIENT_REQUESTS_PER_MINUTE,
+        client_tpm: float = CLIENT_TOKENS_PER_MINUTE,
+        key_rpm: float = KEY_REQUESTS_PER_MINUTE,
+        key_tpm: float = KEY_TOKENS_PER_MINUTE,
+        queue_size: int = ADMISSION_QUEUE_SIZE,
+        max_wait: float = ADMISSION_MAX_WAIT_SECONDS,
+        max_clients: int = ADMISSION_MAX_CLIENTS
+    ):
+        self.client_limits = (client_rpm, client_tpm)
+        self.key_limits = (key_rpm, key_tpm)
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.max_clients = max_clients
+        self.waiting = 0
+        self._clients: "OrderedDict[str, Tuple[Optional[TokenBucket], Optional[TokenBucket]]]" = OrderedDict()
+        self._keys: Dict[str, Tuple[Optional[TokenBucket], Optional[TokenBucket]]] = {}
+        self._lock = threading.Lock()
+        self._depth = child(QUEUE_DEPTH, "admission")
+
+    @classmethod
+    def from_env(cls) -> Optional["AdmissionControl"]:
+        if not ADMISSION_CONTROL:
+            return None
+        if not TRUST_FORWARDED_FOR and (CLIENT_REQUESTS_PER_MINUTE > 0 or CLIENT_TOKENS_PER_MINUTE > 0):
+            logger.warning(
+                "⚠️ Per-client limits key new visitors by peer IP (TRUST_FORWARDED_FOR=0); "
+                "behind a proxy or load balancer they all share one client budget"
+            )
+        return cls()
+
+    def _client_buckets(self, client: str):
+        buckets = self._clients.get(client)
+        if buckets is None:
+            buckets = self._clients[client] = tuple(_bucket(limit) for limit in self.client_limits)
+            if len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        else:
+            self._clients.move_to_end(client)
+        return buckets
+
+    def _key_buckets(self, api_key: str):
+        buckets = self._keys.get(api_key)
+        if buckets is None:
+            buckets = self._keys[api_key] = tuple(_bucket(limit) for limit in self.key_limits)
+        return buckets
+
+    @staticmethod
+    def _wait(buckets, tokens: int, now: float, requests: int = 1) -> float:
+        request_bucket, token_bucket = buckets
+        return max(
+            request_bucket.wait(requests, now) if request_bucket else 0.0,
+            token_bucket.wait(tokens, now) if token_bucket else 0.0
+        )
+
+    @staticmethod
+    def _take(buckets, tokens: int, requests: int = 1) -> None:
+        request_bucket, token_bucket = buckets
+        if request_bucket:
+            request_bucket.take(requests)
+        if token_bucket:
+            token_bucket.take(tokens)
+
+    def _reserve(
+        self, client: Optional[str], upstreams: List[Any], tokens: int, deadline: Deadline, requests: int = 1
+    ) -> Tuple[float, Optional[str], Optional[Rejection]]:
+        """
+        Returns (seconds to wait, the key whose budget was reserved, rejection).
+
+        A None client was already charged (see admit_batch); no upstreams reserves no key.
+        """
+        limit_keys = bool(upstreams) and any(limit > 0 for limit in self.key_limits)
+
+        with self._lock:
+            now = time.monotonic()
+            client_buckets = self._client_buckets(client) if client is not None else (None, None)
+            client_wait = self._wait(client_buckets, tokens, now, requests)
+            key_wait, reserved = 0.0, None
+            if limit_keys:
+                key_waits = [self._wait(self._key_buckets(upstream.api_key), tokens, now) for upstream in upstreams]
+                # Spill over to the pool's other keys when one has budget sooner; on ties prefer a closed circuit
+                chosen = min(
+                    range(len(upstreams)),
+                    key=lambda i: (key_waits[i], upstreams[i].breaker.state != CLOSED)
+                )
+                key_wait, reserved = key_waits[chosen], upstreams[chosen].name
+            wait = max(client_wait, key_wait)
+
+            if wait > 0:
+                reason = None
+                if self.waiting >= self.queue_size:
+                    reason = "queue_full"
+                elif wait > min(self.max_wait, deadline.remaining()):
+                    reason = "client" if client_wait >= key_wait else "upstream"
+                if reason:
+                    child(ADMISSION_REJECTIONS, reason).inc()
+                    retry_after = max(1, math.ceil(wait))
+                    logger.warning(f"🚦 Request rejected ({reason}), retry in {retry_after}s")
+                    body = {"error": "too many requests", "reason": reason, "retry_after": retry_after}
+                    return 0.0, None, (body, 429)
+                self.waiting += 1
+                self._depth.inc()
+
+            self._take(client_buckets, tokens, requests)
+            if reserved is not None:
+                self._take(self._key_buckets(upstreams[chosen].api_key), tokens)
+            return wait, reserved, None
+
+    def _done_waiting(self) -> None:
+        with self._lock:
+            self.waiting -= 1
+            self._depth.dec()
+
+    def _queue(self, wait: float) -> None:
+        if wait > 0:
+            try:
+                with span("admission.wait"):
+                    time.sleep(wait)
+            finally:
+                self._done_waiting()
+
+    async def _queue_async(self, wait: float) -> None:
+        if wait > 0:
+            try:
+                with span("admission.wait"):
+                    await asyncio.sleep(wait)
+            finally:
+                self._done_waiting()
+
+    def admit(
+        self, client: Optional[str], spirit, messages: List[Dict[str, str]], deadline: Deadline
+    ) -> Tuple[Optional[str], Optional[Rejection]]:
+        """
+        Reserve budget for one request, sleeping in the queue if it must wait.
+
+        Pass client=None for a job of a batch already charged with admit_batch.
+
+        Returns:
+            (reserved, None) once admitted, where `reserved` names the key whose
+            budget was taken (None when keys are not limited) and must be passed
+            to the agent so the call goes where it was charged; or (None, (error_body, 429))
+        """
+        tokens = estimate_tokens(spirit, messages)
+        wait, reserved, rejected = self._reserve(client, spirit.keys.upstreams, tokens, deadline)
+        if rejected:
+            return None, rejected
+        self._queue(wait)
+        return reserved, None
+
+    async def admit_async(
+        self, client: Optional[str], spirit, messages: List[Dict[str, str]], deadline: Deadline
+    ) -> Tuple[Optional[str], Optional[Rejection]]:
+        """Async `admit`."""
+        tokens = estimate_tokens(spirit, messages)
+        wait, reserved, rejected = self._reserve(client, spirit.keys.upstreams, tokens, deadline)
+        if rejected:
+            return None, rejected
+        await self._queue_async(wait)
+        return reserved, None
+
+    def admit_batch(
+        self, client: str, jobs: List[Tuple[Any, List[Dict[str, str]]]], deadline: Deadline
+    ) -> Optional[Rejection]:
+        """
+        Charge a whole /chat/batch to its client at once: one request and the
+        estimated tokens per (spirit, messages) job. The jobs are then admitted
+        with client=None, which only reserves key budget.
+        """
+        tokens = sum(estimate_tokens(spirit, messages) for spirit, messages in jobs)
+        wait, _, rejected = self._reserve(client, [], tokens, deadline, requests=len(jobs))
+        if rejected:
+            return rejected
+        self._queue(wait)
+        return None
+
+    async def admit_batch_async(
+        self, client: str, jobs: List[Tuple[Any, List[Dict[str, str]]]], deadline: Deadline
+    ) -> Optional[Rejection]:
+        """Async `admit_batch`."""
+        tokens = sum(estimate_tokens(spirit, messages) for spirit, messages in jobs)
+        wait, _, rejected = self._reserve(client, [], tokens, deadline, requests=len(jobs))
+        if rejected:
+            return rejected
+        await self._queue_async(wait)
+        return None
+
+
+ADMISSION = AdmissionControl.from_env()
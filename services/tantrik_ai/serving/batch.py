@@ -0,0 +1,204 @@
+"""
+/chat/batch: many stateless chat jobs fanned out concurrently, results streamed as NDJSON
+"""
+
+import os
+import json
+import time
+from functools import partial
+from typing import Any, AsyncIterator, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from agents.batch import BATCH_CONCURRENCY
+from agents.metrics import chat_outcome, count_request
+from agents.tracing import start_trace
+
+from .admission import ADMISSION
+from .payloads import chat_payload
+from .transcripts import log_turn, result_details
+from .validation import request_deadline, validate_chat_request
+
+BATCH_MAX_JOBS = int(os.getenv("BATCH_MAX_JOBS", 100))
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def validate_batch_request(data: Any) -> Optional[Tuple[Dict[str, Any], int]]:
+    """
+    Validate the envelope of a /chat/batch body: {"jobs": [{"spirit_id", "messages", "id"?}, ...]}.
+
+    Individual jobs are checked later so one bad job fails alone.
+    """
+    if not data or not isinstance(data, dict):
+        return {"error": "No JSON body provided"}, 400
+    jobs = data.get("jobs")
+    if not jobs or not isinstance(jobs, list):
+        return {"error": "jobs must be a non-empty list"}, 400
+    if len(jobs) > BATCH_MAX_JOBS:
+        return {"error": f"at most {BATCH_MAX_JOBS} jobs per batch"}, 400
+    return None
+
+
+def _job_error(job: Any, spirits: Mapping[str, object]) -> Optional[str]:
+    if not isinstance(job, dict):
+        return "job must be an object"
+    if job.get("messages") is None:
+        # Batches are stateless; sessions belong to interactive turns
+        return "messages is required"
+    invalid = validate_chat_request(job, spirits)
+    return invalid[0]["error"] if invalid else None
+
+
+def _line(body: Dict[str, Any]) -> str:
+    return json.dumps(body) + "\n"
+
+
+def _result_line(index: int, job: Dict[str, Any], spirit: Any, result: Dict[str, Any]) -> str:
+    body = {"index": index, "id": job.get("id"), **chat_payload(job["spirit_id"], spirit, result)}
+    body.pop("session_id")
+    for field in ("error", "retry_after"):
+        if field in result:
+            body[field] = result[field]
+    count_request("batch", job["spirit_id"], chat_outcome(result))
+    return _line(body)
+
+
+def _log(spirit: Any, messages: List[Dict[str, str]], result: Dict[str, Any], started: float) -> None:
+    if result.get("success"):
+        log_turn("batch", spirit.spirit_id, messages, result.get("content"), started, **result_details(result))
+
+
+def _rejected(rejection: Tuple[Dict[str, Any], int]) -> Dict[str, Any]:
+    body, _ = rejection
+    return {"success": False, "error": body["error"], "retry_after": body["retry_after"]}
+
+
+class Batch:
+    """
+    One /chat/batch request: invalid jobs are answered at once, the rest fanned out.
+
+    Jobs run spirit by spirit through each spirit's chat_batch, so the concurrency
+    cap holds for the whole batch.
+    """
+
+    def __init__(self, jobs: List[Any], spirits: Mapping[str, Any], client: str, headers: Mapping[str, str]):
+        self.trace = start_trace("POST /chat/batch")
+        self.spirits = spirits
+        self.client = client
+        # Each job's deadline starts when it does, not while it queues behind the cap
+        self.headers = dict(headers)
+        self.runnable: List[Tuple[int, Dict[str, Any]]] = []
+        self.invalid: List[Tuple[int, Any, str]] = []
+        for index, job in enumerate(jobs):
+            error = _job_error(job, spirits)
+            if error:
+                self.invalid.append((index, job, error))
+            else:
+                self.runnable.append((index, job))
+        self.succeeded = 0
+
+    def _invalid_lines(self) -> Iterator[str]:
+        for index, job, error in self.invalid:
+            count_request("batch", "none", "invalid")
+            job_id = job.get("id") if isinstance(job, dict) else None
+            yield _line({"index": index, "id": job_id, "success": False, "error": error})
+
+    def _finished(self, position: int, result: Dict[str, Any]) -> str:
+        index, job = self.runnable[position]
+        self.succeeded += bool(result.get("success"))
+        return _result_line(index, job, self.spirits[job["spirit_id"]], result)
+
+    def _summary(self) -> str:
+        total = len(self.runnable) + len(self.invalid)
+        return _line({"done": True, "jobs": total, "succeeded": self.succeeded, "failed": total - self.succeeded})
+
+    def _groups(self) -> List[Tuple[Any, List[int]]]:
+        """Each spirit with the positions of its runnable jobs."""
+        positions: Dict[str, List[int]] = {}
+        for position, (_, job) in enumerate(self.runnable):
+            positions.setdefault(job["spirit_id"], []).append(position)
+        return [(self.spirits[spirit_id], group) for spirit_id, group in positions.items()]
+
+    def _conversations(self, positions: List[int]) -> List[List[Dict[str, str]]]:
+        return [self.runnable[position][1]["messages"] for position in positions]
+
+    def _run(self, spirit: Any, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        deadline = request_deadline(self.headers)
+        reserved = None
+        if ADMISSION is not None:
+            # The client was charged for the whole batch up front; this only reserves key budget
+            reserved, rejected = ADMISSION.admit(None, spirit, messages, deadline)
+            if rejected:
+                return _rejected(rejected)
+        started = time.time()
+        result = spirit.chat(messages, reserved=reserved, deadline=deadline)
+        _log(spirit, messages, result, started)
+        return result
+
+    async def _run_async(self, spirit: Any, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        deadline = request_deadline(self.headers)
+        reserved = None
+        if ADMISSION is not None:
+            reserved, rejected = await ADMISSION.admit_async(None, spirit, messages, deadline)
+            if rejected:
+                return _rejected(rejected)
+        started = time.time()
+        result = await spirit.chat(messages, reserved=reserved, deadline=deadline)
+        _log(spirit, messages, result, started)
+        return result
+
+    def _admission_jobs(self) -> List[Tuple[Any, List[Dict[str, str]]]]:
+        return [(self.spirits[job["spirit_id"]], job["messages"]) for _, job in self.runnable]
+
+    def _rejected_lines(self, rejection: Tuple[Dict[str, Any], int]) -> Iterator[str]:
+        for position in range(len(self.runnable)):
+            yield self._finished(position, _rejected(rejection))
+        self.trace.finish(jobs=len(self.runnable), succeeded=0)
+
+    def lines(self, concurrency: int = BATCH_CONCURRENCY) -> Iterator[str]:
+        """NDJSON: one line per job as it finishes, then a summary line."""
+        yield from self._invalid_lines()
+        if ADMISSION is not None and self.runnable:
+            # One admission for the batch, weighted by its jobs, so a batch is not cut short by its own size
+            rejected = ADMISSION.admit_batch(self.client, self._admission_jobs(), request_deadline(self.headers))
+            if rejected:
+                yield from self._rejected_lines(rejected)
+                yield self._summary()
+                return
+        try:
+            for spirit, positions in self._groups():
+                results = spirit.chat_batch(self._conversations(positions), concurrency, partial(self._run, spirit))
+                try:
+                    for index, result in results:
+                        yield self._finished(positions[index], result)
+                finally:
+                    results.close()
+        finally:
+            self.trace.finish(jobs=len(self.runnable), succeeded=self.succeeded)
+        yield self._summary()
+
+    async def lines_async(self, concurrency: int = BATCH_CONCURRENCY) -> AsyncIterator[str]:
+        """Async `lines`."""
+        for line in self._invalid_lines():
+            yield line
+        if ADMISSION is not None and self.runnable:
+            rejected = await ADMISSION.admit_batch_async(
+                self.client, self._admission_jobs(), request_deadline(self.headers)
+            )
+            if rejected:
+                for line in self._rejected_lines(rejected):
+                    yield line
+                yield self._summary()
+                return
+        try:
+            for spirit, positions in self._groups():
+                results = spirit.chat_batch(
+                    self._conversations(positions), concurrency, partial(self._run_async, spirit)
+                )
+                try:
+                    async for index, result in results:
+                        yield self._finished(positions[index], result)
+                finally:
+                    await results.aclose()
+        finally:
+            self.trace.finish(jobs=len(self.runnable), succeeded=self.succeeded)
+        yield self._summary()
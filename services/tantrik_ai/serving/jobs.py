@@ -0,0 +1,337 @@
+"""
+Async job mode for /chat: submit returns a job id at once, a worker pool runs the
+completion, and the client polls for the result or receives it by webhook
+"""
+
+import os
+import abc
+import hmac
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Mapping, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from agents.deadline import Deadline
+from agents.metrics import QUEUE_DEPTH, chat_outcome, child, count_request
+from agents.response_cache import MemoryBackend, SqliteBackend
+from agents.tracing import current_trace, start_trace
+
+from .admission import ADMISSION, client_id
+from .payloads import chat_payload
+from .sessions import SESSIONS, Turn
+from .transcripts import result_details
+from .validation import validate_chat_request
+
+logger = logging.getLogger("tantrik-ai.jobs")
+
+CHAT_JOBS = os.getenv("CHAT_JOBS", "1") == "1"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+# Jobs accepted but not yet started; beyond this, submissions get 429
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", 200))
+# A job is not bound by the HTTP timeout, only by this
+JOB_DEADLINE_SECONDS = float(os.getenv("JOB_DEADLINE_SECONDS", 300))
+# How long finished jobs (and idempotency keys) can be read back
+JOB_TTL = float(os.getenv("JOB_TTL", 3600))
+# Comma-separated hosts webhooks may be sent to; webhooks are refused until this is set
+JOB_WEBHOOK_HOSTS = {host.strip() for host in os.getenv("JOB_WEBHOOK_HOSTS", "").split(",") if host.strip()}
+JOB_WEBHOOK_SECRET = os.getenv("JOB_WEBHOOK_SECRET", "")
+WEBHOOK_ATTEMPTS = 3
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+SIGNATURE_HEADER = "X-Tantrik-Signature"
+
+NOT_FOUND = ({"error": "job not found or expired"}, 404)
+QUEUE_FULL = ({"error": "too many queued jobs", "retry_after": 5}, 429)
+KEY_REUSED = ({"error": f"{IDEMPOTENCY_HEADER} was already used for a different request"}, 422)
+
+# Fields kept in the store but not shown to clients
+_PRIVATE = ("fingerprint", "webhook_url")
+
+
+class JobStore:
+    """Job records and idempotency keys in a local expiring store."""
+
+    def __init__(self, backend, ttl: float = JOB_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "JobStore":
+        """Build the store from JOB_* env vars; sqlite lets any worker on the host answer a poll."""
+        max_entries = int(os.getenv("JOB_MAX_ENTRIES", 10000))
+        if os.getenv("JOB_BACKEND", "memory").lower() == "sqlite":
+            path = os.getenv("JOB_PATH", "/tmp/tantrik_jobs.sqlite3")
+            backend = SqliteBackend(path, max_entries, table="jobs")
+        else:
+            backend = MemoryBackend(max_entries)
+        return cls(backend, JOB_TTL)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.backend.get(f"job:{job_id}")
+
+    def update(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self.get(job_id)
+            if job is None:
+                return None
+            # Copy: the memory backend hands out the stored dict itself
+            job = dict(job, **fields, updated_at=time.time())
+            self.backend.set(f"job:{job_id}", job, self.ttl)
+            return job
+
+    def claim(self, idempotency_key: Optional[str], fingerprint: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Look up an idempotency key before creating a job.
+
+        Returns:
+            (existing job or None, whether the key was reused for a different request)
+        """
+        if not idempotency_key:
+            return None, False
+        known = self.backend.get(f"idem:{idempotency_key}")
+        if known is None:
+            return None, False
+        job = self.get(known["job_id"])
+        if job is None:
+            return None, False
+        return job, job["fingerprint"] != fingerprint
+
+    def create(self, job: Dict[str, Any], idempotency_key: Optional[str]) -> None:
+        self.backend.set(f"job:{job['job_id']}", job, self.ttl)
+        if idempotency_key:
+            self.backend.set(f"idem:{idempotency_key}", {"job_id": job["job_id"]}, self.ttl)
+
+
+def public(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in job.items() if key not in _PRIVATE}
+
+
+def fingerprint(data: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def webhook_error(url: Any) -> Optional[str]:
+    if url is None:
+        return None
+    if not isinstance(url, str):
+        return "webhook_url must be a string"
+    parsed = urlparse(url)
+    if parsed.scheme != "https" or not parsed.hostname:
+        return "webhook_url must be an https URL"
+    # Without an allowlist any caller could make the server POST to internal addresses
+    if not JOB_WEBHOOK_HOSTS:
+        return "webhooks are disabled until JOB_WEBHOOK_HOSTS is set"
+    if parsed.hostname not in JOB_WEBHOOK_HOSTS:
+        return "webhook_url host is not allowed"
+    return None
+
+
+def deliver_webhook(url: str, job: Dict[str, Any]) -> bool:
+    """POST the finished job, retrying with backoff; signed with HMAC-SHA256 when a secret is set."""
+    body = json.dumps(public(job)).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if JOB_WEBHOOK_SECRET:
+        digest = hmac.new(JOB_WEBHOOK_SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
+        headers[SIGNATURE_HEADER] = f"sha256={digest}"
+    for attempt in range(WEBHOOK_ATTEMPTS):
+        try:
+            response = httpx.post(url, content=body, headers=headers, timeout=10.0)
+            if response.status_code < 300:
+                return True
+            logger.warning(f"⚠️ Webhook for job {job['job_id']} answered {response.status_code}")
+        except httpx.HTTPError as e:
+            logger.warning(f"⚠️ Webhook for job {job['job_id']} failed: {str(e)}")
+        time.sleep(2 ** attempt)
+    return False
+
+
+class _Jobs(abc.ABC):
+    """Submission, bookkeeping and completion shared by the thread and asyncio runners."""
+
+    def __init__(self, store: JobStore, workers: int = JOB_WORKERS, max_pending: int = JOB_QUEUE_SIZE):
+        self.store = store
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._depth = child(QUEUE_DEPTH, "jobs")
+
+    def submit(
+        self,
+        data: Any,
+        spirits: Mapping[str, Any],
+        remote_addr: Optional[str],
+        headers: Mapping[str, str],
+        idempotency_key: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        Validate and enqueue a /chat body (plus optional "webhook_url").
+
+        Idempotency keys are scoped to the session named in the body, else the
+        caller's IP; admission only counts the session once the store confirms it.
+
+        Returns:
+            (body, status): 202 with the new job, 200 with the job an
+            idempotency key already names, or an error
+        """
+        invalid = validate_chat_request(data, spirits)
+        if invalid:
+            return invalid
+        error = webhook_error(data.get("webhook_url"))
+        if error:
+            return {"error": error}, 400
+
+        scope = f"session:{data['session_id']}" if data.get("session_id") else client_id(remote_addr, headers)
+        scoped_key = f"{scope}:{idempotency_key}" if idempotency_key else None
+        request_fingerprint = fingerprint(data)
+        with self._lock:
+            existing, reused = self.store.claim(scoped_key, request_fingerprint)
+            if reused:
+                return KEY_REUSED
+            if existing:
+                return public(existing), 200
+            if self.pending >= self.max_pending:
+                return QUEUE_FULL
+
+            turn, invalid = SESSIONS.begin(data)
+            if invalid:
+                return invalid
+            now = time.time()
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "status": "queued",
+                "spirit_id": data["spirit_id"],
+                "session_id": turn.session_id,
+                "created_at": now,
+                "updated_at": now,
+                "fingerprint": request_fingerprint,
+                "webhook_url": data.get("webhook_url")
+            }
+            self.store.create(job, scoped_key)
+            self.pending += 1
+            self._depth.inc()
+
+        logger.info(f"📨 Job {job['job_id']} queued for {data['spirit_id']}")
+        accepted = public(job)
+        self._start(job, spirits[data["spirit_id"]], turn, client_id(remote_addr, headers, turn))
+        return accepted, 202
+
+    def status(self, job_id: str) -> Tuple[Dict[str, Any], int]:
+        job = self.store.get(job_id)
+        return (public(job), 200) if job else NOT_FOUND
+
+    @abc.abstractmethod
+    def _start(self, job: Dict[str, Any], spirit: Any, turn: Turn, client: str) -> None:
+        """Run an accepted job in the background."""
+
+    def _started(self, job_id: str) -> Deadline:
+        start_trace("chat job")
+        with self._lock:
+            self.pending -= 1
+            self._depth.dec()
+        self.store.update(job_id, status="running")
+        return Deadline.after(JOB_DEADLINE_SECONDS)
+
+    def _finished(self, job: Dict[str, Any], spirit: Any, turn: Turn, result: Dict[str, Any]) -> Dict[str, Any]:
+        if result.get("success"):
+            turn.record(result.get("content"), "job", **result_details(result))
+        count_request("job", job["spirit_id"], chat_outcome(result))
+        fields = {
+            "status": "succeeded" if result.get("success") else "failed",
+            "result": chat_payload(job["spirit_id"], spirit, result, turn.session_id)
+        }
+        if "error" in result:
+            fields["error"] = result["error"]
+        logger.info(f"📬 Job {job['job_id']} {fields['status']}")
+        current_trace().finish(spirit=job["spirit_id"], outcome=fields["status"])
+        return self.store.update(job["job_id"], **fields) or dict(job, **fields)
+
+    def _deliver(self, job: Dict[str, Any], finished: Dict[str, Any]) -> None:
+        delivered = deliver_webhook(job["webhook_url"], finished)
+        self.store.update(job["job_id"], webhook="delivered" if delivered else "failed")
+
+
+def _failed(error: Exception) -> Dict[str, Any]:
+    logger.error(f"❌ Job failed: {str(error)}")
+    return {"success": False, "error": str(error)}
+
+
+def _rejected(rejection: Tuple[Dict[str, Any], int]) -> Dict[str, Any]:
+    body, _ = rejection
+    return {"success": False, "error": body["error"], "retry_after": body["retry_after"]}
+
+
+class JobRunner(_Jobs):
+    """Thread-pool runner for the Flask app."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        # Webhook retries sleep between attempts; they must not hold a job worker
+        self._webhooks = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="webhook")
+
+    def _start(self, job: Dict[str, Any], spirit: Any, turn: Turn, client: str) -> None:
+        self._executor.submit(contextvars.copy_context().run, self._run, job, spirit, turn, client)
+
+    def _run(self, job: Dict[str, Any], spirit: Any, turn: Turn, client: str) -> None:
+        deadline = self._started(job["job_id"])
+        try:
+            reserved, rejected = (None, None)
+            if ADMISSION is not None:
+                reserved, rejected = ADMISSION.admit(client, spirit, turn.messages, deadline)
+            result = _rejected(rejected) if rejected else spirit.chat(
+                turn.messages, reserved=reserved, deadline=deadline
+            )
+        except Exception as e:
+            result = _failed(e)
+        finished = self._finished(job, spirit, turn, result)
+        if job.get("webhook_url"):
+            self._webhooks.submit(contextvars.copy_context().run, self._deliver, job, finished)
+
+
+class AsyncJobRunner(_Jobs):
+    """Asyncio runner for the ASGI app; at most `workers` jobs await the upstream at once."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _start(self, job: Dict[str, Any], spirit: Any, turn: Turn, client: str) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        # Keep a reference so the task is not collected mid-run
+        task = asyncio.ensure_future(self._run(job, spirit, turn, client))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: Dict[str, Any], spirit: Any, turn: Turn, client: str) -> None:
+        async with self._semaphore:
+            deadline = self._started(job["job_id"])
+            try:
+                reserved, rejected = (None, None)
+                if ADMISSION is not None:
+                    reserved, rejected = await ADMISSION.admit_async(client, spirit, turn.messages, deadline)
+                result = _rejected(rejected) if rejected else await spirit.chat(
+                    turn.messages, reserved=reserved, deadline=deadline
+                )
+            except Exception as e:
+                result = _failed(e)
+            finished = self._finished(job, spirit, turn, result)
+        if job.get("webhook_url"):
+            # Outside the semaphore, so a slow receiver does not hold a job slot
+            await asyncio.to_thread(self._deliver, job, finished)
+
+
+JOBS = JobRunner(JobStore.from_env()) if CHAT_JOBS else None
+ASYNC_JOBS = AsyncJobRunner(JobStore.from_env()) if CHAT_JOBS else None
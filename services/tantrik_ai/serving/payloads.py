@@ -0,0 +1,24 @@
+"""
+Response bodies shared by the Flask (WSGI) and ASGI entry points
+"""
+
+from typing import Any, Dict, Optional
+
+
+def chat_payload(
+    spirit_id: str, spirit: Any, result: Dict[str, Any], session_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """JSON body for a completed /chat turn."""
+    return {
+        "spirit_id": spirit_id,
+        "session_id": session_id,
+        "spirit_name": spirit.name,
+        "response": result.get("content"),
+        "model": result.get("model"),
+        "route": result.get("route"),
+        "tokens_used": result.get("tokens_used"),
+        "api_used": result.get("api_used"),
+        "cached": result.get("cached", False),
+        "context": result.get("context"),
+        "success": result.get("success", False)
+    }
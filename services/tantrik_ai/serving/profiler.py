@@ -0,0 +1,109 @@
+"""
+On-demand sampling profiler for live workers, gated behind an admin token.
+
+Profiles are returned in folded-stack format ("frame;frame;frame count" per line),
+which flamegraph.pl, speedscope and inferno all read directly.
+"""
+
+import os
+import sys
+import hmac
+import time
+import logging
+import threading
+from collections import Counter
+from typing import Mapping, Optional, Tuple
+
+logger = logging.getLogger("tantrik-ai.profiler")
+
+# Unset disables the admin endpoints entirely (they answer 404)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", 60))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 10))
+
+FOLDED_CONTENT_TYPE = "text/plain; charset=utf-8"
+
+# Only one profile per worker at a time; sampling is cheap but not free
+_running = threading.Lock()
+
+
+def check_admin(headers: Mapping[str, str]) -> Optional[Tuple[dict, int]]:
+    """None if the request carries the admin token, else an (error_body, status) tuple."""
+    if not ADMIN_TOKEN:
+        return {"error": "endpoint not found"}, 404
+    supplied = headers.get("X-Admin-Token", "")
+    auth = headers.get("Authorization", "")
+    if auth.startswith("Bearer "):
+        supplied = auth[len("Bearer "):]
+    if not hmac.compare_digest(supplied.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        return {"error": "unauthorized"}, 401
+    return None
+
+
+def parse_seconds(raw: Optional[str]) -> Tuple[Optional[float], Optional[Tuple[dict, int]]]:
+    """Profile duration from the query string, capped at PROFILE_MAX_SECONDS."""
+    try:
+        seconds = float(raw) if raw else 10.0
+    except ValueError:
+        return None, ({"error": "seconds must be a number"}, 400)
+    if seconds <= 0:
+        return None, ({"error": "seconds must be positive"}, 400)
+    return min(seconds, PROFILE_MAX_SECONDS), None
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    # Keyed by function, not current line, so one function is one flame-graph box
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample(seconds: float, interval_ms: float = PROFILE_INTERVAL_MS) -> Optional[str]:
+    """
+    Sample every thread's stack for `seconds` and return folded stacks,
+    or None if a profile is already running in this worker.
+
+    Blocks the calling thread and leaves it out of the profile; the ASGI app
+    runs it via asyncio.to_thread, the Flask app via sample_on_thread.
+    """
+    if not _running.acquire(blocking=False):
+        return None
+    try:
+        own = threading.get_ident()
+        stacks: Counter = Counter()
+        interval = interval_ms / 1000
+        samples = 0
+        logger.info(f"🔬 Profiling for {seconds:g}s")
+
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(_label(frame))
+                    frame = frame.f_back
+                frames.append(names.get(ident) or f"thread-{ident}")
+                stacks[";".join(reversed(frames))] += 1
+            samples += 1
+            time.sleep(interval)
+
+        logger.info(f"🔬 Profile done: {samples} samples, {len(stacks)} distinct stacks")
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    finally:
+        _running.release()
+
+
+def sample_on_thread(seconds: float) -> Optional[str]:
+    """
+    `sample` on a thread of its own, so the calling request thread is profiled too.
+
+    The caller still waits for the whole profile; under gunicorn's sync workers that
+    worker serves nothing else meanwhile.
+    """
+    folded = []
+    sampler = threading.Thread(target=lambda: folded.append(sample(seconds)), name="profiler", daemon=True)
+    sampler.start()
+    sampler.join()
+    return folded[0] if folded else None
@@ -0,0 +1,276 @@
+"""
+Resumable SSE streams: frames are kept in a per-stream ring buffer so a client that
+reconnects with Last-Event-ID gets the missed frames and the live tail, not a new generation
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+import contextvars
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Tuple
+
+from agents.stream_stats import STREAM_STATS
+
+logger = logging.getLogger("tantrik-ai.resume")
+
+# Off by default: with it on, a dropped client no longer cancels the upstream call for RESUME_GRACE_SECONDS
+RESUMABLE_STREAMS = os.getenv("RESUMABLE_STREAMS", "0") == "1"
+# Frames kept per stream; a client further behind than this must start over
+RESUME_BUFFER_FRAMES = int(os.getenv("RESUME_BUFFER_FRAMES", 256))
+# How long generation continues with no client attached
+RESUME_GRACE_SECONDS = float(os.getenv("RESUME_GRACE_SECONDS", 15.0))
+# How long a finished stream stays replayable
+RESUME_TTL_SECONDS = float(os.getenv("RESUME_TTL_SECONDS", 60.0))
+RESUME_MAX_STREAMS = int(os.getenv("RESUME_MAX_STREAMS", 1000))
+
+STREAM_ID_HEADER = "X-Stream-Id"
+LAST_EVENT_ID_HEADER = "Last-Event-ID"
+
+# Error bodies for resume requests that cannot be served
+NOT_FOUND = ({"error": "stream not found or expired"}, 404)
+GONE = ({"error": "missed frames are no longer buffered; start a new stream"}, 410)
+# Ends a follow that fell behind the ring buffer (no [DONE], so the client knows the reply is incomplete)
+LAGGED_FRAME = "event: error\ndata: " + json.dumps(GONE[0]) + "\n\n"
+
+
+def last_event_id(headers) -> int:
+    """Parse the Last-Event-ID header (0 = replay from the start)."""
+    try:
+        return max(0, int(headers.get(LAST_EVENT_ID_HEADER, 0)))
+    except (TypeError, ValueError):
+        return 0
+
+
+class _Replay:
+    """Frames of one stream. Frame n (1-based) is the frame with event id n; only the closing frames carry none."""
+
+    def __init__(self, max_frames: int, cond: Any):
+        self.frames = deque(maxlen=max_frames)
+        self.cond = cond
+        self.produced = 0
+        self.done = False
+        self.finished_at = 0.0
+        self.subscribers = 0
+        self.detached_at: Optional[float] = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+
+    def first_available(self) -> int:
+        return self.produced - len(self.frames) + 1
+
+    def lagged(self, sent: int) -> bool:
+        """Have frames after position `sent` already been evicted from the buffer?"""
+        return sent < self.produced - len(self.frames)
+
+    def since(self, sent: int) -> Tuple[list, int]:
+        """Frames after position `sent`, and the new position."""
+        base = self.produced - len(self.frames)
+        return list(self.frames)[max(0, sent - base):], self.produced
+
+    def abandoned(self, grace: float) -> bool:
+        return self.subscribers == 0 and time.monotonic() - self.detached_at > grace
+
+    def detach(self) -> None:
+        self.subscribers -= 1
+        if self.subscribers == 0:
+            self.detached_at = time.monotonic()
+
+
+class _Registry:
+    """Bookkeeping shared by the thread and asyncio registries."""
+
+    def __init__(
+        self,
+        max_frames: int = RESUME_BUFFER_FRAMES,
+        grace: float = RESUME_GRACE_SECONDS,
+        ttl: float = RESUME_TTL_SECONDS,
+        max_streams: int = RESUME_MAX_STREAMS
+    ):
+        self.max_frames = max_frames
+        self.grace = grace
+        self.ttl = ttl
+        self.max_streams = max_streams
+        self._streams: "OrderedDict[str, _Replay]" = OrderedDict()
+
+    def _new(self, replay: _Replay) -> str:
+        self._sweep()
+        stream_id = uuid.uuid4().hex
+        self._streams[stream_id] = replay
+        return stream_id
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        expired = [
+            stream_id for stream_id, replay in self._streams.items()
+            if replay.done and now - replay.finished_at > self.ttl
+        ]
+        for stream_id in expired:
+            del self._streams[stream_id]
+        # Over the cap, drop the oldest finished streams first
+        for stream_id in [s for s, r in self._streams.items() if r.done]:
+            if len(self._streams) < self.max_streams:
+                break
+            del self._streams[stream_id]
+
+    def _find(self, stream_id: str, after: int):
+        """(replay, None) if the stream can resume after event `after`, else (None, error)."""
+        replay = self._streams.get(stream_id)
+        if replay is None:
+            return None, NOT_FOUND
+        if after + 1 < replay.first_available():
+            return None, GONE
+        return replay, None
+
+
+class StreamRegistry(_Registry):
+    """Thread-based registry for the Flask app; each stream is produced by its own thread."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+
+    def start(self, frames: Callable[[], Iterator[str]]) -> str:
+        """Run `frames()` in the background and return the new stream's id."""
+        replay = _Replay(self.max_frames, threading.Condition())
+        with self._lock:
+            stream_id = self._new(replay)
+        # Copy the request's context so the producer keeps its trace
+        threading.Thread(
+            target=contextvars.copy_context().run, args=(self._produce, replay, frames), daemon=True
+        ).start()
+        return stream_id
+
+    def attach(self, stream_id: str, after: int = 0):
+        """
+        Subscribe to a stream from just after event id `after`.
+
+        Returns:
+            (frame iterator, None) or (None, (error_body, status))
+        """
+        with self._lock:
+            replay, error = self._find(stream_id, after)
+            if error:
+                return None, error
+            replay.subscribers += 1
+        if after:
+            logger.info(f"🔁 Resuming stream after event {after}")
+        return self._follow(replay, after), None
+
+    def _follow(self, replay: _Replay, sent: int) -> Iterator[str]:
+        try:
+            while True:
+                with replay.cond:
+                    while sent >= replay.produced and not replay.done:
+                        replay.cond.wait()
+                    lagged = replay.lagged(sent)
+                    frames, sent = replay.since(sent)
+                    done = replay.done
+                if lagged:
+                    STREAM_STATS.reader_lagged()
+                    logger.warning("🐢 Client fell behind the stream buffer; ending its stream")
+                    yield LAGGED_FRAME
+                    return
+                yield from frames
+                if done:
+                    return
+        except GeneratorExit:
+            # Generation goes on for the grace period; an abandoned stream is counted when it ends
+            logger.info(f"📴 Client detached, stream kept for {self.grace:g}s")
+            raise
+        finally:
+            with self._lock:
+                replay.detach()
+
+    def _produce(self, replay: _Replay, frames: Callable[[], Iterator[str]]) -> None:
+        source = frames()
+        try:
+            for frame in source:
+                with replay.cond:
+                    replay.frames.append(frame)
+                    replay.produced += 1
+                    replay.cond.notify_all()
+                with self._lock:
+                    abandoned = replay.abandoned(self.grace)
+                if abandoned:
+                    STREAM_STATS.stream_abandoned()
+                    logger.info("✂️ No client came back; ending stream")
+                    break
+        except Exception:
+            logger.exception("resumable stream failed")
+        finally:
+            source.close()
+            with replay.cond:
+                replay.done = True
+                replay.finished_at = time.monotonic()
+                replay.cond.notify_all()
+
+
+class AsyncStreamRegistry(_Registry):
+    """Asyncio registry for the ASGI app; each stream is produced by its own task."""
+
+    def start(self, frames: Callable[[], AsyncIterator[str]]) -> str:
+        replay = _Replay(self.max_frames, asyncio.Condition())
+        stream_id = self._new(replay)
+        replay.task = asyncio.ensure_future(self._produce(replay, frames))
+        return stream_id
+
+    def attach(self, stream_id: str, after: int = 0):
+        replay, error = self._find(stream_id, after)
+        if error:
+            return None, error
+        replay.subscribers += 1
+        if after:
+            logger.info(f"🔁 Resuming stream after event {after}")
+        return self._follow(replay, after), None
+
+    async def _follow(self, replay: _Replay, sent: int) -> AsyncIterator[str]:
+        try:
+            while True:
+                async with replay.cond:
+                    await replay.cond.wait_for(lambda: sent < replay.produced or replay.done)
+                    lagged = replay.lagged(sent)
+                    frames, sent = replay.since(sent)
+                    done = replay.done
+                if lagged:
+                    STREAM_STATS.reader_lagged()
+                    logger.warning("🐢 Client fell behind the stream buffer; ending its stream")
+                    yield LAGGED_FRAME
+                    return
+                for frame in frames:
+                    yield frame
+                if done:
+                    return
+        except (GeneratorExit, asyncio.CancelledError):
+            logger.info(f"📴 Client detached, stream kept for {self.grace:g}s")
+            raise
+        finally:
+            replay.detach()
+
+    async def _produce(self, replay: _Replay, frames: Callable[[], AsyncIterator[str]]) -> None:
+        source = frames()
+        try:
+            async for frame in source:
+                async with replay.cond:
+                    replay.frames.append(frame)
+                    replay.produced += 1
+                    replay.cond.notify_all()
+                if replay.abandoned(self.grace):
+                    STREAM_STATS.stream_abandoned()
+                    logger.info("✂️ No client came back; ending stream")
+                    break
+        except Exception:
+            logger.exception("resumable stream failed")
+        finally:
+            await source.aclose()
+            replay.done = True
+            replay.finished_at = time.monotonic()
+            async with replay.cond:
+                replay.cond.notify_all()
+
+
+STREAMS = StreamRegistry() if RESUMABLE_STREAMS else None
+ASYNC_STREAMS = AsyncStreamRegistry() if RESUMABLE_STREAMS else None
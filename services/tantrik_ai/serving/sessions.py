@@ -0,0 +1,129 @@
+"""
+Server-side session store: clients send only the new message each turn
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.response_cache import MemoryBackend, SqliteBackend
+
+from .transcripts import log_turn
+
+logger = logging.getLogger("tantrik-ai.sessions")
+
+# History is stored compactly as [role initial, content] pairs
+_ROLE_CODES = {"user": "u", "assistant": "a"}
+_ROLE_NAMES = {code: role for role, code in _ROLE_CODES.items()}
+
+
+class Turn:
+    """One conversational turn: the history to send upstream and where to record the reply."""
+
+    def __init__(self, messages: List[Dict[str, str]], store: "SessionStore" = None,
+                 session_id: Optional[str] = None, spirit_id: Optional[str] = None, resumed: bool = False):
+        self.messages = messages
+        self.store = store
+        self.session_id = session_id
+        self.spirit_id = spirit_id
+        # True when session_id named a session the store already held (not one the client made up)
+        self.resumed = resumed
+        self.started = time.time()
+
+    def record(self, reply: str, endpoint: str, **details: Any) -> None:
+        """
+        Append the user message and the spirit's reply to the session (no-op when stateless),
+        and queue the turn for the transcript log.
+        """
+        if not reply:
+            return
+        if self.session_id:
+            self.store.append(self.session_id, self.spirit_id, [
+                self.messages[-1],
+                {"role": "assistant", "content": reply}
+            ])
+        log_turn(endpoint, self.spirit_id, self.messages, reply, self.started, self.session_id, **details)
+
+
+class SessionStore:
+    """Bounded history store with LRU eviction and idle expiry."""
+
+    def __init__(self, backend, ttl: float = 1800.0, max_messages: int = 40):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        """Build the store from SESSION_* env vars."""
+        max_entries = int(os.getenv("SESSION_MAX_ENTRIES", 10000))
+        if os.getenv("SESSION_BACKEND", "memory").lower() == "sqlite":
+            path = os.getenv("SESSION_PATH", "/tmp/tantrik_sessions.sqlite3")
+            backend = SqliteBackend(path, max_entries, table="sessions")
+        else:
+            backend = MemoryBackend(max_entries)
+        return cls(
+            backend,
+            ttl=float(os.getenv("SESSION_TTL", 1800)),
+            max_messages=int(os.getenv("SESSION_MAX_MESSAGES", 40))
+        )
+
+    def history(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return {"spirit_id", "messages"} for a live session, or None."""
+        session = self.backend.get(session_id)
+        if session is None:
+            return None
+        return {
+            "spirit_id": session["spirit_id"],
+            "messages": [{"role": _ROLE_NAMES[role], "content": content} for role, content in session["messages"]]
+        }
+
+    def create(self, spirit_id: str) -> str:
+        session_id = uuid.uuid4().hex
+        self.backend.set(session_id, {"spirit_id": spirit_id, "messages": []}, self.ttl)
+        logger.info(f"🕯️ New session for {spirit_id}")
+        return session_id
+
+    def append(self, session_id: str, spirit_id: str, messages: List[Dict[str, str]]) -> None:
+        with self._lock:
+            session = self.backend.get(session_id) or {"spirit_id": spirit_id, "messages": []}
+            history = session["messages"] + [[_ROLE_CODES[m["role"]], m["content"]] for m in messages]
+            session["messages"] = history[-self.max_messages:]
+            self.backend.set(session_id, session, self.ttl)
+
+    def begin(self, data: Dict[str, Any]) -> Tuple[Optional[Turn], Optional[Tuple[Dict[str, Any], int]]]:
+        """
+        Resolve the history for a validated /chat or /stream body.
+
+        Bodies carrying "messages" stay stateless. Bodies carrying "message"
+        continue the session named by "session_id", or start a new one.
+
+        Returns:
+            (turn, None) on success, or (None, (error_body, status))
+        """
+        if data.get("messages"):
+            return Turn(data["messages"], spirit_id=data["spirit_id"]), None
+
+        spirit_id = data["spirit_id"]
+        session_id = data.get("session_id")
+        resumed = bool(session_id)
+        if resumed:
+            session = self.history(session_id)
+            if session is None:
+                return None, ({"error": "session expired or unknown", "session_id": session_id}, 404)
+            if session["spirit_id"] != spirit_id:
+                return None, ({"error": "session belongs to another spirit"}, 400)
+            history = session["messages"]
+        else:
+            session_id = self.create(spirit_id)
+            history = []
+
+        messages = history + [{"role": "user", "content": data["message"]}]
+        return Turn(messages, self, session_id, spirit_id, resumed), None
+
+
+SESSIONS = SessionStore.from_env()
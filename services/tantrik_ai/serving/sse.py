@@ -0,0 +1,221 @@
+"""
+Server-Sent Events encoding with adaptive coalescing of token deltas
+"""
+
+import os
+import time
+import queue
+import asyncio
+import threading
+import contextvars
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from agents.tracing import Span, span
+
+# Deltas arriving within this window share one frame (0 = one frame per delta)
+SSE_COALESCE_MS = float(os.getenv("SSE_COALESCE_MS", 30))
+# Flush early once a frame holds this many characters
+SSE_COALESCE_CHARS = int(os.getenv("SSE_COALESCE_CHARS", 256))
+
+SSE_DONE = "data: [DONE]\n\n"
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
+
+
+def sse_event(data: str, event_id: Optional[int] = None) -> str:
+    """Encode one SSE event; every line of `data` gets its own `data:` field."""
+    lines = data.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return head + "".join(f"data: {line}\n" for line in lines) + "\n"
+
+
+class FrameBuffer:
+    """Accumulates deltas into numbered SSE frames."""
+
+    def __init__(self, window_ms: float = SSE_COALESCE_MS, max_chars: int = SSE_COALESCE_CHARS):
+        self.window = window_ms / 1000
+        self.max_chars = max_chars
+        self.parts = []
+        self.size = 0
+        self.opened_at = 0.0
+        self.event_id = 0
+
+    def add(self, chunk: str) -> None:
+        if not self.parts:
+            self.opened_at = time.monotonic()
+        self.parts.append(chunk)
+        self.size += len(chunk)
+
+    def due(self) -> bool:
+        return bool(self.parts) and (
+            self.size >= self.max_chars or time.monotonic() - self.opened_at >= self.window
+        )
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the open frame is due (None while nothing is buffered)."""
+        if not self.parts:
+            return None
+        return max(0.0, self.window - (time.monotonic() - self.opened_at))
+
+    def take(self) -> str:
+        """Text of the next frame; advances the event id."""
+        self.event_id += 1
+        text = "".join(self.parts)
+        self.parts = []
+        self.size = 0
+        return text
+
+    def flush(self) -> str:
+        text = self.take()
+        return sse_event(text, self.event_id)
+
+
+def _close(chunks: Any) -> None:
+    close = getattr(chunks, "close", None)
+    if close is not None:
+        close()
+
+
+# Queue item the pump thread puts after the source's last delta
+_END = (None, None)
+
+
+def _pump(chunks: Iterator[str], deltas: "queue.Queue", stop: threading.Event) -> None:
+    """Move deltas onto a queue so the reader can wait for them with a timeout; errors are passed along."""
+    try:
+        for chunk in chunks:
+            if stop.is_set():
+                break
+            if chunk:
+                deltas.put((chunk, None))
+    except Exception as e:
+        deltas.put((None, e))
+    finally:
+        # Only this thread may close the source, since it may be mid-iteration
+        _close(chunks)
+        deltas.put(_END)
+
+
+def paced(chunks: Iterator[str], buffer: FrameBuffer) -> Iterator[Optional[str]]:
+    """
+    The deltas of `chunks`, with a None whenever `buffer`'s open frame falls due
+    before the next delta arrives. `chunks` is closed when this generator is.
+
+    The source is read on a helper thread; after an early close it stops (and is
+    closed) as its next delta arrives.
+    """
+    if buffer.window <= 0:
+        # Every delta is flushed as it arrives, so there is never a frame to time out
+        try:
+            yield from chunks
+        finally:
+            _close(chunks)
+        return
+
+    deltas: "queue.Queue" = queue.Queue()
+    stop = threading.Event()
+    threading.Thread(
+        target=contextvars.copy_context().run, args=(_pump, chunks, deltas, stop), daemon=True
+    ).start()
+    try:
+        while True:
+            try:
+                chunk, error = deltas.get(timeout=buffer.remaining())
+            except queue.Empty:
+                yield None
+                continue
+            if error is not None:
+                raise error
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        stop.set()
+
+
+async def paced_async(chunks: AsyncIterator[str], buffer: FrameBuffer) -> AsyncIterator[Optional[str]]:
+    """Async `paced`: waits on the source's pending __anext__ with a timeout instead of using a thread."""
+    try:
+        if buffer.window <= 0:
+            async for chunk in chunks:
+                yield chunk
+            return
+
+        pending = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(chunks.__anext__())
+                done, _ = await asyncio.wait({pending}, timeout=buffer.remaining())
+                if not done:
+                    yield None
+                    continue
+                task, pending = pending, None
+                try:
+                    chunk = task.result()
+                except StopAsyncIteration:
+                    return
+                yield chunk
+        finally:
+            if pending is not None:
+                pending.cancel()
+                # The source can only be closed once its cancelled __anext__ has unwound
+                await asyncio.gather(pending, return_exceptions=True)
+    finally:
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def _tag_writes(sending: Optional[Span], buffer: FrameBuffer, writing: float) -> None:
+    # Time suspended at a yield is time the server spent writing the frame out
+    if sending is not None:
+        sending.tags.update(frames=buffer.event_id, write_ms=round(writing * 1000, 1))
+
+
+def coalesce(chunks: Iterator[str], window_ms: float = SSE_COALESCE_MS) -> Iterator[str]:
+    """
+    Frame a delta stream. The first delta goes out at once (time to first token);
+    later ones are batched until the window or size limit is reached, even if no
+    further delta arrives, and the remainder is flushed when the stream ends.
+    """
+    buffer = FrameBuffer(window_ms)
+    deltas = paced(chunks, buffer)
+    writing = 0.0
+    with span("sse") as sending:
+        try:
+            for chunk in deltas:
+                if chunk:
+                    buffer.add(chunk)
+                if buffer.parts and (buffer.event_id == 0 or buffer.due()):
+                    paused = time.monotonic()
+                    yield buffer.flush()
+                    writing += time.monotonic() - paused
+            if buffer.parts:
+                yield buffer.flush()
+        finally:
+            deltas.close()
+            _tag_writes(sending, buffer, writing)
+
+
+async def coalesce_async(chunks: AsyncIterator[str], window_ms: float = SSE_COALESCE_MS) -> AsyncIterator[str]:
+    """Async `coalesce`."""
+    buffer = FrameBuffer(window_ms)
+    deltas = paced_async(chunks, buffer)
+    writing = 0.0
+    with span("sse") as sending:
+        try:
+            async for chunk in deltas:
+                if chunk:
+                    buffer.add(chunk)
+                if buffer.parts and (buffer.event_id == 0 or buffer.due()):
+                    paused = time.monotonic()
+                    yield buffer.flush()
+                    writing += time.monotonic() - paused
+            if buffer.parts:
+                yield buffer.flush()
+        finally:
+            await deltas.aclose()
+            _tag_writes(sending, buffer, writing)
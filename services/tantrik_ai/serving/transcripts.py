@@ -0,0 +1,222 @@
+"""
+Write-behind conversation log: completed turns are queued in memory and a background
+writer appends them as compressed blocks to rotating segment files
+"""
+
+import os
+import glob
+import json
+import mmap
+import time
+import zlib
+import queue
+import struct
+import logging
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from agents.metrics import QUEUE_DEPTH, TRANSCRIPT_RECORDS, child
+
+logger = logging.getLogger("tantrik-ai.transcripts")
+
+TRANSCRIPT_LOG = os.getenv("TRANSCRIPT_LOG", "0") == "1"
+TRANSCRIPT_DIR = os.getenv("TRANSCRIPT_DIR", "/tmp/tantrik_transcripts")
+# Turns waiting for the writer; beyond this new turns are dropped, never waited on
+TRANSCRIPT_QUEUE_SIZE = int(os.getenv("TRANSCRIPT_QUEUE_SIZE", 10000))
+# Records per compressed block, and the longest a queued turn waits for its block
+TRANSCRIPT_BATCH_SIZE = int(os.getenv("TRANSCRIPT_BATCH_SIZE", 256))
+TRANSCRIPT_FLUSH_SECONDS = float(os.getenv("TRANSCRIPT_FLUSH_SECONDS", 1.0))
+# A new segment file is started past this size; 0 keeps every segment, otherwise the oldest are deleted
+TRANSCRIPT_SEGMENT_BYTES = int(os.getenv("TRANSCRIPT_SEGMENT_BYTES", 64 * 1024 * 1024))
+TRANSCRIPT_MAX_SEGMENTS = int(os.getenv("TRANSCRIPT_MAX_SEGMENTS", 0))
+
+SEGMENT_SUFFIX = ".tlog"
+# Block header: magic, compressed payload length, record count
+BLOCK = struct.Struct("<4sII")
+MAGIC = b"TLG1"
+
+
+def encode_block(records: List[Dict[str, Any]]) -> bytes:
+    """One block: header + zlib-compressed JSON lines."""
+    lines = "\n".join(json.dumps(record, separators=(",", ":"), ensure_ascii=False) for record in records)
+    payload = zlib.compress(lines.encode("utf-8"), 6)
+    return BLOCK.pack(MAGIC, len(payload), len(records)) + payload
+
+
+def read_segment(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Records of one segment, read through a memory map.
+
+    A block cut short by a crash mid-write ends the segment instead of failing the scan.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offset = 0
+            while offset + BLOCK.size <= len(data):
+                magic, length, _ = BLOCK.unpack_from(data, offset)
+                start, offset = offset + BLOCK.size, offset + BLOCK.size + length
+                if magic != MAGIC or offset > len(data):
+                    logger.warning(f"⚠️ Truncated block in {path}, skipping the rest")
+                    return
+                for line in zlib.decompress(data[start:offset]).decode("utf-8").split("\n"):
+                    yield json.loads(line)
+
+
+def segments(directory: str = TRANSCRIPT_DIR) -> List[str]:
+    """Segment files, oldest first (names start with their creation time)."""
+    return sorted(glob.glob(os.path.join(directory, f"*{SEGMENT_SUFFIX}")))
+
+
+def scan(directory: str = TRANSCRIPT_DIR) -> Iterator[Dict[str, Any]]:
+    """Every logged turn in the directory, oldest segment first."""
+    for path in segments(directory):
+        yield from read_segment(path)
+
+
+class TranscriptLog:
+    """Bounded queue of finished turns drained by one writer thread."""
+
+    def __init__(
+        self,
+        directory: str = TRANSCRIPT_DIR,
+        queue_size: int = TRANSCRIPT_QUEUE_SIZE,
+        batch_size: int = TRANSCRIPT_BATCH_SIZE,
+        flush_seconds: float = TRANSCRIPT_FLUSH_SECONDS,
+        segment_bytes: int = TRANSCRIPT_SEGMENT_BYTES,
+        max_segments: int = TRANSCRIPT_MAX_SEGMENTS
+    ):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=queue_size)
+        self._segment = None
+        self._segment_size = 0
+        self._depth = child(QUEUE_DEPTH, "transcripts")
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="transcripts", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_env(cls) -> Optional["TranscriptLog"]:
+        if not TRANSCRIPT_LOG:
+            return None
+        logger.info(f"📜 Transcript log enabled ({TRANSCRIPT_DIR})")
+        return cls()
+
+    def append(self, record: Dict[str, Any]) -> bool:
+        """Queue a turn without blocking; False (and counted) when the writer is behind."""
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            child(TRANSCRIPT_RECORDS, "dropped").inc()
+            return False
+
+    def _batch(self) -> List[Dict[str, Any]]:
+        """Wait for a first record, then take what arrives within the flush window."""
+        records = [self._queue.get()]
+        flush_at = time.monotonic() + self.flush_seconds
+        while len(records) < self.batch_size:
+            try:
+                records.append(self._queue.get(timeout=max(0.0, flush_at - time.monotonic())))
+            except queue.Empty:
+                break
+        return records
+
+    def _run(self) -> None:
+        while True:
+            records = self._batch()
+            self._depth.set(self._queue.qsize())
+            try:
+                self._write(encode_block(records))
+            except Exception as e:
+                self.failed += len(records)
+                child(TRANSCRIPT_RECORDS, "failed").inc(len(records))
+                logger.warning(f"⚠️ Transcript write failed: {str(e)}")
+                self._close_segment()
+                continue
+            self.written += len(records)
+            child(TRANSCRIPT_RECORDS, "written").inc(len(records))
+
+    def _write(self, block: bytes) -> None:
+        if self._segment is None or (self.segment_bytes and self._segment_size >= self.segment_bytes):
+            self._rotate()
+        self._segment.write(block)
+        self._segment.flush()
+        self._segment_size += len(block)
+
+    def _rotate(self) -> None:
+        self._close_segment()
+        # Workers write their own segments, so files never interleave
+        name = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{time.time_ns() % 10 ** 9:09d}-{os.getpid()}"
+        self._segment = open(os.path.join(self.directory, name + SEGMENT_SUFFIX), "ab")
+        self._segment_size = 0
+        if self.max_segments:
+            for path in segments(self.directory)[:-self.max_segments]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _close_segment(self) -> None:
+        if self._segment is not None:
+            try:
+                self._segment.close()
+            finally:
+                self._segment = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "segments": len(segments(self.directory))
+        }
+
+
+TRANSCRIPTS = TranscriptLog.from_env()
+
+
+def log_turn(
+    endpoint: str,
+    spirit_id: Optional[str],
+    messages: List[Dict[str, str]],
+    reply: str,
+    started: float,
+    session_id: Optional[str] = None,
+    **details: Any
+) -> None:
+    """Hand a completed turn to the transcript log (no-op when disabled)."""
+    if TRANSCRIPTS is None:
+        return
+    record = {
+        "ts": round(started, 3),
+        "endpoint": endpoint,
+        "spirit": spirit_id,
+        "session_id": session_id,
+        "messages": messages,
+        "response": reply,
+        "duration_ms": round((time.time() - started) * 1000, 1)
+    }
+    record.update(details)
+    TRANSCRIPTS.append(record)
+
+
+def result_details(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Transcript fields of a chat() result."""
+    return {
+        "tokens": result.get("tokens_used"),
+        "model": result.get("model"),
+        "upstream": result.get("api_used"),
+        "cached": bool(result.get("cached"))
+    }
+
@@ -0,0 +1,63 @@
+"""
+Request validation shared by the Flask (WSGI) and ASGI entry points
+"""
+
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from agents.deadline import REQUEST_DEADLINE_SECONDS, Deadline
+
+DEADLINE_HEADER = "X-Request-Timeout"
+
+
+def validate_chat_request(
+    data: Any, spirits: Mapping[str, object]
+) -> Optional[Tuple[Dict[str, Any], int]]:
+    """
+    Validate a /chat or /stream JSON body.
+
+    Either "messages" (full history) or "message" (new turn of a
+    server-side session) must be present.
+
+    Args:
+        data: Parsed JSON body (or None if parsing failed)
+        spirits: Registry of available spirit agents
+
+    Returns:
+        (error_body, status) if the request is invalid, otherwise None
+    """
+    if not data or not isinstance(data, dict):
+        return {"error": "No JSON body provided"}, 400
+
+    spirit_id = data.get("spirit_id")
+    messages = data.get("messages")
+
+    if not spirit_id:
+        return {"error": "spirit_id is required"}, 400
+    if spirit_id not in spirits:
+        return {"error": "unknown spirit", "available": list(spirits.keys())}, 400
+    if messages is None and data.get("message") is not None:
+        # Session mode: only the new user message is sent
+        if not isinstance(data["message"], str) or not data["message"].strip():
+            return {"error": "message must be a non-empty string"}, 400
+        return None
+    if not messages or not isinstance(messages, list):
+        return {"error": "messages must be a non-empty list"}, 400
+
+    return None
+
+
+def request_deadline(headers: Mapping[str, str]) -> Deadline:
+    """
+    Overall deadline for one request.
+
+    Callers may shorten (never extend) the default budget by sending
+    X-Request-Timeout in seconds; unparsable values are ignored.
+    """
+    seconds = REQUEST_DEADLINE_SECONDS
+    try:
+        requested = float(headers.get(DEADLINE_HEADER, ""))
+        if requested > 0:
+            seconds = min(seconds, requested)
+    except ValueError:
+        pass
+    return Deadline.after(seconds)
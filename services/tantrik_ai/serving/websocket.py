@@ -0,0 +1,207 @@
+"""
+WebSocket chat channel: one long-lived connection carries many turns,
+multiplexed across spirits, over the same streaming path as /stream
+
+Client -> server (JSON text frames):
+    {"type": "chat", "id": "<turn id>", "spirit_id": "...", "messages": [...] | "message": "...", "session_id"?}
+    {"type": "cancel", "id": "<turn id>"}
+Server -> client:
+    {"type": "start", "id", "session_id"}
+    {"type": "delta", "id", "seq", "text"}
+    {"type": "done", "id", "session_id"} | {"type": "cancelled", "id"} | {"type": "error", "id", "error"}
+"""
+
+import os
+import json
+import asyncio
+import logging
+from typing import Any, Dict, Mapping, Optional
+
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from agents.metrics import WS_CONNECTIONS, count_request
+from agents.spirit_agent import Placeholder
+from agents.stream_stats import STREAM_STATS
+from agents.tracing import start_trace
+
+from .admission import ADMISSION, client_id
+from .sessions import SESSIONS, Turn
+from .sse import FrameBuffer, paced_async
+from .validation import request_deadline, validate_chat_request
+
+logger = logging.getLogger("tantrik-ai.ws")
+
+# Generations one connection may run at once
+WS_MAX_ACTIVE = int(os.getenv("WS_MAX_ACTIVE", 4))
+# Outgoing frames buffered per connection; when full, generations pause until the client reads
+WS_SEND_QUEUE = int(os.getenv("WS_SEND_QUEUE", 32))
+
+# Close code for a client that keeps sending while never reading its replies
+POLICY_VIOLATION = 1008
+
+
+class _NotReading(Exception):
+    """The outbox overflowed with replies to a client that sends but does not read."""
+
+
+class ChatSocket:
+    """One client connection: a reader that dispatches turns, a single writer, a task per generation."""
+
+    def __init__(self, websocket: WebSocket, spirits: Mapping[str, Any]):
+        self.ws = websocket
+        self.spirits = spirits
+        # One ordered outbox; its bound is enforced in _send and _reply
+        self.outbox: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        self.room = asyncio.Condition()
+        self.active: Dict[str, asyncio.Task] = {}
+        self.closed = False
+
+    async def serve(self) -> None:
+        await self.ws.accept()
+        WS_CONNECTIONS.inc()
+        writer = asyncio.ensure_future(self._write())
+        try:
+            while True:
+                frame = await self.ws.receive()
+                if frame["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(frame.get("code", 1000))
+                if frame.get("text") is None:
+                    self._reject(None, "frames must be JSON text")
+                    continue
+                try:
+                    message = json.loads(frame["text"])
+                except ValueError:
+                    self._reject(None, "frames must be JSON")
+                    continue
+                self._dispatch(message)
+        except WebSocketDisconnect:
+            pass
+        except _NotReading:
+            logger.warning("🙉 Client is not reading its replies; closing the connection")
+            await self.ws.close(code=POLICY_VIOLATION)
+        finally:
+            self.closed = True
+            for task in list(self.active.values()):
+                task.cancel()
+            writer.cancel()
+            WS_CONNECTIONS.dec()
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        """Queue a generation's frame, waiting while the outbox is full: a slow reader slows its generations."""
+        async with self.room:
+            await self.room.wait_for(lambda: self.outbox.qsize() < WS_SEND_QUEUE)
+            self.outbox.put_nowait(message)
+
+    def _reply(self, message: Dict[str, Any]) -> None:
+        """
+        Queue the reader's answer to a client frame without waiting, so a full
+        outbox never stops the reader from seeing the next (e.g. cancel) frame.
+
+        Raises:
+            _NotReading: once replies alone have filled a second outbox's worth
+        """
+        if self.outbox.qsize() >= 2 * WS_SEND_QUEUE:
+            raise _NotReading()
+        self.outbox.put_nowait(message)
+
+    async def _write(self) -> None:
+        while True:
+            message = await self.outbox.get()
+            async with self.room:
+                self.room.notify_all()
+            await self.ws.send_text(json.dumps(message))
+
+    async def _error(self, turn_id: Optional[str], error: str, **extra: Any) -> None:
+        await self._send({"type": "error", "id": turn_id, "error": error, **extra})
+
+    def _reject(self, turn_id: Optional[str], error: str) -> None:
+        self._reply({"type": "error", "id": turn_id, "error": error})
+
+    def _dispatch(self, message: Any) -> None:
+        if not isinstance(message, dict):
+            return self._reject(None, "frames must be JSON objects")
+        turn_id = message.get("id")
+        if not isinstance(turn_id, str) or not turn_id:
+            return self._reject(None, "id is required")
+
+        kind = message.get("type")
+        if kind == "cancel":
+            task = self.active.get(turn_id)
+            if task is None:
+                return self._reject(turn_id, "no active generation with this id")
+            task.cancel()
+            return self._reply({"type": "cancelled", "id": turn_id})
+        if kind != "chat":
+            return self._reject(turn_id, "type must be chat or cancel")
+        if turn_id in self.active:
+            return self._reject(turn_id, "id is already generating")
+        if len(self.active) >= WS_MAX_ACTIVE:
+            return self._reject(turn_id, f"at most {WS_MAX_ACTIVE} generations per connection")
+
+        invalid = validate_chat_request(message, self.spirits)
+        if invalid is None:
+            turn, invalid = SESSIONS.begin(message)
+        if invalid:
+            count_request("ws", "none", "invalid")
+            body, _ = invalid
+            return self._reject(turn_id, body["error"])
+
+        client = client_id(self.ws.client.host if self.ws.client else None, self.ws.headers, turn)
+        task = asyncio.ensure_future(self._generate(turn_id, message["spirit_id"], turn, client))
+        self.active[turn_id] = task
+        task.add_done_callback(lambda done: self.active.pop(turn_id) if self.active.get(turn_id) is done else None)
+
+    async def _generate(self, turn_id: str, spirit_id: str, turn: Turn, client: str) -> None:
+        trace = start_trace("WS chat")
+        spirit = self.spirits[spirit_id]
+        deadline = request_deadline(self.ws.headers)
+
+        reserved = None
+        if ADMISSION is not None:
+            reserved, rejected = await ADMISSION.admit_async(client, spirit, turn.messages, deadline)
+            if rejected:
+                count_request("ws", spirit_id, "rejected")
+                body, _ = rejected
+                return await self._error(turn_id, body["error"], retry_after=body["retry_after"])
+
+        outcome = "ok"
+        reply = []
+        buffer = FrameBuffer()
+        chunks = spirit.stream_chat(turn.messages, reserved=reserved, deadline=deadline)
+        deltas = paced_async(chunks, buffer)
+        try:
+            await self._send({"type": "start", "id": turn_id, "session_id": turn.session_id})
+            async for chunk in deltas:
+                if chunk:
+                    reply.append(chunk)
+                    buffer.add(chunk)
+                if buffer.parts and (buffer.event_id == 0 or buffer.due()):
+                    await self._delta(turn_id, buffer)
+            if buffer.parts:
+                await self._delta(turn_id, buffer)
+            # Every key failed: the placeholder the client saw is not the spirit's answer
+            if any(isinstance(chunk, Placeholder) for chunk in reply):
+                outcome = "failed"
+            else:
+                turn.record("".join(reply), "ws", tokens=len(reply))
+            await self._send({"type": "done", "id": turn_id, "session_id": turn.session_id})
+        except asyncio.CancelledError:
+            outcome = "disconnected" if self.closed else "cancelled"
+            if self.closed:
+                STREAM_STATS.client_disconnected()
+            logger.info(f"✋ {spirit.name} generation {outcome}")
+            raise
+        except Exception:
+            logger.exception("websocket generation failed")
+            outcome = "error"
+            await self._error(turn_id, "*The spirit's voice has faded...*")
+        finally:
+            # Leaving `async for` early does not close the deltas; they may still be awaiting the upstream
+            await deltas.aclose()
+            await chunks.aclose()
+            count_request("ws", spirit_id, outcome)
+            trace.finish(spirit=spirit_id, outcome=outcome)
+
+    async def _delta(self, turn_id: str, buffer: FrameBuffer) -> None:
+        text = buffer.take()
+        await self._send({"type": "delta", "id": turn_id, "seq": buffer.event_id, "text": text})
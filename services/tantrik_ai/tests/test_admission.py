@@ -0,0 +1,73 @@
+import itertools
+
+from agents import SpiritAgent
+from agents.deadline import Deadline
+from agents.response_cache import MemoryBackend
+from serving.admission import AdmissionControl, client_id
+from serving.sessions import SessionStore
+
+_keys = itertools.count()
+
+
+def _agent() -> SpiritAgent:
+    # Breakers and key state are process-wide per key, so every test gets fresh keys
+    n = next(_keys)
+    return SpiritAgent("Test Spirit", "You are a test.", f"sk-admit-{n}-p", f"sk-admit-{n}-f", spirit_id="test")
+
+
+def test_made_up_session_ids_fall_back_to_the_ip():
+    store = SessionStore(MemoryBackend(10))
+    turn, invalid = store.begin({"spirit_id": "test", "message": "hi", "session_id": "made-up"})
+    assert turn is None and invalid[1] == 404
+    assert client_id("10.0.0.1", {}) == "ip:10.0.0.1"
+
+    # A new session is not a confirmed one yet: its first turn still counts against the IP
+    turn, _ = store.begin({"spirit_id": "test", "message": "hi"})
+    assert client_id("10.0.0.1", {}, turn) == "ip:10.0.0.1"
+
+
+def test_confirmed_sessions_get_their_own_bucket():
+    store = SessionStore(MemoryBackend(10))
+    session_id = store.create("test")
+    turn, _ = store.begin({"spirit_id": "test", "message": "hi", "session_id": session_id})
+    assert client_id("10.0.0.1", {}, turn) == f"session:{session_id}"
+
+
+def test_stateless_turns_count_against_the_ip():
+    store = SessionStore(MemoryBackend(10))
+    turn, _ = store.begin({"spirit_id": "test", "messages": [{"role": "user", "content": "hi"}]})
+    assert client_id("10.0.0.1", {}, turn) == "ip:10.0.0.1"
+
+
+def test_no_key_is_reserved_when_keys_are_unlimited():
+    admission = AdmissionControl(client_rpm=0, client_tpm=0, key_rpm=0, key_tpm=0)
+    assert admission.admit("ip:a", _agent(), [{"role": "user", "content": "hi"}], Deadline.after(5)) == (None, None)
+
+
+def test_requests_spill_over_to_the_key_with_budget():
+    agent = _agent()
+    admission = AdmissionControl(client_rpm=0, client_tpm=0, key_rpm=1, key_tpm=0)
+    messages = [{"role": "user", "content": "hi"}]
+    assert admission.admit("ip:a", agent, messages, Deadline.after(5)) == ("primary", None)
+    assert admission.admit("ip:a", agent, messages, Deadline.after(5)) == ("fallback", None)
+
+    reserved, (body, status) = admission.admit("ip:a", agent, messages, Deadline.after(5))
+    assert reserved is None and status == 429 and body["reason"] == "upstream"
+
+
+def test_first_attempt_calls_the_reserved_key():
+    agent = _agent()
+    _, upstream = agent._route((), "fallback")
+    assert upstream.name == "fallback"
+    # Failovers are free to pick any key the request has not tried
+    _, upstream = agent._route(("fallback",), "fallback")
+    assert upstream.name == "primary"
+
+
+def test_reserved_key_with_an_open_circuit_is_not_called():
+    agent = _agent()
+    fallback = agent.keys.get("fallback")
+    for _ in range(fallback.breaker.failure_threshold):
+        fallback.breaker.record_failure()
+    _, upstream = agent._route((), "fallback")
+    assert upstream.name == "primary"
@@ -0,0 +1,58 @@
+import json
+import itertools
+
+from agents import SpiritAgent
+from serving import batch
+from serving.admission import AdmissionControl
+
+_keys = itertools.count()
+
+
+class _Spirit(SpiritAgent):
+    """Answers without calling upstream."""
+
+    def __init__(self, spirit_id="test"):
+        super().__init__("Test Spirit", "You are a test.", f"sk-batch-{next(_keys)}", spirit_id=spirit_id)
+        # Jobs run on several threads; list.append is atomic where += is not
+        self.calls = []
+
+    def chat(self, messages, reserved=None, deadline=None):
+        self.calls.append(messages)
+        return {"content": self.spirit_id, "model": "test", "tokens_used": 1, "api_used": reserved, "success": True}
+
+
+def _jobs(count: int, spirit_id: str = "test"):
+    messages = [{"role": "user", "content": "hi"}]
+    return [{"id": str(n), "spirit_id": spirit_id, "messages": messages} for n in range(count)]
+
+
+def test_a_full_size_batch_is_admitted_as_a_whole(monkeypatch):
+    # Admitted job by job, everything past the 60th would wait over a second and be rejected
+    monkeypatch.setattr(batch, "ADMISSION", AdmissionControl(client_rpm=60, client_tpm=0, max_wait=1))
+    spirit = _Spirit()
+    lines = [json.loads(line) for line in batch.Batch(_jobs(100), {"test": spirit}, "ip:a", {}).lines()]
+    assert lines[-1] == {"done": True, "jobs": 100, "succeeded": 100, "failed": 0}
+    assert len(spirit.calls) == 100
+
+
+def test_a_rejected_batch_answers_every_job_with_the_rejection(monkeypatch):
+    monkeypatch.setattr(batch, "ADMISSION", AdmissionControl(client_rpm=10, client_tpm=0, max_wait=1))
+    spirit = _Spirit()
+    list(batch.Batch(_jobs(10), {"test": spirit}, "ip:a", {}).lines())
+
+    lines = [json.loads(line) for line in batch.Batch(_jobs(3), {"test": spirit}, "ip:a", {}).lines()]
+    assert [line["error"] for line in lines[:-1]] == ["too many requests"] * 3
+    assert all(line["retry_after"] >= 1 for line in lines[:-1])
+    assert lines[-1]["succeeded"] == 0 and len(spirit.calls) == 10
+
+
+def test_jobs_for_several_spirits_go_through_each_spirits_chat_batch(monkeypatch):
+    monkeypatch.setattr(batch, "ADMISSION", None)
+    spirits = {"test": _Spirit("test"), "other": _Spirit("other")}
+    jobs = [dict(job, id=f"o{job['id']}") for job in _jobs(2, "other")] + _jobs(3) + _jobs(1, "other")
+    lines = [json.loads(line) for line in batch.Batch(jobs, spirits, "ip:a", {}).lines()]
+
+    replies = {line["index"]: (line["id"], line["response"]) for line in lines[:-1]}
+    assert replies == {0: ("o0", "other"), 1: ("o1", "other"), 2: ("0", "test"), 3: ("1", "test"), 4: ("2", "test"),
+                       5: ("0", "other")}
+    assert len(spirits["test"].calls) == 3 and len(spirits["other"].calls) == 3
@@ -0,0 +1,70 @@
+import httpx
+from openai import APIConnectionError, BadRequestError
+
+from agents.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, is_upstream_failure
+
+
+def _breaker(**kwargs) -> CircuitBreaker:
+    options = dict(failure_threshold=3, error_rate=0.5, window=10, slow_call_seconds=5.0, reset_seconds=30.0)
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def _expire(breaker: CircuitBreaker) -> None:
+    breaker.opened_at -= breaker.reset_seconds + 1
+
+
+def test_opens_after_consecutive_failures():
+    breaker = _breaker()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_opens_on_error_rate():
+    breaker = _breaker(failure_threshold=4, error_rate=0.5)
+    for failed in (True, False, True, False, True):
+        breaker.record_failure() if failed else breaker.record_success(0.1)
+    # 3 failures in 5 calls, never 4 in a row
+    assert breaker.state == OPEN
+
+
+def test_slow_calls_count_as_failures():
+    breaker = _breaker(failure_threshold=2)
+    breaker.record_success(6.0)
+    breaker.record_success(7.0)
+    assert breaker.state == OPEN
+
+
+def test_half_open_lets_one_probe_through_and_closes_on_success():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    _expire(breaker)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    _expire(breaker)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_only_upstream_errors_count_against_a_key():
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    assert is_upstream_failure(APIConnectionError(request=request))
+    bad_request = BadRequestError("bad", response=httpx.Response(400, request=request), body=None)
+    assert not is_upstream_failure(bad_request)
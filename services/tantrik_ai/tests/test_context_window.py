@@ -0,0 +1,59 @@
+import time
+
+from agents.context_window import ContextWindow, RollingSummarizer, message_tokens
+
+
+def _turns(*contents):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": c} for i, c in enumerate(contents)]
+
+
+def _wait_for(predicate, timeout=2.0):
+    until = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < until, "summary was not written"
+        time.sleep(0.01)
+
+
+def _summarize(previous, messages):
+    return " ".join(([previous] if previous else []) + [m["content"] for m in messages])
+
+
+def test_window_keeps_the_latest_turns_within_budget():
+    messages = _turns("a" * 400, "b" * 400, "c" * 40)
+    window = ContextWindow("dracula", budget=message_tokens({"content": "sys"}) + 100)
+    prompt, context = window.build("sys", messages)
+    assert prompt[0] == {"role": "system", "content": "sys"}
+    assert prompt[1:] == messages[2:]
+    assert context["messages_dropped"] == 2 and not context["summarized"]
+
+
+def test_latest_turn_is_kept_even_over_budget():
+    messages = _turns("x" * 4000)
+    prompt, context = ContextWindow("dracula", budget=10).build("sys", messages)
+    assert prompt[-1] == messages[-1] and context["messages_kept"] == 1
+
+
+def test_summaries_are_not_shared_between_conversations_with_the_same_opening():
+    summarizer = RollingSummarizer()
+    window = ContextWindow("dracula", budget=60, summarizer=summarizer)
+    alice = _turns("Hello", "Good evening.", "I am Alice at 12 Elm St. " * 8, "Noted.", "What now?")
+    window.build("sys", alice, _summarize)
+    _wait_for(lambda: summarizer._summaries)
+
+    bob = _turns("Hello", "Good evening.", "I am Bob and I like bats. " * 8, "Noted.", "What now?")
+    prompt, context = window.build("sys", bob, _summarize)
+    assert not context["summarized"]
+    assert all("Alice" not in m["content"] for m in prompt)
+
+
+def test_summary_carries_over_to_the_next_turn_of_the_same_conversation():
+    summarizer = RollingSummarizer()
+    window = ContextWindow("dracula", budget=60, summarizer=summarizer)
+    history = _turns("Hello", "Good evening.", "I am Alice at 12 Elm St. " * 8, "Noted.", "What now?")
+    window.build("sys", history, _summarize)
+    _wait_for(lambda: summarizer._summaries)
+
+    following = history + _turns("x", "Wait and see.", "Tell me more.")[1:]
+    prompt, context = window.build("sys", following, _summarize)
+    assert context["summarized"]
+    assert "Alice" in prompt[1]["content"]
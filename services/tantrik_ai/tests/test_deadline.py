@@ -0,0 +1,32 @@
+import httpx
+import pytest
+from openai import APIConnectionError, OpenAIError
+
+import agents.deadline as deadline_module
+from agents.deadline import ATTEMPT_TIMEOUT_SECONDS, Deadline, DeadlineExceeded
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def test_attempt_timeout_is_capped_per_attempt():
+    assert Deadline.after(1000).attempt_timeout() == ATTEMPT_TIMEOUT_SECONDS
+
+
+def test_attempt_timeout_keeps_back_at_most_half_for_the_fallback():
+    timeout = Deadline.after(12).attempt_timeout(reserve=10)
+    assert timeout == pytest.approx(6, abs=0.1)
+
+
+def test_no_attempt_is_started_without_enough_time():
+    with pytest.raises(DeadlineExceeded):
+        Deadline.after(0.5).attempt_timeout()
+    assert Deadline.after(0).expired()
+
+
+def test_retry_delay_only_for_upstream_failures_within_budget(monkeypatch):
+    monkeypatch.setattr(deadline_module, "UPSTREAM_MAX_RETRIES", 2)
+    deadline = Deadline.after(60)
+    assert deadline.retry_delay(0, APIConnectionError(request=REQUEST)) > 0
+    assert deadline.retry_delay(2, APIConnectionError(request=REQUEST)) == -1
+    assert deadline.retry_delay(0, OpenAIError("bad request")) == -1
+    assert Deadline.after(1.2).retry_delay(0, APIConnectionError(request=REQUEST)) == -1
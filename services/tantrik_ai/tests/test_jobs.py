@@ -0,0 +1,64 @@
+import time
+import threading
+
+import pytest
+
+from agents.response_cache import MemoryBackend
+from serving import jobs
+from serving.jobs import JobRunner, JobStore, _Jobs, webhook_error
+
+
+class _Spirit:
+    name = "Test Spirit"
+
+    def chat(self, messages, reserved=None, deadline=None):
+        return {"content": "boo", "model": "test", "tokens_used": 1, "api_used": "primary", "success": True}
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_webhooks_are_refused_without_an_allowlist(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_WEBHOOK_HOSTS", set())
+    assert webhook_error(None) is None
+    assert webhook_error("https://169.254.169.254/latest/meta-data") == (
+        "webhooks are disabled until JOB_WEBHOOK_HOSTS is set"
+    )
+
+
+def test_webhooks_only_go_to_allowed_https_hosts(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_WEBHOOK_HOSTS", {"hooks.example.com"})
+    assert webhook_error("https://hooks.example.com/done") is None
+    assert webhook_error("http://hooks.example.com/done") == "webhook_url must be an https URL"
+    assert webhook_error("https://localhost/done") == "webhook_url host is not allowed"
+    assert webhook_error(42) == "webhook_url must be a string"
+
+
+def test_runners_must_implement_start():
+    with pytest.raises(TypeError):
+        _Jobs(JobStore(MemoryBackend(10)))
+
+
+def test_webhook_delivery_does_not_hold_a_job_worker(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_WEBHOOK_HOSTS", {"hooks.example.com"})
+    monkeypatch.setattr(jobs, "ADMISSION", None)
+    receiver_up = threading.Event()
+    monkeypatch.setattr(jobs, "deliver_webhook", lambda url, job: receiver_up.wait(5))
+
+    runner = JobRunner(JobStore(MemoryBackend(100)), workers=1)
+    spirits = {"test": _Spirit()}
+    body = {"spirit_id": "test", "messages": [{"role": "user", "content": "hi"}]}
+    first, _ = runner.submit(dict(body, webhook_url="https://hooks.example.com/a"), spirits, "127.0.0.1", {})
+    second, _ = runner.submit(body, spirits, "127.0.0.1", {})
+
+    # The only worker is free for the second job while the first job's webhook is still hanging
+    assert _wait_for(lambda: runner.status(second["job_id"])[0]["status"] == "succeeded")
+    assert "webhook" not in runner.status(first["job_id"])[0]
+    receiver_up.set()
+    assert _wait_for(lambda: runner.status(first["job_id"])[0].get("webhook") == "delivered")
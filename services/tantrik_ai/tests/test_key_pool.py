@@ -0,0 +1,86 @@
+import itertools
+
+from agents.circuit_breaker import CLOSED, HALF_OPEN, OPEN
+from agents.key_pool import KeyPool, get_upstream, parse_reset
+
+_keys = itertools.count()
+
+
+def _pool(*names, scheduling="least_loaded") -> KeyPool:
+    # Upstreams and breakers are process-wide per key, so every test gets fresh keys
+    return KeyPool([get_upstream(name, f"sk-test-{next(_keys)}") for name in names], scheduling)
+
+
+def _trip(upstream) -> None:
+    for _ in range(upstream.breaker.failure_threshold):
+        upstream.breaker.record_failure()
+    assert upstream.breaker.state == OPEN
+
+
+def _expire(upstream) -> None:
+    upstream.breaker.opened_at -= upstream.breaker.reset_seconds + 1
+
+
+def _limits(remaining, limit=100):
+    return {"x-ratelimit-limit-requests": str(limit), "x-ratelimit-remaining-requests": str(remaining),
+            "x-ratelimit-reset-requests": "1m"}
+
+
+def test_parse_reset_durations():
+    assert parse_reset("1s") == 1.0
+    assert parse_reset("6m0s") == 360.0
+    assert parse_reset("20ms") == 0.02
+    assert parse_reset("2.5") == 2.5
+    assert parse_reset(None) is None
+
+
+def test_least_loaded_picks_the_key_with_most_headroom():
+    pool = _pool("primary", "fallback", "extra")
+    primary, fallback, extra = pool.upstreams
+    primary.observe(_limits(10))
+    fallback.observe(_limits(80))
+    extra.observe(_limits(50))
+    assert pool.pick() is fallback
+    assert pool.pick(exclude=("fallback",)) is extra
+
+
+def test_ties_keep_the_configured_order():
+    pool = _pool("primary", "fallback")
+    assert pool.pick() is pool.upstreams[0]
+
+
+def test_open_keys_are_skipped():
+    pool = _pool("primary", "fallback")
+    primary, fallback = pool.upstreams
+    _trip(primary)
+    assert pool.pick() is fallback
+
+
+def test_primary_recovers_after_the_reset_timeout():
+    pool = _pool("primary", "fallback")
+    primary, fallback = pool.upstreams
+    _trip(primary)
+    _expire(primary)
+
+    assert pool.pick() is primary
+    assert primary.breaker.state == HALF_OPEN
+    # One probe at a time; others keep using the fallback meanwhile
+    assert pool.pick() is fallback
+
+    primary.breaker.record_success(0.1)
+    assert primary.breaker.state == CLOSED
+    assert pool.pick() is primary
+
+
+def test_priority_uses_configured_order_and_skips_open_keys():
+    pool = _pool("primary", "fallback", scheduling="priority")
+    primary, fallback = pool.upstreams
+    primary.observe(_limits(1))
+    assert pool.pick() is primary
+    _trip(primary)
+    assert pool.pick() is fallback
+
+
+def test_everything_excluded_falls_back_to_the_whole_pool():
+    pool = _pool("primary")
+    assert pool.pick(exclude=("primary",)) is pool.upstreams[0]
@@ -0,0 +1,59 @@
+from agents.near_cache import NearDuplicateCache, jaccard, normalize_question, shingles, signature
+
+REPLY = {"success": True, "content": "I have walked the night for five centuries."}
+
+
+def _ask(text):
+    return [{"role": "user", "content": text}]
+
+
+def test_normalize_question_expands_shorthand_and_drops_filler():
+    assert normalize_question("R u REALLY a vampire??") == "are you vampire"
+    assert normalize_question("whyyy so old") == "why old"
+
+
+def test_signature_is_stable_and_tracks_similarity():
+    a = shingles(normalize_question("are you a vampire"))
+    b = shingles(normalize_question("are you vampire really"))
+    assert signature(a) == signature(a)
+    assert jaccard(a, b) > 0.6
+
+
+def test_near_identical_question_reuses_the_reply():
+    cache = NearDuplicateCache(threshold=0.6)
+    cache.add("dracula", _ask("Are you a vampire?"), REPLY)
+    hit = cache.get("dracula", _ask("r u a vampire"))
+    assert hit is not None and hit["content"] == REPLY["content"]
+    assert hit["similarity"] >= 0.6
+
+
+def test_unrelated_question_misses():
+    cache = NearDuplicateCache(threshold=0.6)
+    cache.add("dracula", _ask("Are you a vampire?"), REPLY)
+    assert cache.get("dracula", _ask("What is your favourite colour?")) is None
+
+
+def test_negated_question_does_not_match():
+    cache = NearDuplicateCache(threshold=0.6)
+    cache.add("dracula", _ask("Are you dead?"), REPLY)
+    assert cache.get("dracula", _ask("Are you not dead?")) is None
+
+
+def test_replies_are_scoped_per_spirit_and_can_be_forgotten():
+    cache = NearDuplicateCache(threshold=0.6)
+    cache.add("dracula", _ask("Are you a vampire?"), REPLY)
+    assert cache.get("reaper", _ask("Are you a vampire?")) is None
+    cache.forget("dracula")
+    assert cache.get("dracula", _ask("Are you a vampire?")) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_long_or_late_questions_are_not_indexed():
+    cache = NearDuplicateCache(threshold=0.6)
+    long_question = _ask(" ".join(["word"] * 40))
+    cache.add("dracula", long_question, REPLY)
+    late = _ask("hi") + [{"role": "assistant", "content": "..."}] + _ask("and") + [
+        {"role": "assistant", "content": "..."}
+    ] + _ask("are you a vampire")
+    cache.add("dracula", late, REPLY)
+    assert cache.stats()["entries"] == 0
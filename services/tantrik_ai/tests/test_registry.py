@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from agents.registry import SPIRITS_DIR, SpiritRegistry, load_definition, parse_definition
+
+DEFINITION = """---
+name: Test Spirit
+emoji: 🕯️
+temperature: 0.5
+max_tokens: 200
+order: 2
+---
+You are a test spirit.
+"""
+
+
+def _write(directory, spirit_id, text):
+    path = os.path.join(directory, f"{spirit_id}.md")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+def test_parse_definition_reads_front_matter_and_prompt(tmp_path):
+    definition = parse_definition(_write(str(tmp_path), "candle", DEFINITION))
+    assert definition.spirit_id == "candle"
+    assert definition.name == "Test Spirit"
+    assert definition.temperature == 0.5 and definition.max_tokens == 200 and definition.order == 2
+    assert definition.model == "gpt-4o-mini"
+    assert definition.system_prompt == "You are a test spirit.\n"
+    assert definition.metadata() == {"id": "candle", "name": "Test Spirit", "emoji": "🕯️"}
+
+
+@pytest.mark.parametrize("text, error", [
+    ("You are a test spirit.\n", "front matter"),
+    ("---\nname: X\nYou are a test spirit.\n", "unterminated"),
+    ("---\nname: X\ncolour: red\n---\nPrompt\n", "unknown field"),
+    ("---\nemoji: x\n---\nPrompt\n", "name"),
+    ("---\nname: X\n---\n\n", "prompt"),
+])
+def test_parse_definition_rejects_malformed_files(tmp_path, text, error):
+    with pytest.raises(ValueError, match=error):
+        parse_definition(_write(str(tmp_path), "broken", text))
+
+
+def test_parse_definition_rejects_bad_numbers(tmp_path):
+    with pytest.raises(ValueError):
+        parse_definition(_write(str(tmp_path), "broken", "---\nname: X\ntemperature: hot\n---\nPrompt\n"))
+
+
+def test_shipped_spirits_parse():
+    for spirit_id in ("dracula", "reaper", "bloody_mary"):
+        assert load_definition(spirit_id, SPIRITS_DIR).system_prompt.strip()
+
+
+def test_registry_is_ordered_and_builds_agents_lazily(tmp_path):
+    _write(str(tmp_path), "candle", DEFINITION)
+    _write(str(tmp_path), "ash", DEFINITION.replace("order: 2", "order: 1"))
+    registry = SpiritRegistry("sk-test", directory=str(tmp_path), reload_seconds=0)
+    assert list(registry) == ["ash", "candle"]
+    assert "candle" in registry and "missing" not in registry
+    assert registry.stats()["summoned"] == []
+    agent = registry["candle"]
+    assert registry["candle"] is agent
+    assert registry.stats()["summoned"] == ["candle"]
+
+
+def test_registry_reloads_changed_files_and_keeps_the_last_good_version(tmp_path):
+    path = _write(str(tmp_path), "candle", DEFINITION)
+    registry = SpiritRegistry("sk-test", directory=str(tmp_path), reload_seconds=0)
+    old = registry["candle"]
+
+    _write(str(tmp_path), "candle", DEFINITION.replace("temperature: 0.5", "temperature: 0.7"))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    registry._scan()
+    new = registry["candle"]
+    assert new is not old and new.temperature == 0.7
+
+    _write(str(tmp_path), "candle", "not a definition")
+    registry._scan()
+    assert registry["candle"] is new
+
+    os.remove(path)
+    registry._scan()
+    assert "candle" not in registry
+
+
+def test_empty_directory_is_an_error(tmp_path):
+    with pytest.raises(RuntimeError):
+        SpiritRegistry("sk-test", directory=str(tmp_path))
@@ -0,0 +1,63 @@
+import pytest
+
+import agents.response_cache as response_cache
+from agents.response_cache import MemoryBackend, ResponseCache, cache_key, replay_chunks
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "monotonic", clock)
+    return clock
+
+
+def test_entries_expire_after_their_ttl(clock):
+    backend = MemoryBackend(max_entries=4)
+    backend.set("k", {"content": "v"}, ttl=10)
+    clock.now += 9
+    assert backend.get("k") == {"content": "v"}
+    clock.now += 2
+    assert backend.get("k") is None
+    assert len(backend) == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    backend = MemoryBackend(max_entries=2)
+    backend.set("a", {"n": 1}, ttl=60)
+    backend.set("b", {"n": 2}, ttl=60)
+    backend.get("a")
+    backend.set("c", {"n": 3}, ttl=60)
+    assert backend.get("b") is None
+    assert backend.get("a") == {"n": 1}
+    assert backend.get("c") == {"n": 3}
+
+
+def test_per_spirit_ttl_of_zero_disables_caching(clock):
+    cache = ResponseCache(MemoryBackend(), default_ttl=300, ttls={"reaper": 0})
+    cache.set("r", {"content": "no"}, "reaper")
+    cache.set("d", {"content": "yes"}, "dracula")
+    assert cache.get("r") is None
+    assert cache.get("d") == {"content": "yes"}
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_cache_key_ignores_case_and_spacing_but_not_the_prompt_revision():
+    messages = [{"role": "user", "content": "Are  you   ALIVE?"}]
+    same = [{"role": "user", "content": "are you alive?"}]
+    assert cache_key("dracula", "gpt-4o-mini", 0.9, messages) == cache_key("dracula", "gpt-4o-mini", 0.9, same)
+    assert cache_key("dracula", "gpt-4o-mini", 0.9, messages, "abc") != cache_key(
+        "dracula", "gpt-4o-mini", 0.9, messages, "def"
+    )
+
+
+def test_replay_chunks_rebuild_the_content():
+    content = "I  am the\nnight "
+    assert "".join(replay_chunks(content)) == content
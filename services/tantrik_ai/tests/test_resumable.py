@@ -0,0 +1,70 @@
+import time
+import asyncio
+import threading
+
+from serving.resumable import GONE, LAGGED_FRAME, AsyncStreamRegistry, StreamRegistry
+
+FRAMES = [f"id: {n}\ndata: f{n}\n\n" for n in range(1, 21)]
+
+
+def produce():
+    yield from FRAMES
+
+
+def _wait_done(registry, stream_id: str) -> None:
+    replay = registry._streams[stream_id]
+    while not replay.done:
+        time.sleep(0.01)
+
+
+def test_follower_gets_every_frame_in_order():
+    registry = StreamRegistry(max_frames=64)
+    stream_id = registry.start(produce)
+    frames, _ = registry.attach(stream_id)
+    assert list(frames) == FRAMES
+
+
+def test_resume_replays_only_the_missed_frames():
+    registry = StreamRegistry(max_frames=64)
+    stream_id = registry.start(produce)
+    _wait_done(registry, stream_id)
+    frames, _ = registry.attach(stream_id, after=15)
+    assert list(frames) == FRAMES[15:]
+
+
+def test_resume_beyond_the_buffer_is_gone():
+    registry = StreamRegistry(max_frames=4)
+    stream_id = registry.start(produce)
+    _wait_done(registry, stream_id)
+    assert registry.attach(stream_id, after=2) == (None, GONE)
+
+
+def test_follower_that_falls_behind_gets_an_error_not_a_silent_gap():
+    attached = threading.Event()
+
+    def produce_once_attached():
+        attached.wait()
+        yield from FRAMES
+
+    registry = StreamRegistry(max_frames=4)
+    stream_id = registry.start(produce_once_attached)
+    # Attached before any frame, but does not read until the buffer has wrapped several times
+    frames, _ = registry.attach(stream_id)
+    attached.set()
+    _wait_done(registry, stream_id)
+    assert list(frames) == [LAGGED_FRAME]
+
+
+def test_async_follower_that_falls_behind_gets_an_error():
+    async def produce_async():
+        for frame in FRAMES:
+            yield frame
+
+    async def scenario():
+        registry = AsyncStreamRegistry(max_frames=4)
+        stream_id = registry.start(produce_async)
+        frames, _ = registry.attach(stream_id)
+        await registry._streams[stream_id].task
+        return [frame async for frame in frames]
+
+    assert asyncio.run(scenario()) == [LAGGED_FRAME]
@@ -0,0 +1,38 @@
+from agents import routing
+from agents.routing import FAST, STANDARD, ModelRouter, ModelStats, Route
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def _router(stats):
+    return ModelRouter(Route(STANDARD, "big", 500, ""), Route(FAST, "small", 150, ""), stats)
+
+
+def test_a_failing_model_is_routed_around(monkeypatch):
+    monkeypatch.setattr(routing, "time", _Clock())
+    stats = ModelStats(window_seconds=60)
+    for _ in range(10):
+        stats.observe("small", None)
+
+    route = _router(stats).choose([{"role": "user", "content": "hi"}])
+    assert route.model == "big"
+    assert route.reason == "small error rate 100%"
+
+
+def test_a_degraded_model_recovers_once_its_samples_age_out(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(routing, "time", clock)
+    stats = ModelStats(window_seconds=60)
+    for _ in range(10):
+        stats.observe("small", None)
+    assert stats.degraded("small")
+
+    clock.now += 61
+    assert stats.degraded("small") is None
+    assert _router(stats).choose([{"role": "user", "content": "hi"}]).model == "small"
@@ -0,0 +1,63 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from agents.deadline import Deadline, DeadlineExceeded
+from agents.single_flight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "shared"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", slow)))
+    leader.start()
+    time.sleep(0.05)
+    follower = threading.Thread(target=lambda: results.append(flight.do("k", slow)))
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join()
+    follower.join()
+    assert results == ["shared", "shared"] and len(calls) == 1
+
+
+def test_follower_gives_up_at_its_own_deadline():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader = threading.Thread(target=flight.do, args=("k", lambda: release.wait(5)))
+    leader.start()
+    time.sleep(0.05)
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        flight.do("k", lambda: "unused", Deadline.after(0.1))
+    assert time.monotonic() - started < 1
+    release.set()
+    leader.join()
+
+
+def test_async_follower_gives_up_without_cancelling_the_shared_call():
+    async def scenario():
+        flight = AsyncSingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.3)
+            return "shared"
+
+        leader = asyncio.ensure_future(flight.do("k", slow))
+        await asyncio.sleep(0)
+        with pytest.raises(DeadlineExceeded):
+            await flight.do("k", slow, Deadline.after(0.05))
+        return await leader
+
+    assert asyncio.run(scenario()) == "shared"
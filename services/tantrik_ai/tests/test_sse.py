@@ -0,0 +1,80 @@
+import time
+import asyncio
+import threading
+
+from serving.sse import FrameBuffer, coalesce, coalesce_async, sse_event
+
+
+def test_sse_event_splits_lines_and_numbers_the_event():
+    assert sse_event("hello", 3) == "id: 3\ndata: hello\n\n"
+    assert sse_event("a\r\nb\rc\nd") == "data: a\ndata: b\ndata: c\ndata: d\n\n"
+
+
+def test_sse_event_keeps_empty_lines_as_data_fields():
+    assert sse_event("a\n\nb") == "data: a\ndata: \ndata: b\n\n"
+
+
+def test_frame_buffer_is_due_at_the_size_limit():
+    buffer = FrameBuffer(window_ms=60000, max_chars=5)
+    buffer.add("abc")
+    assert not buffer.due()
+    buffer.add("de")
+    assert buffer.due()
+    assert buffer.flush() == "id: 1\ndata: abcde\n\n"
+    assert not buffer.due()
+
+
+def test_coalesce_sends_the_first_delta_at_once_and_batches_the_rest():
+    frames = list(coalesce(iter(["Hel", "lo", " there", ""]), window_ms=60000))
+    assert frames == ["id: 1\ndata: Hel\n\n", "id: 2\ndata: lo there\n\n"]
+
+
+def test_coalesce_without_a_window_sends_every_delta():
+    frames = list(coalesce(iter(["a", "b", "c"]), window_ms=0))
+    assert frames == [sse_event("a", 1), sse_event("b", 2), sse_event("c", 3)]
+
+
+def _slow_deltas():
+    yield "a"
+    yield "b"
+    time.sleep(0.5)
+    yield "c"
+
+
+def test_coalesce_flushes_a_due_frame_without_waiting_for_the_next_delta():
+    sent = [(frame, time.monotonic()) for frame in coalesce(_slow_deltas(), window_ms=50)]
+    assert [frame for frame, _ in sent] == [sse_event("a", 1), sse_event("b", 2), sse_event("c", 3)]
+    # "b" went out when its window closed, not when "c" arrived
+    assert sent[2][1] - sent[1][1] > 0.3
+
+
+def test_coalesce_async_flushes_a_due_frame_without_waiting_for_the_next_delta():
+    async def deltas():
+        yield "a"
+        yield "b"
+        await asyncio.sleep(0.5)
+        yield "c"
+
+    async def frames():
+        return [(frame, time.monotonic()) async for frame in coalesce_async(deltas(), window_ms=50)]
+
+    sent = asyncio.run(frames())
+    assert [frame for frame, _ in sent] == [sse_event("a", 1), sse_event("b", 2), sse_event("c", 3)]
+    assert sent[2][1] - sent[1][1] > 0.3
+
+
+def test_coalesce_closes_the_source_when_the_client_leaves():
+    closed = threading.Event()
+
+    def deltas():
+        try:
+            while True:
+                yield "x"
+                time.sleep(0.01)
+        finally:
+            closed.set()
+
+    frames = coalesce(deltas(), window_ms=50)
+    next(frames)
+    frames.close()
+    assert closed.wait(1)
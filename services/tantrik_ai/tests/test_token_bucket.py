@@ -0,0 +1,40 @@
+import pytest
+
+from serving.admission import TokenBucket
+
+
+def test_full_bucket_admits_at_once():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.wait(1, bucket.updated) == 0.0
+
+
+def test_empty_bucket_waits_for_the_refill():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated
+    bucket.take(60)
+    assert bucket.wait(1, now) == pytest.approx(1.0)
+    assert bucket.wait(1, now + 1.0) == pytest.approx(0.0)
+
+
+def test_admitted_requests_can_drive_the_level_negative():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated
+    bucket.take(60)
+    bucket.take(1)
+    # The next request queues behind the one that borrowed ahead
+    assert bucket.wait(1, now) == pytest.approx(2.0)
+
+
+def test_refill_is_capped_at_one_minute_of_budget():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated
+    bucket.wait(1, now + 3600)
+    assert bucket.level == 60
+
+
+def test_a_request_larger_than_the_bucket_drains_a_full_bucket():
+    bucket = TokenBucket(per_minute=100)
+    now = bucket.updated
+    assert bucket.wait(500, now) == 0.0
+    bucket.take(500)
+    assert bucket.level == 0
@@ -0,0 +1,138 @@
+import json
+import asyncio
+
+from agents.spirit_agent import Placeholder
+from serving import websocket
+from serving.sessions import Turn
+from serving.websocket import POLICY_VIOLATION, ChatSocket
+
+
+class _Socket:
+    """A client that sends the given frames and never reads what the server sends back."""
+
+    client = None
+    headers = {}
+
+    def __init__(self):
+        self.incoming: "asyncio.Queue" = asyncio.Queue()
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+        await asyncio.Event().wait()
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+    def text(self, message):
+        self.incoming.put_nowait({"type": "websocket.receive", "text": json.dumps(message)})
+
+    def disconnect(self):
+        self.incoming.put_nowait({"type": "websocket.disconnect", "code": 1000})
+
+
+class _Spirit:
+    name = "Test Spirit"
+
+    def __init__(self):
+        self.started = []
+
+    def stream_chat(self, messages, reserved=None, deadline=None):
+        self.started.append(messages[-1]["content"])
+        return self._deltas()
+
+    async def _deltas(self):
+        while True:
+            yield "boo "
+            await asyncio.sleep(0.001)
+
+
+def _chat(turn_id):
+    return {"type": "chat", "id": turn_id, "spirit_id": "test", "messages": [{"role": "user", "content": turn_id}]}
+
+
+async def _until(predicate, timeout=2.0):
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+def test_client_frames_are_still_read_while_the_outbox_is_full(monkeypatch):
+    monkeypatch.setattr(websocket, "WS_SEND_QUEUE", 2)
+    monkeypatch.setattr(websocket, "ADMISSION", None)
+
+    async def scenario():
+        ws, spirit = _Socket(), _Spirit()
+        chat = ChatSocket(ws, {"test": spirit})
+        serving = asyncio.ensure_future(chat.serve())
+        ws.text(_chat("t1"))
+        assert await _until(lambda: chat.outbox.qsize() >= 2)
+
+        ws.text({"type": "cancel", "id": "t1"})
+        ws.text(_chat("t2"))
+        started = await _until(lambda: spirit.started == ["t1", "t2"])
+        ws.disconnect()
+        await serving
+        return started
+
+    assert asyncio.run(scenario())
+
+
+def test_binary_frames_get_an_error():
+    async def scenario():
+        ws = _Socket()
+        chat = ChatSocket(ws, {"test": _Spirit()})
+        ws.incoming.put_nowait({"type": "websocket.receive", "bytes": b"\x00"})
+        ws.disconnect()
+        await chat.serve()
+        return chat.outbox.get_nowait() if ws.sent == [] else ws.sent[0]
+
+    assert asyncio.run(scenario()) == {"type": "error", "id": None, "error": "frames must be JSON text"}
+
+
+def test_a_client_that_never_reads_is_closed(monkeypatch):
+    monkeypatch.setattr(websocket, "WS_SEND_QUEUE", 2)
+
+    async def scenario():
+        ws = _Socket()
+        chat = ChatSocket(ws, {"test": _Spirit()})
+        for _ in range(10):
+            ws.text({"type": "bogus"})
+        await asyncio.wait_for(chat.serve(), 2)
+        return ws.closed_with
+
+    assert asyncio.run(scenario()) == POLICY_VIOLATION
+
+
+class _Turn(Turn):
+    def __init__(self):
+        super().__init__([{"role": "user", "content": "t1"}])
+        self.recorded = []
+
+    def record(self, reply, endpoint, **details):
+        self.recorded.append(reply)
+
+
+class _FailingSpirit(_Spirit):
+    async def _deltas(self):
+        yield Placeholder("*The spirit's voice fades into the void...*")
+
+
+def test_a_failed_stream_is_not_recorded(monkeypatch):
+    monkeypatch.setattr(websocket, "ADMISSION", None)
+
+    async def scenario(spirit):
+        turn = _Turn()
+        await ChatSocket(_Socket(), {"test": spirit})._generate("t1", "test", turn, "client")
+        return turn.recorded
+
+    assert asyncio.run(scenario(_FailingSpirit())) == []
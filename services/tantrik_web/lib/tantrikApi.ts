@@ -47,6 +47,80 @@ export async function sendChatMessage(
   return await response.json();
 }
 
+// How often a dropped stream is resumed before giving up
+const MAX_STREAM_RESUMES = 3;
+
+// An "event: error" the server sent mid-stream; resuming will not help
+class StreamEventError extends Error {}
+
+function eventError(payload: string): StreamEventError {
+  try {
+    return new StreamEventError(JSON.parse(payload).error ?? payload);
+  } catch {
+    return new StreamEventError(payload);
+  }
+}
+
+// Read SSE events until the body ends; resolves true once [DONE] arrives.
+// Throws StreamEventError on an "event: error" (e.g. the reply fell out of the resume buffer)
+async function readEvents(
+  body: ReadableStream<Uint8Array>,
+  onData: (payload: string) => void,
+  onId: (id: string) => void,
+): Promise<boolean> {
+  const reader = body.getReader();
+  const decoder = new TextDecoder("utf-8");
+  let buffer = "";
+  // "event:" and "data:" lines of the event being read; a blank line ends the event
+  let eventName = "";
+  let dataLines: string[] = [];
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) return false;
+
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split("\n");
+    buffer = lines.pop() ?? "";
+
+    for (const rawLine of lines) {
+      const line = rawLine.endsWith("\r") ? rawLine.slice(0, -1) : rawLine;
+
+      if (line === "") {
+        const name = eventName;
+        eventName = "";
+        if (dataLines.length === 0) continue;
+        // Multi-line text arrives as several "data:" lines of one event
+        const payload = dataLines.join("\n");
+        dataLines = [];
+        if (name === "error") throw eventError(payload);
+        if (payload === "[DONE]") return true;
+
+        // Each event is just text, not JSON
+        if (payload) onData(payload);
+        continue;
+      }
+
+      if (line.startsWith("id:")) {
+        onId(line.slice(3).trim());
+        continue;
+      }
+
+      if (line.startsWith("event:")) {
+        eventName = line.slice(6).trim();
+        continue;
+      }
+
+      // Other fields (comments, retry) are not needed here
+      if (!line.startsWith("data:")) continue;
+
+      // Strip only the single space after "data:"
+      // Don't use trim() as it removes the spaces we need!
+      dataLines.push(line.startsWith("data: ") ? line.slice(6) : line.slice(5));
+    }
+  }
+}
+
 // Streaming chat with SSE
 export async function sendStreamingMessage({
   spiritId,
@@ -62,7 +136,7 @@ export async function sendStreamingMessage({
   onError?: (error: Error) => void;
 }) {
   try {
-    const response = await fetch(`${API_BASE}/stream`, {
+    let response = await fetch(`${API_BASE}/stream`, {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
@@ -80,32 +154,35 @@ export async function sendStreamingMessage({
       throw new Error(`Stream failed: ${response.status}`);
     }
 
-    const reader = response.body.getReader();
-    const decoder = new TextDecoder("utf-8");
-    let buffer = "";
-
-    while (true) {
-      const { value, done } = await reader.read();
-      if (done) break;
-
-      buffer += decoder.decode(value, { stream: true });
-      const lines = buffer.split("\n");
-      buffer = lines.pop() ?? "";
-
-      for (const line of lines) {
-        if (!line.startsWith("data:")) continue;
+    // Lets a dropped connection pick up where it left off instead of asking again
+    const streamId = response.headers.get("X-Stream-Id");
+    let lastEventId = "";
+
+    for (let resumes = 0; ; resumes++) {
+      let failure: Error | null = null;
+      try {
+        const finished = await readEvents(response.body!, onChunk, (id) => {
+          lastEventId = id;
+        });
+        if (finished) break;
+      } catch (error) {
+        if (error instanceof StreamEventError) throw error;
+        failure = error as Error;
+      }
 
-        // Extract payload after "data: " (note the space!)
-        // Don't use trim() as it removes the spaces we need!
-        const payload = line.slice(6); // "data: ".length = 6
-        if (!payload) continue;
-        if (payload === "[DONE]") {
-          onComplete?.();
-          return;
-        }
+      if (!streamId || resumes >= MAX_STREAM_RESUMES) {
+        if (failure) throw failure;
+        break;
+      }
 
-        // Each chunk is just text, not JSON
-        onChunk(payload);
+      response = await fetch(`${API_BASE}/stream/${streamId}`, {
+        headers: {
+          Accept: "text/event-stream",
+          ...(lastEventId ? { "Last-Event-ID": lastEventId } : {}),
+        },
+      });
+      if (!response.ok || !response.body) {
+        throw failure ?? new Error(`Stream resume failed: ${response.status}`);
       }
     }
 